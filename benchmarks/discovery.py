@@ -0,0 +1,59 @@
+"""Compare finding the settings files with iter_characters and with a glob.
+
+Run with: python -m benchmarks.discovery [--characters N]
+"""
+import argparse
+import re
+import tempfile
+from pathlib import Path
+from typing import List
+from typing import Tuple
+
+from .settings_tree import generate_settings_tree
+from .suite import time_best
+from swtor_settings_updater.character import iter_characters
+
+
+def glob_characters(root: Path) -> List[Tuple[Path, str, str, str]]:
+    """The discovery update_all used before iter_characters."""
+    characters = []
+    for path in sorted(root.glob("*/settings/[hH][eE]*_*_PlayerGUIState.ini")):
+        match = re.fullmatch(
+            r"(?P<server_id>[hH][eE][^_]+)_(?P<character_name>[^_]+)"
+            r"_PlayerGUIState.ini",
+            path.name,
+        )
+        assert match
+        characters.append(
+            (
+                path,
+                path.parent.parent.name,
+                match.group("server_id").lower(),
+                match.group("character_name"),
+            )
+        )
+    return characters
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--characters", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        paths = generate_settings_tree(root, args.characters, settings=1)
+
+        glob_time = time_best(lambda: glob_characters(root), args.rounds)
+        scandir_time = time_best(lambda: list(iter_characters(root)), args.rounds)
+
+    print(
+        f"glob: {glob_time * 1000:8.1f} ms,"
+        f" iter_characters: {scandir_time * 1000:8.1f} ms"
+        f" ({len(paths)} files, {glob_time / scandir_time:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Compare the update_all engines on a synthetic settings directory.
+
+Run with: python -m benchmarks.engines [--characters N] [--settings N]
+"""
+import argparse
+import tempfile
+from pathlib import Path
+from typing import get_args
+from typing import MutableMapping
+
+from .settings_tree import generate_settings_tree
+from .suite import time_best
+from swtor_settings_updater import character
+from swtor_settings_updater.character import CharacterMetadata
+from swtor_settings_updater.character import Engine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--characters", type=int, default=250)
+    parser.add_argument("--settings", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    for engine in get_args(Engine):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            paths = generate_settings_tree(root, args.characters, args.settings)
+
+            value = 0
+
+            def change(_char: CharacterMetadata, s: MutableMapping[str, str]) -> None:
+                s["GUI_Setting0"] = str(value)
+
+            def rewrite() -> None:
+                nonlocal value
+                value += 1
+                character.update_all(root, change, engine=engine)
+
+            def no_change() -> None:
+                character.update_all(root, change, engine=engine)
+
+            rewrite_time = time_best(rewrite, args.rounds)
+            no_change_time = time_best(no_change, args.rounds)
+
+        print(
+            f"{engine:>12}: {rewrite_time * 1000:8.1f} ms rewriting,"
+            f" {no_change_time * 1000:8.1f} ms unchanged"
+            f" ({len(paths)} files, {args.settings} settings each)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Measure the cold-start import time of swtor_settings_updater.
+
+Run with: python -m benchmarks.import_time [--rounds N]
+
+Every round imports the module in a new interpreter with -X importtime.
+"""
+import argparse
+import subprocess
+import sys
+from typing import Dict
+
+
+MODULES = [
+    "swtor_settings_updater",
+    "swtor_settings_updater.character",
+    "swtor_settings_updater.chat",
+]
+
+
+def import_time(module: str) -> float:
+    """The cumulative import time of module in a new interpreter, in seconds."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stderr=subprocess.PIPE,
+        check=True,
+        text=True,
+    )
+    total_us = 0
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            # Only count the top-level imports to avoid counting twice.
+            if not fields[2].startswith("  "):
+                total_us += int(fields[1])
+    return total_us / 1e6
+
+
+def bench(rounds: int) -> Dict[str, Dict[str, float]]:
+    return {
+        f"import[{module}]": {
+            "seconds": min(import_time(module) for _ in range(rounds))
+        }
+        for module in MODULES
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    for name, result in bench(args.rounds).items():
+        print(f"{name:>40}: {result['seconds'] * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
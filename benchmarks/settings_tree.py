@@ -0,0 +1,110 @@
+"""Generate a synthetic SWTOR settings directory for benchmarking.
+
+Run with: python -m benchmarks.settings_tree DIRECTORY [--characters N]
+"""
+import argparse
+import random
+from pathlib import Path
+from typing import List
+from typing import Set
+from typing import Tuple
+
+
+ENVIRONMENTS = {
+    # The live servers use a lower case "he", the PTS an upper case "HE".
+    "swtor": ["he3000", "he3001", "he4000", "he4001", "he4002"],
+    "publictest": ["HE4343"],
+}
+
+# fmt: off
+NAME_SYLLABLES = [
+    "Kai", "Zyk", "ken", "Pla", "gue", "is", "Sa", "tele", "Shan", "Lä", "ná",
+    "Ëri", "Ør", "jä", "Æth", "Vø", "ßa", "Ðar", "ÿn", "Ço", "ra", "Thé", "xon",
+]
+# fmt: on
+
+DEFAULT_CHAT_COLORS = (
+    "b3ecff;ff7397;ff8022;a59ff3;eeee00;eeee00;B3ECFF;B3ECFF;B3ECFF;1d8cfe;"
+    "82ec89;FF00FF;EFBC55;317A3C;eeee00;FF0000;eeee00;ff7f7f;EEEE00;EEEE00;"
+    "EEEE00;eeee00;eeee00;eeee00;eeee00;eeee00;eeee00;eeee00;eeee00;FF5400;"
+    "eeee00;eeee00;eeee00;A00000;C92E56;BB4FD2;1FAB29;FF6600;"
+)
+
+
+def character_name(rng: random.Random) -> str:
+    """A character name with CP1252 characters, without spaces or underscores."""
+    syllables = rng.choices(NAME_SYLLABLES, k=rng.randint(2, 4))
+    return "".join(syllables).capitalize()
+
+
+def settings_content(rng: random.Random, settings: int) -> bytes:
+    """The content of a PlayerGUIState.ini with roughly the given number of keys."""
+    lines = [
+        "[Settings]",
+        "Show_Chat_TimeStamp = false",
+        "GUI_Current_Profile = Default",
+        "ChatChannels = 1.General.137438953471;2.Other.0;",
+        "Chat_Custom_Channels = ",
+        f"ChatColors = {DEFAULT_CHAT_COLORS}",
+    ]
+    for n in range(settings - len(lines) + 1):
+        kind = n % 4
+        if kind == 0:
+            value = rng.choice(["true", "false"])
+        elif kind == 1:
+            value = str(rng.randint(0, 10))
+        elif kind == 2:
+            value = f"{rng.random():.12f}"
+        else:
+            value = rng.choice(["Default", "myprofile", "€äö", ""])
+        lines.append(f"GUI_Setting{n:04} = {value}")
+    lines.append("")
+    return "\r\n".join(lines).encode("CP1252")
+
+
+def generate_settings_tree(
+    root: Path, characters: int = 1000, settings: int = 300, seed: int = 0
+) -> List[Path]:
+    """Create characters PlayerGUIState.ini files per environment in root.
+
+    Return the paths of the created files.
+    """
+    rng = random.Random(seed)
+    paths = []
+
+    for environment, server_ids in ENVIRONMENTS.items():
+        settings_dir = root / environment / "settings"
+        settings_dir.mkdir(parents=True, exist_ok=True)
+
+        names: Set[Tuple[str, str]] = set()
+        while len(names) < characters:
+            server_id = rng.choice(server_ids)
+            names.add((server_id, character_name(rng)))
+
+        for server_id, name in sorted(names):
+            path = settings_dir / f"{server_id}_{name}_PlayerGUIState.ini"
+            path.write_bytes(settings_content(rng, settings))
+            paths.append(path)
+
+        # Other files the game keeps in the settings directory.
+        (settings_dir / "client_settings.ini").write_bytes(b"[Settings]\r\n")
+
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--characters", type=int, default=1000)
+    parser.add_argument("--settings", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = generate_settings_tree(
+        args.directory, args.characters, args.settings, args.seed
+    )
+    print(f"Generated {len(paths)} files in {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Time the main operations and the import time of swtor_settings_updater.
+
+Run with: python -m benchmarks.suite [--output FILE] [--compare FILE]
+
+The results are written as JSON so that runs can be compared.
+"""
+import argparse
+import json
+import platform
+import tempfile
+import timeit
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+from typing import Callable
+from typing import Dict
+from typing import get_args
+from typing import List
+from typing import MutableMapping
+
+from . import import_time
+from .settings_tree import generate_settings_tree
+from swtor_settings_updater import character
+from swtor_settings_updater import Chat
+from swtor_settings_updater.character import CharacterMetadata
+from swtor_settings_updater.character import Engine
+from swtor_settings_updater.settings_profile import SettingsProfile
+from swtor_settings_updater.util.swtor_case import swtor_lower
+
+
+Results = Dict[str, Dict[str, float]]
+
+
+def time_best(run: Callable[[], object], rounds: int, number: int = 1) -> float:
+    """The best time per call of the given number of rounds, in seconds."""
+    return min(timeit.repeat(run, repeat=rounds, number=number)) / number
+
+
+def time_micro(run: Callable[[], object], rounds: int) -> Dict[str, float]:
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=rounds, number=number)) / number
+    return {"seconds": best, "calls_per_second": 1 / best}
+
+
+def example_chat() -> Chat:
+    """A chat configuration like the one in the README."""
+    chat = Chat()
+    chn = chat.standard_channels
+    chn.group.color = chn.ops.color
+    chat.panel("General")
+    other = chat.panel("Other")
+    other.display(chn.emote, chn.yell, chn.guild, chn.say, chn.whisper, chn.group)
+    chat.custom_channel("Gsf")
+    myguild = chat.custom_channel("Myguild")
+    myguild.color = chn.guild.color
+    other.display(myguild)
+    return chat
+
+
+def bench_update(root: Path, paths: List[Path], rounds: int) -> Results:
+    results = {}
+    for engine in get_args(Engine):
+        for name, result in bench_update_engine(root, paths, rounds, engine).items():
+            results[f"{name}[{engine}]"] = result
+    return results
+
+
+def bench_update_engine(
+    root: Path, paths: List[Path], rounds: int, engine: Engine
+) -> Results:
+    counter = 0
+
+    def change(_char: CharacterMetadata, s: MutableMapping[str, str]) -> None:
+        s["GUI_Benchmark"] = str(counter)
+
+    def update_all_rewrite() -> None:
+        nonlocal counter
+        counter += 1
+        character.update_all(root, change, engine=engine)
+
+    def update_all_rewrite_transactional() -> None:
+        nonlocal counter
+        counter += 1
+        character.update_all(root, change, engine=engine, transactional=True)
+
+    def update_all_unchanged() -> None:
+        character.update_all(root, change, engine=engine)
+
+    def update_path_rewrite() -> None:
+        nonlocal counter
+        counter += 1
+        character.update_path(paths[0], change, engine=engine)
+
+    results = {}
+    for name, run in [
+        ("update_all_rewrite", update_all_rewrite),
+        ("update_all_rewrite_transactional", update_all_rewrite_transactional),
+        ("update_all_unchanged", update_all_unchanged),
+    ]:
+        seconds = time_best(run, rounds)
+        results[name] = {"seconds": seconds, "files_per_second": len(paths) / seconds}
+    results["update_path_rewrite"] = time_micro(update_path_rewrite, rounds)
+    return results
+
+
+# The static settings of the README example.
+EXAMPLE_SETTINGS = {
+    "Show_Chat_TimeStamp": "true",
+    "GUI_Current_Profile": "myprofile",
+    "GUI_WelcomeWindowIsOpen": "false",
+    "GUI_ShowCompletedReputations": "false",
+    "GUI_ShowUnstartedReputations": "false",
+    "GUI_ShowAlignment": "true",
+    "GUI_InvitesAsSocialMessage": "true",
+    "GUI_ShowCooldownText": "true",
+    "GUI_CooldownStyle": "3",
+    "GUI_GCDStyle": "1",
+    "GUI_MiniMapZoom": "0.842999994755",
+    "GUI_MapFadeTo": "50.0",
+    "GUI_GCConfirmOpenPack": "false",
+    "GUI_ConfirmAmplifierCharge": "false",
+    "GUI_InventoryAutoCloseBank": "false",
+    "GUI_InventoryAutoCloseVendor": "false",
+    "GUI_QuickslotLockState": "true",
+    "GUI_WhoListNumberInChat": "0",
+    "GroupFinder_Operation_InProgress": "true",
+    "GUI_CraftingMoveQuality": "6",
+}
+
+
+def bench_profile(root: Path, paths: List[Path], rounds: int) -> Results:
+    """Apply the example settings with a callback and with a SettingsProfile."""
+    # Alternate between two versions of the settings so that every run rewrites
+    # the files.
+    versions = [dict(EXAMPLE_SETTINGS, GUI_Benchmark=str(n)) for n in range(2)]
+    profiles = [SettingsProfile(settings) for settings in versions]
+    counter = 0
+
+    def assign(_char: CharacterMetadata, s: MutableMapping[str, str]) -> None:
+        for key, value in versions[counter % 2].items():
+            s[key] = value
+
+    results = {}
+    for engine in get_args(Engine):
+
+        def update_all_callback() -> None:
+            nonlocal counter
+            counter += 1
+            character.update_all(root, assign, engine=engine)
+
+        def update_all_profile() -> None:
+            nonlocal counter
+            counter += 1
+            character.update_all(root, profile=profiles[counter % 2], engine=engine)
+
+        for name, run in [
+            ("update_all_example_callback", update_all_callback),
+            ("update_all_example_profile", update_all_profile),
+        ]:
+            seconds = time_best(run, rounds)
+            results[f"{name}[{engine}]"] = {
+                "seconds": seconds,
+                "files_per_second": len(paths) / seconds,
+            }
+    return results
+
+
+def bench_chat(rounds: int) -> Results:
+    chat = example_chat()
+    template = chat.freeze()
+    settings: Dict[str, str] = {}
+    chat.apply(settings)
+    parsed = Chat.from_settings(settings)
+
+    def apply_changed() -> None:
+        chat.standard_channels.say.color.r ^= 1
+        chat.apply(settings)
+
+    names = ["Kai Zykken", "PLAGUEIS", "Ørshantele", "general", "Myguild"] * 20
+
+    return {
+        "Chat()": time_micro(Chat, rounds),
+        "example_chat": time_micro(example_chat, rounds),
+        "Chat.apply": time_micro(lambda: chat.apply(settings), rounds),
+        "Chat.apply[changed]": time_micro(apply_changed, rounds),
+        "Chat.from_settings": time_micro(lambda: Chat.from_settings(settings), rounds),
+        "Chat.__eq__": time_micro(lambda: parsed == chat, rounds),
+        "ChatTemplate.derive.apply": time_micro(
+            lambda: template.derive().apply(settings), rounds
+        ),
+        "ChatTemplate.derive.custom_channel": time_micro(
+            lambda: template.derive().custom_channel("Extra").color, rounds
+        ),
+        "swtor_lower[100]": time_micro(lambda: [swtor_lower(n) for n in names], rounds),
+    }
+
+
+def compare(results: Results, baseline: Results) -> None:
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = baseline[name]["seconds"] / result["seconds"]
+        print(f"{name:>40}: {ratio:6.2f}x the speed of the baseline")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--characters", type=int, default=1000)
+    parser.add_argument("--settings", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--compare", type=Path, help="Results of a previous run")
+    args = parser.parse_args()
+
+    results: Results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        paths = generate_settings_tree(root, args.characters, args.settings)
+        results.update(bench_update(root, paths, args.rounds))
+        results.update(bench_profile(root, paths, args.rounds))
+
+    results.update(bench_chat(args.rounds))
+    results.update(import_time.bench(args.rounds))
+
+    for name, result in results.items():
+        print(f"{name:>40}: {result['seconds'] * 1000:10.4f} ms")
+
+    output = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "characters": args.characters,
+            "settings": args.settings,
+            "rounds": args.rounds,
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(output, indent=2))
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text())["results"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compare swtor_lower and swtor_upper with the former regex implementation.
+
+Run with: python -m benchmarks.swtor_case
+"""
+import argparse
+from typing import Callable
+from typing import Dict
+from typing import List
+
+import regex
+
+from .suite import time_micro
+from swtor_settings_updater.util.swtor_case import swtor_lower
+from swtor_settings_updater.util.swtor_case import swtor_lower_all
+from swtor_settings_updater.util.swtor_case import swtor_upper
+from swtor_settings_updater.util.swtor_case import swtor_upper_all
+
+
+def regex_swtor_lower(string: str) -> str:
+    return regex.sub("[A-Z]+", lambda m: m.group(0).lower(), string)
+
+
+def regex_swtor_upper(string: str) -> str:
+    return regex.sub("[a-z]+", lambda m: m.group(0).upper(), string)
+
+
+STRINGS = {
+    "ascii": ["he4242", "HE4343", "Kai Zykken", "General", "Myguild", "GSF"] * 20,
+    "cp1252": ["Ørshantele", "Lä Ná", "Æthÿn", "Çoraxon", "Ðarßa", "ŒUVRE"] * 20,
+}
+
+
+def bench(strings: List[str], rounds: int) -> Dict[str, float]:
+    """The time per string of each implementation, in seconds."""
+    cases: Dict[str, Callable[[], object]] = {
+        "regex lower": lambda: [regex_swtor_lower(s) for s in strings],
+        "lower": lambda: [swtor_lower(s) for s in strings],
+        "lower_all": lambda: swtor_lower_all(strings),
+        "regex upper": lambda: [regex_swtor_upper(s) for s in strings],
+        "upper": lambda: [swtor_upper(s) for s in strings],
+        "upper_all": lambda: swtor_upper_all(strings),
+    }
+    return {
+        name: time_micro(case, rounds)["seconds"] / len(strings)
+        for name, case in cases.items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    for kind, strings in STRINGS.items():
+        for name, seconds in bench(strings, args.rounds).items():
+            print(f"{kind:>6} {name:>11}: {seconds * 1e9:8.1f} ns per string")
+
+
+if __name__ == "__main__":
+    main()
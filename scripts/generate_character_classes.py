@@ -0,0 +1,96 @@
+"""Generate the precomputed character classes of swtor_settings_updater.
+
+Run with: python scripts/generate_character_classes.py [--check]
+
+Print the constants to be pasted into the source, or with --check, exit with an
+error if the constants in the source are out of date.
+"""
+import argparse
+import codecs
+import sys
+from itertools import zip_longest
+from typing import Dict
+from typing import List
+
+import regex
+
+from swtor_settings_updater import chat
+from swtor_settings_updater.util import character_class
+from swtor_settings_updater.util.character_class import regex_character_class
+
+
+def cp1252_printable() -> str:
+    """The printable characters of CP1252, in the order of their bytes."""
+    return regex.sub(
+        r"\p{C}+",
+        "",
+        codecs.decode(bytes(range(0, 0x100)), encoding="CP1252", errors="ignore"),
+    )
+
+
+def constants() -> Dict[str, Dict[str, str]]:
+    """The constants by module."""
+    printable = cp1252_printable()
+    return {
+        "swtor_settings_updater.util.character_class": {
+            "CP1252_PRINTABLE": printable,
+        },
+        "swtor_settings_updater.chat": {
+            "PANEL_NAME_CHARACTER_CLASS": regex_character_class(printable, ".;"),
+            "CUSTOM_CHANNEL_PASSWORD_CHARACTER_CLASS": regex_character_class(
+                printable, ' ;"&<>'
+            ),
+        },
+    }
+
+
+def string_literal(string: str) -> str:
+    """A double-quoted literal with the invisible characters escaped."""
+    literal = ""
+    for c in string:
+        if c in '"\\':
+            literal += f"\\{c}"
+        elif c.isprintable():
+            literal += c
+        else:
+            literal += f"\\x{ord(c):02x}"
+    return f'"{literal}"'
+
+
+def format_constant(name: str, value: str, chunk_size: int = 48) -> List[str]:
+    characters = [iter(value)] * chunk_size
+    chunks = ["".join(c) for c in zip_longest(*characters, fillvalue="")]
+    return [f"{name} = ("] + [f"    {string_literal(c)}" for c in chunks] + [")"]
+
+
+def check() -> bool:
+    modules = {
+        "swtor_settings_updater.util.character_class": character_class,
+        "swtor_settings_updater.chat": chat,
+    }
+    ok = True
+    for module_name, module_constants in constants().items():
+        for name, value in module_constants.items():
+            if getattr(modules[module_name], name) != value:
+                print(f"{module_name}.{name} is out of date", file=sys.stderr)
+                ok = False
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check() else 1)
+
+    for module_name, module_constants in constants().items():
+        print(f"# {module_name}")
+        for name, value in module_constants.items():
+            print("\n".join(format_constant(name, value)))
+        print()
+
+
+if __name__ == "__main__":
+    main()
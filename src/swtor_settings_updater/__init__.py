@@ -1,10 +1,40 @@
-from . import character
-from .character import CharacterMetadata
-from .chat import Chat
-from .color import Color
-from .util.settings_dir import default_settings_dir
+import importlib
+from typing import Any
+from typing import List
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import character
+    from .character import CharacterMetadata
+    from .chat import Chat
+    from .color import Color
+    from .util.settings_dir import default_settings_dir
 
 
 __version__ = "0.0.4"
 
 __all__ = ["character", "CharacterMetadata", "Chat", "Color", "default_settings_dir"]
+
+# The submodules are imported on first use to keep the startup fast.
+_LAZY_ATTRIBUTES = {
+    "character": (".character", None),
+    "CharacterMetadata": (".character", "CharacterMetadata"),
+    "Chat": (".chat", "Chat"),
+    "Color": (".color", "Color"),
+    "default_settings_dir": (".util.settings_dir", "default_settings_dir"),
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module_name, attribute = _LAZY_ATTRIBUTES[name]
+    module = importlib.import_module(module_name, __name__)
+    value = module if attribute is None else getattr(module, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
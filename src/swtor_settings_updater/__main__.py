@@ -0,0 +1,5 @@
+import sys
+
+from swtor_settings_updater.cli import main
+
+sys.exit(main())
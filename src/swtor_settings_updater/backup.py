@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Union
+
+from atomicwrites import atomic_write
+
+
+BACKUP_VERSION = 1
+
+
+logger = logging.getLogger(__name__)
+
+
+class BackupStore:
+    """Back up settings files into a content-addressed store.
+
+    The contents of the files are stored once per distinct content under
+    objects/, named by their SHA-256. Each backup run is a manifest under runs/
+    which maps the paths relative to the settings directory to the hashes, so a
+    file unchanged since an earlier run only costs a manifest entry. A file whose
+    size and modification time match the latest run is not even read again.
+
+    The settings directory is recorded resolved, so that however it is spelled,
+    the runs refer to the same directory regardless of the working directory.
+    """
+
+    root: Path
+
+    def __init__(self, root: Union[str, os.PathLike]) -> None:
+        self.root = Path(root)
+
+    def object_path(self, sha256: str) -> Path:
+        return self.root / "objects" / sha256[:2] / sha256[2:]
+
+    def run_path(self, run_id: str) -> Path:
+        return self.root / "runs" / f"{run_id}.json"
+
+    def runs(self) -> List[str]:
+        """The IDs of the backup runs, oldest first."""
+        try:
+            return sorted(p.stem for p in (self.root / "runs").glob("*.json"))
+        except FileNotFoundError:
+            return []
+
+    def backup(
+        self, settings_dir: Union[str, os.PathLike], paths: Iterable[Path]
+    ) -> str:
+        """Back up the files at paths under settings_dir. Return the run ID."""
+        settings_dir = Path(settings_dir)
+        resolved_dir = str(settings_dir.resolve())
+
+        previous = {}
+        runs = self.runs()
+        if runs:
+            data = self.read_run(runs[-1])
+            if data["settings_dir"] == resolved_dir:
+                previous = data["files"]
+
+        files: Dict[str, Dict[str, Any]] = {}
+        stored = 0
+        for path in paths:
+            key = path.relative_to(settings_dir).as_posix()
+            stat = path.stat()
+
+            entry = previous.get(key)
+            if (
+                entry is None
+                or entry["size"] != stat.st_size
+                or entry["mtime_ns"] != stat.st_mtime_ns
+            ):
+                content = path.read_bytes()
+                sha256 = hashlib.sha256(content).hexdigest()
+                if self._store(sha256, content):
+                    stored += 1
+                entry = {
+                    "sha256": sha256,
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                }
+            files[key] = entry
+
+        run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S.%fZ")
+        run_path = self.run_path(run_id)
+        run_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": BACKUP_VERSION,
+            "settings_dir": resolved_dir,
+            "files": files,
+        }
+        with atomic_write(run_path, encoding="UTF-8", overwrite=False) as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+
+        logger.info(
+            f"Backed up {len(files)} file(s) as {run_id}, {stored} new content(s)"
+        )
+        return run_id
+
+    def _store(self, sha256: str, content: bytes) -> bool:
+        """Store content unless already stored. Return whether it was stored."""
+        object_path = self.object_path(sha256)
+        if object_path.exists():
+            return False
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_write(object_path, mode="wb", overwrite=True) as f:
+            f.write(content)
+        return True
+
+    def read_run(self, run_id: str) -> Dict[str, Any]:
+        with open(self.run_path(run_id), "r", encoding="UTF-8") as f:
+            data = json.load(f)
+        if data.get("version") != BACKUP_VERSION:
+            raise ValueError(f"Unknown backup format: {self.run_path(run_id)}")
+        return data
+
+    def restore(
+        self, run_id: str, settings_dir: Optional[Union[str, os.PathLike]] = None
+    ) -> List[Path]:
+        """Restore the files of a run, by default into the directory backed up.
+
+        Only the files whose contents differ are written. Return their paths.
+        """
+        data = self.read_run(run_id)
+        if settings_dir is None:
+            settings_dir = data["settings_dir"]
+        settings_dir = Path(settings_dir)
+
+        restored = []
+        for key, entry in sorted(data["files"].items()):
+            path = settings_dir / key
+            content = self.object_path(entry["sha256"]).read_bytes()
+            if hashlib.sha256(content).hexdigest() != entry["sha256"]:
+                raise ValueError(f"Corrupted backup of {key}")
+
+            try:
+                if path.read_bytes() == content:
+                    continue
+            except FileNotFoundError:
+                path.parent.mkdir(parents=True, exist_ok=True)
+
+            with atomic_write(path, mode="wb", overwrite=True) as f:
+                f.write(content)
+            restored.append(path)
+
+        logger.info(f"Restored {len(restored)} file(s) from {run_id}")
+        return restored
@@ -1,17 +1,42 @@
-import configparser
 import dataclasses as dc
+import functools
+import hashlib
+import io
 import logging
 import os
 import re
+import time
+from concurrent.futures import Executor
 from pathlib import Path
 from typing import Callable
+from typing import Dict
+from typing import FrozenSet
+from typing import Generator
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Literal
+from typing import Mapping
 from typing import MutableMapping
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import TYPE_CHECKING
 from typing import Union
 
-from atomicwrites import atomic_write
-
-from swtor_settings_updater.util.option_transformer import OptionTransformer
+from swtor_settings_updater.stats import FileStats
+from swtor_settings_updater.stats import RunStats
+from swtor_settings_updater.util.key_table import KeyTable
 from swtor_settings_updater.util.swtor_case import swtor_lower
+from swtor_settings_updater.util.swtor_case import swtor_lower_all
+from swtor_settings_updater.util.tracking_mapping import TrackingMapping
+
+# The modules needed only by some of the options are imported where they are used to
+# keep the startup fast.
+if TYPE_CHECKING:
+    from swtor_settings_updater.backup import BackupStore
+    from swtor_settings_updater.manifest import Manifest
+    from swtor_settings_updater.settings_profile import SettingsProfile
 
 
 @dc.dataclass
@@ -24,48 +49,893 @@ class CharacterMetadata:
 
 UpdateCallback = Callable[[CharacterMetadata, MutableMapping[str, str]], None]
 
+# configparser rewrites the whole file in its own format. stream only replaces the
+# lines of the settings which changed.
+Engine = Literal["configparser", "stream"]
+
+# Assign and delete settings in bulk, see SettingsPatcher.merge.
+Merge = Callable[[Mapping[str, Tuple[str, str]], Mapping[str, str]], List[str]]
+
+
+# Examples:
+# .../SWTOR/swtor/settings/he4242_Kai Zykken_PlayerGUIState.ini
+# .../SWTOR/publictest/settings/HE4343_Plagueis_PlayerGUIState.ini
+FILENAME_REGEX = re.compile(
+    r"(?P<server_id>[hH][eE][^_]+)_(?P<character_name>[^_]+)_PlayerGUIState.ini"
+)
+
+# The files which look like settings files, the same as the glob
+# */settings/[hH][eE]*_*_PlayerGUIState.ini. A candidate not matching FILENAME_REGEX
+# is an error.
+CANDIDATE_FILENAME_REGEX = re.compile(r"[hH][eE].*_.*_PlayerGUIState\.ini", re.DOTALL)
+
 
 logger = logging.getLogger(__name__)
 
 
-def update_all(settings_dir: Union[str, os.PathLike], callback: UpdateCallback) -> None:
-    settings_dir = Path(settings_dir)
+def iter_characters(
+    settings_dir: Union[str, os.PathLike]
+) -> Iterator[Tuple[Path, CharacterMetadata]]:
+    """Find the settings files of the characters in settings_dir, in sorted order.
 
-    for path in settings_dir.glob("*/settings/[hH][eE]*_*_PlayerGUIState.ini"):
-        update_path(path, callback)
+    Raise ValueError for a file which looks like a settings file but whose name
+    does not parse.
+    """
+    for path, environment, name in iter_settings_files(settings_dir):
+        yield (path, _character_metadata(environment, name, path))
 
 
-def update_path(path: Union[str, os.PathLike], callback: UpdateCallback) -> None:
-    path = Path(path)
+def iter_settings_files(
+    settings_dir: Union[str, os.PathLike]
+) -> Iterator[Tuple[Path, str, str]]:
+    """Find the files which look like settings files in settings_dir, in sorted order.
 
-    # Examples:
-    # .../SWTOR/swtor/settings/he4242_Kai Zykken_PlayerGUIState.ini
-    # .../SWTOR/publictest/settings/HE4343_Plagueis_PlayerGUIState.ini
+    Yield their paths, environments and filenames. The filenames are not parsed,
+    see FILENAME_REGEX.
+    """
+    settings_dir = os.fspath(settings_dir)
 
-    environment = path.parent.parent.name
+    with os.scandir(settings_dir) as it:
+        environments = sorted(e.name for e in it if e.is_dir())
 
-    match = re.fullmatch(
-        r"(?P<server_id>[hH][eE][^_]+)_(?P<character_name>[^_]+)_PlayerGUIState.ini",
-        path.name,
-    )
+    for environment in environments:
+        environment_settings_dir = os.path.join(settings_dir, environment, "settings")
+        try:
+            with os.scandir(environment_settings_dir) as it:
+                names = sorted(
+                    e.name for e in it if CANDIDATE_FILENAME_REGEX.fullmatch(e.name)
+                )
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+
+        # Joining a single name is much faster than parsing each path from scratch.
+        environment_settings_path = Path(environment_settings_dir)
+        for name in names:
+            yield (environment_settings_path / name, environment, name)
+
+
+def character_metadata(path: Union[str, os.PathLike]) -> CharacterMetadata:
+    """Parse the character metadata from the path of a settings file."""
+    path = Path(path)
+    return _character_metadata(path.parent.parent.name, path.name, path)
+
+
+def _character_metadata(
+    environment: str, filename: str, path: Path
+) -> CharacterMetadata:
+    match = FILENAME_REGEX.fullmatch(filename)
     if not match:
         raise ValueError(f"Unrecognized filename: {path!r}")
 
-    metadata = CharacterMetadata(
+    return CharacterMetadata(
         environment=environment,
         # Normalize the server ID to lower case.
         server_id=swtor_lower(match.group("server_id")),
         name=match.group("character_name"),
     )
 
+
+def update_all(
+    settings_dir: Union[str, os.PathLike],
+    callback: Optional[UpdateCallback] = None,
+    jobs: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    callback_version: Optional[str] = None,
+    manifest_path: Optional[Union[str, os.PathLike]] = None,
+    engine: Engine = "configparser",
+    stats: Optional[RunStats] = None,
+    predicate: Optional[Callable[[CharacterMetadata], bool]] = None,
+    environments: Optional[Iterable[str]] = None,
+    server_ids: Optional[Iterable[str]] = None,
+    names: Optional[Iterable[str]] = None,
+    transactional: bool = False,
+    backup: Optional["BackupStore"] = None,
+    profile: Optional["SettingsProfile"] = None,
+    dry_run: bool = False,
+) -> List[Path]:
+    """Update the settings of every character in settings_dir.
+
+    The files are updated one at a time by default. Pass jobs to update up to that
+    many files concurrently in a thread pool, or pass an executor (for instance a
+    ProcessPoolExecutor, in which case the callback must be picklable) to use it
+    instead. Either way the files are processed in sorted order and the first
+    error in that order is raised.
+
+    Pass a callback_version to skip the files which have not changed since they
+    were last updated with the same callback version. The state is kept in a
+    manifest at manifest_path (by default beside settings_dir, see
+    manifest.default_manifest_path) which is saved after a successful run. Change
+    the version whenever the callback changes.
+
+    The engine selects how the files are parsed and written, see Engine.
+
+    Pass a RunStats to record how long each phase of the run took.
+
+    To update only some of the characters, pass a predicate and/or the
+    environments, server_ids or names (case-insensitive) to include. They are
+    matched against the filenames; the other files are not opened at all.
+
+    In transactional mode no file is written until every file has been processed
+    successfully. The new contents are then written and renamed over the files
+    together, see FileTransaction.
+
+    Pass a BackupStore to back up the files to be updated before the run.
+
+    Pass a SettingsProfile to apply static settings in bulk, before the callback if
+    there is one. With a callback_version, the manifest also tracks the contents
+    of the profile.
+
+    In dry_run mode the files are processed as usual but nothing is written:
+    neither the files, the manifest nor a backup.
+
+    Return the paths of the files which were rewritten, or would have been.
+    """
+    run_start = time.perf_counter()
+    settings_dir = Path(settings_dir)
+
+    _check_arguments(callback, profile, engine, jobs, executor)
+    if callback_version is not None and profile is not None:
+        callback_version = f"{callback_version}+{profile.digest()}"
+
+    include = _character_filter(predicate, environments, server_ids, names)
+
+    characters = list(iter_characters(settings_dir))
+    if stats is not None:
+        stats.discover += time.perf_counter() - run_start
+
+    # The manifest keeps the entries of the excluded files.
+    all_paths = [path for path, _metadata in characters]
+
+    if include is not None:
+        characters = [(p, metadata) for p, metadata in characters if include(metadata)]
+        excluded = len(all_paths) - len(characters)
+        logger.info(f"{excluded} file(s) are excluded")
+        if stats is not None:
+            stats.excluded += excluded
+
+    manifest: Optional[Manifest] = None
+    if callback_version is not None:
+        from swtor_settings_updater.manifest import default_manifest_path
+        from swtor_settings_updater.manifest import Manifest
+
+        if manifest_path is None:
+            manifest_path = default_manifest_path(settings_dir)
+        manifest = Manifest.load(manifest_path, settings_dir)
+        included = len(characters)
+        characters = [
+            (path, metadata)
+            for path, metadata in characters
+            if not manifest.is_current(path, callback_version)
+        ]
+        skipped = included - len(characters)
+        logger.info(f"{skipped} file(s) are already up to date")
+        if stats is not None:
+            stats.skipped += skipped
+
+    if backup is not None and not dry_run:
+        backup.backup(settings_dir, [path for path, _metadata in characters])
+
+    update = functools.partial(
+        _update_file,
+        callback=callback,
+        engine=engine,
+        write=not (transactional or dry_run),
+        keep_content=transactional and not dry_run,
+        digest=manifest is not None and not dry_run,
+        profile=profile,
+        # The setting names are interned and lower-cased once for the whole run.
+        key_table=KeyTable(),
+    )
+    paths = [path for path, _metadata in characters]
+    metadatas = [metadata for _path, metadata in characters]
+
+    results: Iterable[_FileResult]
+    results = _map_files(update, paths, metadatas, jobs, executor)
+
+    if transactional and not dry_run:
+        from swtor_settings_updater.util.transaction import FileTransaction
+
+        # Only the transactional mode keeps every new content until the end.
+        results = list(results)
+        with FileTransaction() as transaction:
+            for path, result in zip(paths, results):
+                if result.rewritten:
+                    assert result.content is not None
+                    start = time.perf_counter()
+                    result.stat = transaction.stage(path, result.content)
+                    result.stats.bytes_written = len(result.content)
+                    result.content = None
+                    result.stats.record("write", start)
+
+            start = time.perf_counter()
+            transaction.commit()
+            if stats is not None:
+                stats.commit += time.perf_counter() - start
+
+    # Otherwise the results are consumed one at a time as the files finish.
+    rewritten = []
+    for path, result in zip(paths, results):
+        if result.rewritten:
+            rewritten.append(path)
+        if manifest is not None and not dry_run:
+            assert callback_version is not None and result.sha256 is not None
+            manifest.record(path, result.stat, result.sha256, callback_version)
+        if stats is not None:
+            stats.files.append(result.stats)
+
+    if manifest is not None and not dry_run:
+        manifest.retain(all_paths)
+        manifest.save()
+
+    if stats is not None:
+        stats.wall += time.perf_counter() - run_start
+
+    return rewritten
+
+
+def _map_files(
+    update: Callable[[Path, CharacterMetadata], "_FileResult"],
+    paths: List[Path],
+    metadatas: List[CharacterMetadata],
+    jobs: Optional[int],
+    executor: Optional[Executor],
+) -> Iterator["_FileResult"]:
+    # Executor.map yields the results (and raises the errors) in input order.
+    if executor is not None:
+        yield from executor.map(update, paths, metadatas)
+
+    elif jobs is not None and jobs > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            yield from pool.map(update, paths, metadatas)
+
+    else:
+        yield from map(update, paths, metadatas)
+
+
+@dc.dataclass
+class UpdateResult:
+    """The outcome of updating one file with iter_update_all."""
+
+    __slots__ = [
+        "path",
+        "character",
+        "rewritten",
+        "seconds",
+        "bytes_written",
+        "error",
+        "stats",
+    ]
+    path: Path
+    # None if the filename did not parse.
+    character: Optional[CharacterMetadata]
+    rewritten: bool
+    seconds: float
+    bytes_written: int
+    error: Optional[Exception]
+    # The durations of the phases, None if the update failed.
+    stats: Optional[FileStats]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def iter_update_all(
+    settings_dir: Union[str, os.PathLike],
+    callback: Optional[UpdateCallback] = None,
+    jobs: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    engine: Engine = "configparser",
+    stats: Optional[RunStats] = None,
+    predicate: Optional[Callable[[CharacterMetadata], bool]] = None,
+    environments: Optional[Iterable[str]] = None,
+    server_ids: Optional[Iterable[str]] = None,
+    names: Optional[Iterable[str]] = None,
+    profile: Optional["SettingsProfile"] = None,
+    dry_run: bool = False,
+    window: Optional[int] = None,
+) -> Generator[UpdateResult, None, None]:
+    """Update the settings of every character, yielding a result per file.
+
+    Like update_all, but an error in a file, including a filename which does not
+    parse, is yielded in its UpdateResult and the other files are still updated.
+    The files are discovered and updated as the iterator is consumed, so it can
+    drive a progress display or be stopped early.
+
+    The results are yielded in sorted order by default. With jobs or an executor
+    they are yielded as the files finish, with up to window files in progress;
+    closing the iterator cancels the files not yet started. The window is twice
+    the jobs by default, or with an executor, whose size is not public, twice the
+    CPU count.
+
+    A RunStats records the discovery interleaved with the updates. Its wall time
+    only counts the time spent inside the iterator, not in the caller.
+
+    The manifest, transactional mode and backups of update_all are not supported.
+    """
+    _check_arguments(callback, profile, engine, jobs, executor)
+    if window is not None and window < 1:
+        raise ValueError(f"Invalid window: {window!r}")
+
+    include = _character_filter(predicate, environments, server_ids, names)
+    update = functools.partial(
+        _try_update_file,
+        callback=callback,
+        engine=engine,
+        write=not dry_run,
+        key_table=KeyTable(),
+        profile=profile,
+    )
+
+    def tasks() -> Iterator[Union[UpdateResult, Tuple[Path, CharacterMetadata]]]:
+        excluded = 0
+        files = iter_settings_files(settings_dir)
+        while True:
+            # Time the discovery, interleaved with the updates.
+            start = time.perf_counter()
+            entry = next(files, None)
+            if stats is not None:
+                stats.discover += time.perf_counter() - start
+            if entry is None:
+                break
+
+            path, environment, name = entry
+            try:
+                metadata = _character_metadata(environment, name, path)
+            except ValueError as e:
+                yield UpdateResult(path, None, False, 0.0, 0, e, None)
+                continue
+            if include is not None and not include(metadata):
+                excluded += 1
+                continue
+            yield (path, metadata)
+        if stats is not None:
+            stats.excluded += excluded
+
+    results: Iterator[UpdateResult]
+    if executor is not None:
+        if window is None:
+            window = 2 * (os.cpu_count() or 1)
+        results = _map_unordered(executor, update, tasks(), window=window)
+    elif jobs is not None and jobs > 1:
+        results = _map_in_pool(jobs, update, tasks(), window=window or 2 * jobs)
+    else:
+        results = (
+            task if isinstance(task, UpdateResult) else update(*task)
+            for task in tasks()
+        )
+
+    # The wall time excludes the time the caller spends between the results.
+    resumed = time.perf_counter()
+    for result in results:
+        if stats is not None:
+            if result.stats is not None:
+                stats.files.append(result.stats)
+            stats.wall += time.perf_counter() - resumed
+        yield result
+        resumed = time.perf_counter()
+    if stats is not None:
+        stats.wall += time.perf_counter() - resumed
+
+
+def _try_update_file(
+    path: Path,
+    metadata: CharacterMetadata,
+    callback: Optional[UpdateCallback],
+    engine: Engine,
+    write: bool,
+    key_table: KeyTable,
+    profile: Optional["SettingsProfile"],
+) -> UpdateResult:
+    start = time.perf_counter()
+    try:
+        result = _update_file(
+            path, metadata, callback, engine, write, key_table, profile
+        )
+    except Exception as e:
+        logger.debug(f"Failed to update {path}", exc_info=True)
+        return UpdateResult(
+            path, metadata, False, time.perf_counter() - start, 0, e, None
+        )
+
+    return UpdateResult(
+        path,
+        metadata,
+        result.rewritten,
+        time.perf_counter() - start,
+        result.stats.bytes_written,
+        None,
+        result.stats,
+    )
+
+
+def _map_in_pool(
+    jobs: int,
+    update: Callable[[Path, CharacterMetadata], UpdateResult],
+    tasks: Iterator[Union[UpdateResult, Tuple[Path, CharacterMetadata]]],
+    window: int,
+) -> Iterator[UpdateResult]:
+    from concurrent.futures import ThreadPoolExecutor
+
+    pool = ThreadPoolExecutor(max_workers=jobs)
+    try:
+        yield from _map_unordered(pool, update, tasks, window=window)
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def _map_unordered(
+    executor: Executor,
+    update: Callable[[Path, CharacterMetadata], UpdateResult],
+    tasks: Iterator[Union[UpdateResult, Tuple[Path, CharacterMetadata]]],
+    window: int,
+) -> Iterator[UpdateResult]:
+    """Run the tasks in the executor, yielding the results as they finish.
+
+    At most window tasks are submitted at a time, so that the tasks are not all
+    queued up front.
+    """
+    from concurrent.futures import FIRST_COMPLETED
+    from concurrent.futures import Future
+    from concurrent.futures import wait
+
+    pending: Set[Future[UpdateResult]] = set()
+    try:
+        for task in tasks:
+            if isinstance(task, UpdateResult):
+                yield task
+                continue
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(update, *task))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+@dc.dataclass(frozen=True)
+class CharacterFilter:
+    """Match characters by their environment, server ID and name.
+
+    A filter which is None matches every character. The server IDs and names
+    are matched case-insensitively. Unlike a closure, a CharacterFilter can be
+    pickled along with a SettingsProfile to a ProcessPoolExecutor.
+    """
+
+    environments: Optional[FrozenSet[str]] = None
+    # In lower case.
+    server_ids: Optional[FrozenSet[str]] = None
+    names: Optional[FrozenSet[str]] = None
+
+    @classmethod
+    def of(
+        cls,
+        environments: Optional[Iterable[str]] = None,
+        server_ids: Optional[Iterable[str]] = None,
+        names: Optional[Iterable[str]] = None,
+    ) -> "CharacterFilter":
+        """Create a filter from collections of environments, server IDs and names."""
+        filters = [environments, server_ids, names]
+        if any(isinstance(f, str) for f in filters):
+            raise TypeError(
+                "Pass the environments, server_ids and names as collections"
+            )
+
+        # The server IDs of CharacterMetadata are normalized to lower case.
+        return cls(
+            environments=None if environments is None else frozenset(environments),
+            server_ids=(
+                None if server_ids is None else frozenset(swtor_lower_all(server_ids))
+            ),
+            names=None if names is None else frozenset(swtor_lower_all(names)),
+        )
+
+    def is_empty(self) -> bool:
+        filters = [self.environments, self.server_ids, self.names]
+        return all(f is None for f in filters)
+
+    def __call__(self, metadata: CharacterMetadata) -> bool:
+        environments = self.environments
+        if environments is not None and metadata.environment not in environments:
+            return False
+        if self.server_ids is not None and metadata.server_id not in self.server_ids:
+            return False
+        if self.names is not None and swtor_lower(metadata.name) not in self.names:
+            return False
+        return True
+
+
+def _check_arguments(
+    callback: Optional[UpdateCallback],
+    profile: Optional["SettingsProfile"],
+    engine: Engine,
+    jobs: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> None:
+    """Check the arguments shared by the update and diff functions."""
+    if jobs is not None and jobs < 1:
+        raise ValueError(f"Invalid number of jobs: {jobs!r}")
+    if jobs is not None and executor is not None:
+        raise ValueError("Specify either jobs or executor, not both")
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine!r}")
+    if callback is None and profile is None:
+        raise ValueError("Specify a callback and/or a profile")
+
+
+def _character_filter(
+    predicate: Optional[Callable[[CharacterMetadata], bool]],
+    environments: Optional[Iterable[str]],
+    server_ids: Optional[Iterable[str]],
+    names: Optional[Iterable[str]],
+) -> Optional[Callable[[CharacterMetadata], bool]]:
+    """Combine the filters of update_all, None if there are none."""
+    character_filter = CharacterFilter.of(environments, server_ids, names)
+    if character_filter.is_empty():
+        return predicate
+    if predicate is None:
+        return character_filter
+
+    def include(metadata: CharacterMetadata) -> bool:
+        return character_filter(metadata) and predicate(metadata)
+
+    return include
+
+
+def update_path(
+    path: Union[str, os.PathLike],
+    callback: Optional[UpdateCallback] = None,
+    engine: Engine = "configparser",
+    stats: Optional[RunStats] = None,
+    backup: Optional["BackupStore"] = None,
+    profile: Optional["SettingsProfile"] = None,
+    dry_run: bool = False,
+) -> bool:
+    """Update the settings of a single character.
+
+    The file is only rewritten if the callback or the profile changes a setting
+    and the contents of the file would change. Return whether it was.
+
+    Pass a RunStats to record how long each phase of the update took.
+
+    Pass a BackupStore to back up the file first.
+
+    Pass a SettingsProfile to apply static settings in bulk, before the callback if
+    there is one.
+
+    In dry_run mode nothing is written, and the return value tells whether the
+    file would have been rewritten.
+    """
+    _check_arguments(callback, profile, engine)
+
+    start = time.perf_counter()
+    path = Path(path)
+    metadata = character_metadata(path)
+    if backup is not None and not dry_run:
+        # The settings directory containing the environment directories.
+        backup.backup(path.parents[2], [path])
+    result = _update_file(
+        path, metadata, callback, engine, write=not dry_run, profile=profile
+    )
+    if stats is not None:
+        stats.files.append(result.stats)
+        stats.wall += time.perf_counter() - start
+    return result.rewritten
+
+
+@dc.dataclass
+class _FileResult:
+    __slots__ = ["rewritten", "content", "sha256", "stat", "stats"]
+    rewritten: bool
+    # The resulting content of the file, if requested.
+    content: Optional[bytes]
+    # The hash of the content, if requested.
+    sha256: Optional[str]
+    # The status of the file taken together with its content, when it was read or
+    # written.
+    stat: os.stat_result
+    stats: FileStats
+
+
+def _update_file(
+    path: Path,
+    metadata: CharacterMetadata,
+    callback: Optional[UpdateCallback],
+    engine: Engine,
+    write: bool = True,
+    key_table: Optional[KeyTable] = None,
+    profile: Optional["SettingsProfile"] = None,
+    keep_content: bool = False,
+    digest: bool = False,
+) -> _FileResult:
+    """Update a file, returned by the worker so that it works in any executor.
+
+    If write is false, the new content is not written; keep_content returns it
+    along with the result. If digest is true, hash the resulting content for the
+    manifest. Otherwise the content is dropped as soon as the file is done.
+    """
     logger.info(f"Updating {metadata.environment} {metadata.server_id} {metadata.name}")
 
+    stats = FileStats(path)
+    start = time.perf_counter()
+
+    with open(path, "rb") as f:
+        content = f.read()
+        # The status of the content just read, even if the file is replaced later.
+        stat = os.fstat(f.fileno())
+    stats.bytes_read = len(content)
+    start = stats.record("read", start)
+
+    if key_table is None:
+        key_table = KeyTable()
+    section, serialize, merge = ENGINES[engine](path, content, key_table)
+    start = stats.record("parse", start)
+
+    settings = _apply(section, merge, metadata, callback, profile)
+    start = stats.record("callback", start)
+
+    if not settings.is_modified():
+        logger.debug(f"Unchanged: {path}")
+        return _FileResult(False, None, _sha256(content, digest), stat, stats)
+
+    logger.debug(f"Changed in {path}: {', '.join(sorted(settings.changed_keys))}")
+
+    new_content = serialize()
+    start = stats.record("serialize", start)
+
+    # The settings may have been changed back to the original values.
+    if new_content == content:
+        logger.debug(f"Unchanged: {path}")
+        return _FileResult(False, None, _sha256(content, digest), stat, stats)
+
+    if write:
+        from atomicwrites import atomic_write
+
+        with atomic_write(path, mode="wb", overwrite=True) as f:
+            f.write(new_content)
+            f.flush()
+            # The file keeps the status of the temporary file when renamed.
+            stat = os.fstat(f.fileno())
+        stats.record("write", start)
+        stats.bytes_written = len(new_content)
+
+    stats.rewritten = True
+
+    return _FileResult(
+        True,
+        new_content if keep_content else None,
+        _sha256(new_content, digest),
+        stat,
+        stats,
+    )
+
+
+def _sha256(content: bytes, digest: bool) -> Optional[str]:
+    return hashlib.sha256(content).hexdigest() if digest else None
+
+
+def _apply(
+    section: MutableMapping[str, str],
+    merge: Merge,
+    metadata: CharacterMetadata,
+    callback: Optional[UpdateCallback],
+    profile: Optional["SettingsProfile"],
+) -> TrackingMapping:
+    """Apply the profile and then the callback to the section."""
+    settings = TrackingMapping(section)
+    if profile is not None:
+        changes = profile.resolve(metadata)
+        settings.changed_keys.update(merge(changes.assignments, changes.deletions))
+    if callback is not None:
+        callback(metadata, settings)
+    return settings
+
+
+@dc.dataclass
+class SettingsDiff:
+    """The changes to the settings of a character, keyed by the setting names."""
+
+    __slots__ = ["path", "character", "changed", "added", "removed"]
+    path: Path
+    character: CharacterMetadata
+    # The old and the new value by key.
+    changed: Dict[str, Tuple[str, str]]
+    added: Dict[str, str]
+    removed: Dict[str, str]
+
+    def __bool__(self) -> bool:
+        return bool(self.changed or self.added or self.removed)
+
+    @classmethod
+    def between(
+        cls,
+        path: Path,
+        character: CharacterMetadata,
+        before: Mapping[str, str],
+        after: Mapping[str, str],
+    ) -> "SettingsDiff":
+        # The keys are case-insensitive.
+        before_lower = {key.lower(): (key, value) for key, value in before.items()}
+        diff = cls(path, character, {}, {}, {})
+        for key, value in after.items():
+            old = before_lower.pop(key.lower(), None)
+            if old is None:
+                diff.added[key] = value
+            elif old[1] != value:
+                diff.changed[key] = (old[1], value)
+        diff.removed.update(before_lower.values())
+        return diff
+
+    def format(self) -> str:
+        """The diff as lines of ~ changed, + added and - removed settings."""
+        lines = [str(self.path)]
+        lines += [
+            f"~ {k} = {old!r} -> {new!r}" for k, (old, new) in self.changed.items()
+        ]
+        lines += [f"+ {k} = {value!r}" for k, value in self.added.items()]
+        lines += [f"- {k} = {value!r}" for k, value in self.removed.items()]
+        return "\n  ".join(lines)
+
+
+def diff_all(
+    settings_dir: Union[str, os.PathLike],
+    callback: Optional[UpdateCallback] = None,
+    engine: Engine = "configparser",
+    predicate: Optional[Callable[[CharacterMetadata], bool]] = None,
+    environments: Optional[Iterable[str]] = None,
+    server_ids: Optional[Iterable[str]] = None,
+    names: Optional[Iterable[str]] = None,
+    profile: Optional["SettingsProfile"] = None,
+) -> Iterator[SettingsDiff]:
+    """Preview the changes update_all would make to the settings, writing nothing.
+
+    The files are found, filtered and read like with update_all, but only the
+    [Settings] sections are compared; the files are not serialized. The diffs of
+    the files which would change are yielded one at a time, in sorted order, so
+    previewing a large directory keeps only one file in memory.
+    """
+    _check_arguments(callback, profile, engine)
+
+    include = _character_filter(predicate, environments, server_ids, names)
+    key_table = KeyTable()
+
+    for path, metadata in iter_characters(settings_dir):
+        if include is not None and not include(metadata):
+            continue
+        diff = _diff_file(path, metadata, callback, engine, key_table, profile)
+        if diff:
+            yield diff
+
+
+def diff_path(
+    path: Union[str, os.PathLike],
+    callback: Optional[UpdateCallback] = None,
+    engine: Engine = "configparser",
+    profile: Optional["SettingsProfile"] = None,
+) -> SettingsDiff:
+    """Preview the changes update_path would make to the settings, writing nothing.
+
+    The diff is empty (false) if nothing would change.
+    """
+    _check_arguments(callback, profile, engine)
+
+    path = Path(path)
+    metadata = character_metadata(path)
+    return _diff_file(path, metadata, callback, engine, KeyTable(), profile)
+
+
+def _diff_file(
+    path: Path,
+    metadata: CharacterMetadata,
+    callback: Optional[UpdateCallback],
+    engine: Engine,
+    key_table: KeyTable,
+    profile: Optional["SettingsProfile"],
+) -> SettingsDiff:
+    content = path.read_bytes()
+    section, _serialize, merge = ENGINES[engine](path, content, key_table)
+    before = dict(section)
+    settings = _apply(section, merge, metadata, callback, profile)
+    if not settings.is_modified():
+        return SettingsDiff(path, metadata, {}, {}, {})
+    return SettingsDiff.between(path, metadata, before, section)
+
+
+# Parse the content of a settings file into the [Settings] section, a function to
+# serialize the file after changing the section and a function to merge a profile
+# into the section.
+Parser = Callable[
+    [Path, bytes, KeyTable],
+    Tuple[MutableMapping[str, str], Callable[[], bytes], Merge],
+]
+
+
+def _parse_configparser(
+    path: Path, content: bytes, key_table: KeyTable
+) -> Tuple[MutableMapping[str, str], Callable[[], bytes], Merge]:
+    import configparser
+
+    from swtor_settings_updater.util.option_transformer import OptionTransformer
+
     parser = configparser.ConfigParser(interpolation=None)
-    OptionTransformer().install(parser)
+    transformer = OptionTransformer(key_table)
+    transformer.install(parser)
+
+    # newline=None translates the line endings like reading a file in text mode.
+    parser.read_file(
+        io.StringIO(content.decode("CP1252"), newline=None), source=str(path)
+    )
+
+    def serialize() -> bytes:
+        output = io.StringIO(newline="\r\n")
+        parser.write(output)
+        return output.getvalue().encode("CP1252")
+
+    section = parser["Settings"]
+    # The dict behind the section. Setting a key through the SectionProxy
+    # validates the value and transforms the key, which the profile has done once
+    # already.
+    options: Dict[str, str] = parser._sections["Settings"]  # type: ignore
+    canonical_forms = transformer.canonical_forms
+
+    def merge(
+        assignments: Mapping[str, Tuple[str, str]], deletions: Mapping[str, str]
+    ) -> List[str]:
+        changed = []
+        for key_lower, (key, value) in assignments.items():
+            canonical = canonical_forms.setdefault(key_lower, key)
+            if options.get(canonical) != value:
+                options[canonical] = value
+                changed.append(canonical)
+        for key_lower in deletions:
+            deleted = canonical_forms.get(key_lower)
+            if deleted is not None and deleted in options:
+                del options[deleted]
+                changed.append(deleted)
+        return changed
+
+    return (section, serialize, merge)
+
+
+def _parse_stream(
+    _path: Path, content: bytes, key_table: KeyTable
+) -> Tuple[MutableMapping[str, str], Callable[[], bytes], Merge]:
+    from swtor_settings_updater.util.ini_patcher import SettingsPatcher
 
-    parser.read(path, encoding="CP1252")
+    patcher = SettingsPatcher(content, key_table=key_table)
+    return (patcher, patcher.patch, patcher.merge)
 
-    callback(metadata, parser["Settings"])
 
-    with atomic_write(path, encoding="CP1252", newline="\r\n", overwrite=True) as f:
-        parser.write(f)
+ENGINES: Dict[str, Parser] = {
+    "configparser": _parse_configparser,
+    "stream": _parse_stream,
+}
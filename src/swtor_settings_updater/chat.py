@@ -1,21 +1,27 @@
 from __future__ import annotations
 
 import dataclasses as dc
+import operator
 from collections import OrderedDict
 from itertools import chain
-from itertools import zip_longest
+from typing import Any
+from typing import Dict
 from typing import Iterable
 from typing import Iterator
 from typing import List
+from typing import Mapping
 from typing import MutableMapping
+from typing import MutableSet
+from typing import NamedTuple
 from typing import Optional
-from typing import Set
-
-import regex
+from typing import Tuple
+from typing import TYPE_CHECKING
+from typing import TypeVar
 
 from swtor_settings_updater.color import Color
-from swtor_settings_updater.util.character_class import CP1252_PRINTABLE
-from swtor_settings_updater.util.character_class import regex_character_class
+from swtor_settings_updater.util.bitmask_set import bitmask_of
+from swtor_settings_updater.util.bitmask_set import BitmaskSet
+from swtor_settings_updater.util.lazy_regex import LazyRegex
 from swtor_settings_updater.util.swtor_case import swtor_lower
 
 
@@ -23,7 +29,28 @@ MAXIMUM_CHANNEL_IX = 37
 CUSTOM_CHANNEL_IXS = range(22, 28 + 1)
 UNUSED_CHANNEL_IXS = [4, 5, 14, 16, 21, 30, 31, 32]
 
+# Every valid channel ix belongs either to a standard channel or a custom channel.
+ALL_CHANNELS_BITMASK = bitmask_of(
+    ix for ix in range(MAXIMUM_CHANNEL_IX + 1) if ix not in UNUSED_CHANNEL_IXS
+)
+
 DEFAULT_COLOR = Color(238, 238, 0)
+DEFAULT_COLOR_HEX = DEFAULT_COLOR.hex()
+
+# Generated by scripts/generate_character_classes.py, which also checks that they
+# are up to date.
+
+# CP1252_PRINTABLE except . and ; which are separators.
+PANEL_NAME_CHARACTER_CLASS = (
+    "\\ -\\-/-:<-\\~\\\xa0-¬®-ÿŒ-œŠ-šŸŽ-žƒˆ˜–-—‘-‚“-„†-•…‰‹-"
+    "›€™"
+)
+# CP1252_PRINTABLE except spaces which are not allowed, ; which is a separator and
+# "&<> which seem to be encoded by the game as XML entities (wat).
+CUSTOM_CHANNEL_PASSWORD_CHARACTER_CLASS = (
+    "!\\#-%'-:=\\?-\\~\\\xa0-¬®-ÿŒ-œŠ-šŸŽ-žƒˆ˜–-—‘-‚“-„†-•…‰"
+    "‹-›€™"
+)
 
 
 @dc.dataclass
@@ -118,18 +145,68 @@ class StandardChannels(Iterable[Channel]):
     )
 
     def __iter__(self) -> Iterator[Channel]:
-        return (getattr(self, f.name) for f in dc.fields(self))
+        return iter(_get_standard_channels(self))
+
+
+_get_standard_channels = operator.attrgetter(
+    *(f.name for f in dc.fields(StandardChannels))
+)
+
+
+ChannelT = TypeVar("ChannelT", bound="Channel")
+
+
+class ChatSettings(NamedTuple):
+    """The values of the chat settings."""
+
+    chat_channels: str
+    chat_custom_channels: str
+    chat_colors: str
+
+    def apply(self, settings: MutableMapping[str, str]) -> None:
+        settings["ChatChannels"] = self.chat_channels
+        settings["Chat_Custom_Channels"] = self.chat_custom_channels
+        settings["ChatColors"] = self.chat_colors
+
+
+@dc.dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
 
 
 class Chat:
-    """Manage chat panels, custom channels and colors."""
+    """Manage chat panels, custom channels and colors.
+
+    The settings are cached until a panel, channel, color or custom channel changes.
+    cache_stats counts the cache hits and misses.
+    """
 
     standard_channels: StandardChannels
     panels: OrderedDict[str, Panel]
     custom_channel_ixs_available: List[int]
     custom_channels: OrderedDict[str, CustomChannel]
+    cache_stats: CacheStats
+
+    # The template of a variant whose state has not been copied yet.
+    _template: Optional[ChatTemplate]
+    _cache: Optional[Tuple[Tuple[Any, ...], ChatSettings]]
+
+    # The attributes a variant copies from its template when first accessed.
+    _STATE_ATTRIBUTES = frozenset(
+        [
+            "standard_channels",
+            "panels",
+            "custom_channel_ixs_available",
+            "custom_channels",
+        ]
+    )
 
     def __init__(self) -> None:
+        self._template = None
+        self._cache = None
+        self.cache_stats = CacheStats()
+
         self.standard_channels = StandardChannels()
 
         self.panels = OrderedDict()
@@ -140,6 +217,64 @@ class Chat:
 
         self.custom_channels = OrderedDict()
 
+    @classmethod
+    def from_settings(cls, settings: Mapping[str, str]) -> Chat:
+        """Parse the chat settings of a configuration object.
+
+        The undisplayed channels end up on the first panel, like in the settings
+        Chat generates. The colors of the channel indices without a channel are
+        ignored.
+
+        Raise ValueError if a chat setting is missing or malformed.
+        """
+        chat = cls()
+
+        panels_s = _required_setting(settings, "ChatChannels")
+        for num, panel_s in enumerate(_split_items(panels_s), 1):
+            fields = panel_s.split(".")
+            if len(fields) != 3 or fields[0] != str(num):
+                raise ValueError(f"Invalid panel: {panel_s!r}")
+            panel = chat.panel(fields[1])
+            panel.channel_ixs = BitmaskSet.from_bitmask(int(fields[2]))
+
+        cc_fields = _split_items(_required_setting(settings, "Chat_Custom_Channels"))
+        if len(cc_fields) % 4 != 0:
+            raise ValueError(f"Invalid custom channels: {cc_fields!r}")
+        if len(cc_fields) // 4 > len(CUSTOM_CHANNEL_IXS):
+            raise ValueError(f"Too many custom channels: {len(cc_fields) // 4}")
+        cc_fields_iter = iter(cc_fields)
+        for num, cc_s in enumerate(zip(*[cc_fields_iter] * 4), 1):
+            name, password, cc_num, cc_id = cc_s
+            if cc_num != str(num):
+                raise ValueError(f"Invalid custom channel: {cc_s!r}")
+            chat.custom_channel(name, password=password or None, id=cc_id)
+
+        colors = _split_items(_required_setting(settings, "ChatColors"))
+        if len(colors) != MAXIMUM_CHANNEL_IX + 1:
+            raise ValueError(f"Invalid number of colors: {len(colors)}")
+        for c in chain(chat.standard_channels, chat.custom_channels.values()):
+            c.color = Color.from_hex(colors[c.ix])
+
+        return chat
+
+    def __eq__(self, other: object) -> bool:
+        """Whether the configurations generate the same settings."""
+        if not isinstance(other, Chat):
+            return NotImplemented
+        return self._effective_state() == other._effective_state()
+
+    # Intentionally unhashable: a Chat is mutable, so its hash would change along
+    # with the settings it compares by.
+    __hash__ = None  # type: ignore[assignment]
+
+    @classmethod
+    def _without_state(cls, template: Optional[ChatTemplate]) -> Chat:
+        chat = cls.__new__(cls)
+        chat._template = template
+        chat._cache = None
+        chat.cache_stats = CacheStats()
+        return chat
+
     def panel(self, name: str) -> Panel:
         """Create a chat panel."""
         name_lower = swtor_lower(name)
@@ -170,14 +305,114 @@ class Chat:
 
         return cc
 
+    def freeze(self) -> ChatTemplate:
+        """Snapshot the configuration as a template to derive variants from.
+
+        Later changes to this Chat do not affect the template.
+        """
+        if self._template is not None:
+            return self._template
+        return ChatTemplate(self)
+
+    if not TYPE_CHECKING:
+
+        def __getattr__(self, name: str) -> Any:
+            # Only called for attributes missing from the instance, which the
+            # state attributes of a variant are until first accessed.
+            template = self.__dict__.get("_template")
+            if template is None or name not in Chat._STATE_ATTRIBUTES:
+                raise AttributeError(
+                    f"{type(self).__name__!r} object has no attribute {name!r}"
+                )
+            self._copy_state(template._chat)
+            self._template = None
+            return self.__dict__[name]
+
+    def _copy_state(self, source: Chat) -> None:
+        """Copy the state of source, keeping colors shared by channels shared."""
+        colors: Dict[int, Color] = {}
+
+        def copy_channel(channel: ChannelT) -> ChannelT:
+            color = colors.get(id(channel.color))
+            if color is None:
+                color = colors[id(channel.color)] = channel.color.copy()
+            # Skip the validation in __post_init__, the source is valid already.
+            c = object.__new__(type(channel))
+            c.__dict__.update(vars(channel))
+            c.color = color
+            return c
+
+        def copy_panel(panel: Panel) -> Panel:
+            p = object.__new__(Panel)
+            p.name = panel.name
+            p.channel_ixs = BitmaskSet.from_bitmask(panel.channel_bitmask())
+            return p
+
+        self.standard_channels = StandardChannels(
+            **{
+                f.name: copy_channel(getattr(source.standard_channels, f.name))
+                for f in dc.fields(StandardChannels)
+            }
+        )
+        self.panels = OrderedDict(
+            (name, copy_panel(panel)) for name, panel in source.panels.items()
+        )
+        self.custom_channel_ixs_available = list(source.custom_channel_ixs_available)
+        self.custom_channels = OrderedDict(
+            (name, copy_channel(cc)) for name, cc in source.custom_channels.items()
+        )
+
     def apply(self, settings: MutableMapping[str, str]) -> None:
         """Apply the chat settings to a configuration object."""
-        settings["ChatChannels"] = self.panels_setting()
-        settings["Chat_Custom_Channels"] = self.custom_channels_setting()
-        settings["ChatColors"] = self.colors_setting()
+        self.settings().apply(settings)
+
+    def settings(self) -> ChatSettings:
+        """The values of the chat settings, computed if they are not cached."""
+        if self._template is not None:
+            self.cache_stats.hits += 1
+            return self._template.settings
+
+        key = self._effective_state()
+        if self._cache is not None and self._cache[0] == key:
+            self.cache_stats.hits += 1
+            return self._cache[1]
+
+        self.cache_stats.misses += 1
+        settings = ChatSettings(
+            self._compute_panels_setting(),
+            self._compute_custom_channels_setting(),
+            self._compute_colors_setting(),
+        )
+        self._cache = (key, settings)
+        return settings
+
+    def _effective_state(self) -> Tuple[Any, ...]:
+        """Everything the settings are computed from.
+
+        Much cheaper to compare than the formatted settings.
+        """
+        if self._template is not None:
+            # Avoid copying the state of a variant.
+            return self._template._chat._effective_state()
+
+        panels = [(p.name, p.channel_bitmask()) for p in self.panels.values()]
+        if not panels:
+            panels = [("General", 0)]
+        name, bitmask = panels[0]
+        panels[0] = (name, bitmask | self.undisplayed_channel_bitmask())
+
+        channels = chain(self.standard_channels, self.custom_channels.values())
+        return (
+            tuple([(c.ix, c.color.r, c.color.g, c.color.b) for c in channels]),
+            tuple(panels),
+            tuple([(c.name, c.password, c.id) for c in self.custom_channels.values()]),
+        )
 
     def panels_setting(self) -> str:
         """Compute the value for the panels setting (ChatChannels)."""
+        return self.settings().chat_channels
+
+    def _compute_panels_setting(self) -> str:
         panels: Iterable[Panel]
         if self.panels:
             panels = self.panels.values()
@@ -186,36 +421,31 @@ class Chat:
             panels = [Panel("General")]
 
         # Add undisplayed channels (if any) to the first panel.
-        undisplayed_ixs = self.undisplayed_channel_ixs()
+        undisplayed_bitmask = self.undisplayed_channel_bitmask()
 
         channels = []
-        for num, (panel_orig, ixs) in enumerate(
-            zip_longest(panels, [undisplayed_ixs]), start=1
-        ):
-            if ixs:
-                panel = Panel(panel_orig.name, panel_orig.channel_ixs | ixs)
-            else:
-                panel = panel_orig
-            channels.append(f"{num}.{panel.name}.{panel.channel_bitmask()};")
+        for num, panel in enumerate(panels, start=1):
+            bitmask = panel.channel_bitmask()
+            if num == 1:
+                bitmask |= undisplayed_bitmask
+            channels.append(f"{num}.{panel.name}.{bitmask};")
         return "".join(channels)
 
-    def undisplayed_channel_ixs(self) -> Set[int]:
+    def undisplayed_channel_ixs(self) -> BitmaskSet:
         """Compute the indices of channels not displayed on any panel."""
-        ixs = set()
-
-        for c in self.standard_channels:
-            ixs.add(c.ix)
-
-        for ix in CUSTOM_CHANNEL_IXS:
-            ixs.add(ix)
+        return BitmaskSet.from_bitmask(self.undisplayed_channel_bitmask())
 
+    def undisplayed_channel_bitmask(self) -> int:
+        displayed_bitmask = 0
         for panel in self.panels.values():
-            ixs -= panel.channel_ixs
-
-        return ixs
+            displayed_bitmask |= panel.channel_bitmask()
+        return ALL_CHANNELS_BITMASK & ~displayed_bitmask
 
     def custom_channels_setting(self) -> str:
         """Compute the value for the Chat_Custom_Channels setting."""
+        return self.settings().chat_custom_channels
+
+    def _compute_custom_channels_setting(self) -> str:
         custom_channels = []
         for num, cc in enumerate(self.custom_channels.values(), start=1):
             password = "" if cc.password is None else cc.password
@@ -224,34 +454,78 @@ class Chat:
 
     def colors_setting(self) -> str:
         """Compute the value for the ChatColors setting."""
-        colors = [DEFAULT_COLOR.copy() for _ in range(MAXIMUM_CHANNEL_IX + 1)]
+        return self.settings().chat_colors
+
+    def _compute_colors_setting(self) -> str:
+        colors = [DEFAULT_COLOR_HEX] * (MAXIMUM_CHANNEL_IX + 1)
         for c in chain(self.standard_channels, self.custom_channels.values()):
-            colors[c.ix] = c.color
-        return "".join(map(lambda c: f"{c.hex()};", colors))
+            colors[c.ix] = c.color.hex()
+        return "".join(map(lambda c: f"{c};", colors))
+
+
+def _required_setting(settings: Mapping[str, str], key: str) -> str:
+    try:
+        return settings[key]
+    except KeyError:
+        raise ValueError(f"Missing setting: {key!r}") from None
+
+
+def _split_items(setting: str) -> List[str]:
+    """Split a ;-separated setting, which may also end with a ;."""
+    if not setting:
+        return []
+    return setting.removesuffix(";").split(";")
+
+
+class ChatTemplate:
+    """A frozen chat configuration to derive per-character variants from.
+
+    The settings are computed once when the template is created. A variant shares
+    the template's state and settings until one of its standard_channels, panels,
+    custom_channel_ixs_available or custom_channels is first accessed, at which
+    point it gets a copy of its own.
+    """
+
+    __slots__ = ["_chat", "settings"]
+    _chat: Chat
+    settings: ChatSettings
+
+    def __init__(self, chat: Chat) -> None:
+        self._chat = Chat._without_state(None)
+        self._chat._copy_state(chat)
+        self.settings = self._chat.settings()
+
+    def derive(self) -> Chat:
+        """Create a copy-on-write variant of the template."""
+        return Chat._without_state(self)
+
+    def apply(self, settings: MutableMapping[str, str]) -> None:
+        """Apply the chat settings to a configuration object."""
+        self.settings.apply(settings)
 
 
 @dc.dataclass
 class Panel:
     name: str
-    channel_ixs: Set[int] = dc.field(default_factory=set)
+    # Stored as a bitmask. Any other set is converted into a BitmaskSet.
+    channel_ixs: MutableSet[int] = dc.field(default_factory=BitmaskSet)
 
-    # . and ; are separators.
-    NAME_REGEX = regex.compile(f'[{regex_character_class(CP1252_PRINTABLE, ".;")}]+')
+    NAME_REGEX = LazyRegex(f"[{PANEL_NAME_CHARACTER_CLASS}]+")
 
     def __post_init__(self) -> None:
-        if not regex.fullmatch(Panel.NAME_REGEX, self.name):
+        if not Panel.NAME_REGEX.fullmatch(self.name):
             raise ValueError(f"Invalid name {self.name!r}")
 
+        if not isinstance(self.channel_ixs, BitmaskSet):
+            self.channel_ixs = BitmaskSet(self.channel_ixs)
+
     def display(self, *channels: Channel) -> None:
         """Display the given channel(s) on the panel."""
         for c in channels:
             self.channel_ixs.add(c.ix)
 
     def channel_bitmask(self) -> int:
-        bitmask = 0
-        for ix in self.channel_ixs:
-            bitmask |= 1 << ix
-        return bitmask
+        return bitmask_of(self.channel_ixs)
 
 
 @dc.dataclass
@@ -259,26 +533,22 @@ class CustomChannel(Channel):
     password: Optional[str] = None
     id: Optional[str] = None
 
-    NAME_REGEX = regex.compile(r"[A-Za-z0-9_]+")
-    # Spaces are not allowed, ; is a separator, and "&<> seem to be encoded by
-    # the game as XML entities (wat).
-    PASSWORD_REGEX = regex.compile(
-        f"""[{regex_character_class(CP1252_PRINTABLE, ' ;"&<>')}]+"""
-    )
-    ID_REGEX = regex.compile(r"usr\.[a-z0-9_]+")
+    NAME_REGEX = LazyRegex(r"[A-Za-z0-9_]+")
+    PASSWORD_REGEX = LazyRegex(f"[{CUSTOM_CHANNEL_PASSWORD_CHARACTER_CLASS}]+")
+    ID_REGEX = LazyRegex(r"usr\.[a-z0-9_]+")
 
     def __post_init__(self) -> None:
         super().__post_init__()
 
-        if not regex.fullmatch(CustomChannel.NAME_REGEX, self.name):
+        if not CustomChannel.NAME_REGEX.fullmatch(self.name):
             raise ValueError(f"Invalid name {self.name!r}")
 
-        if self.password is not None and not regex.fullmatch(
-            CustomChannel.PASSWORD_REGEX, self.password
+        if self.password is not None and not CustomChannel.PASSWORD_REGEX.fullmatch(
+            self.password
         ):
             raise ValueError(f"Invalid password {self.password!r}")
 
-        if self.id is not None and not regex.fullmatch(CustomChannel.ID_REGEX, self.id):
+        if self.id is not None and not CustomChannel.ID_REGEX.fullmatch(self.id):
             raise ValueError(f"Invalid id {id!r}")
 
         if self.id is None:
@@ -0,0 +1,310 @@
+"""Update the settings of SWTOR characters with a callback and/or a profile.
+
+The callback and the profile are given as MODULE:NAME, where MODULE is an
+importable module or the path of a Python file, for instance
+my_settings.py:my_settings.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import importlib.util
+import logging
+import sys
+from pathlib import Path
+from typing import get_args
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from swtor_settings_updater.character import diff_all
+from swtor_settings_updater.character import diff_path
+from swtor_settings_updater.character import Engine
+from swtor_settings_updater.character import iter_update_all
+from swtor_settings_updater.character import SettingsDiff
+from swtor_settings_updater.character import update_all
+from swtor_settings_updater.character import update_path
+from swtor_settings_updater.character import UpdateCallback
+from swtor_settings_updater.settings_profile import SettingsProfile
+from swtor_settings_updater.stats import RunStats
+
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the command line interface. Return the exit status."""
+    parser = _argument_parser()
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(levelname)s: %(message)s",
+    )
+
+    if args.callback is None and args.profile is None:
+        parser.error("specify --callback and/or --profile")
+    if args.paths and (args.only_env or args.only_server or args.only_name):
+        parser.error("the --only options only apply to a settings directory")
+    if args.paths and (args.jobs is not None or args.transactional):
+        parser.error("--jobs and --transactional only apply to a settings directory")
+    if args.diff and (args.stats or args.stats_json):
+        parser.error("--diff does not record stats")
+
+    try:
+        callback = None if args.callback is None else load_object(args.callback)
+        profile = None if args.profile is None else load_object(args.profile)
+    except Exception as e:
+        logger.error(f"Failed to load the settings: {e}", exc_info=args.verbose)
+        return 1
+
+    if callback is not None and not callable(callback):
+        logger.error(f"Not callable: {args.callback}")
+        return 1
+    if profile is not None and not isinstance(profile, SettingsProfile):
+        logger.error(f"Not a SettingsProfile: {args.profile}")
+        return 1
+
+    if args.diff:
+        return _diff(args, callback, profile)
+
+    stats = RunStats() if args.stats or args.stats_json else None
+    verb = "Would rewrite" if args.dry_run else "Rewrote"
+    rewritten: List[Path] = []
+    failed = 0
+
+    try:
+        if args.transactional:
+            # All or nothing, so the first error aborts the run.
+            rewritten = update_all(
+                _settings_dir(args.settings_dir),
+                callback,
+                jobs=args.jobs,
+                engine=args.engine,
+                stats=stats,
+                environments=args.only_env,
+                server_ids=args.only_server,
+                names=args.only_name,
+                transactional=True,
+                profile=profile,
+                dry_run=args.dry_run,
+            )
+            for path in rewritten:
+                logger.info(f"{verb} {path}")
+
+        else:
+            # An error in one file does not stop the others.
+            for path, rewrote, error in _update(args, callback, profile, stats):
+                if error is not None:
+                    failed += 1
+                    logger.error(
+                        f"Failed to update {path}: {error}",
+                        exc_info=error if args.verbose else None,
+                    )
+                elif rewrote:
+                    rewritten.append(path)
+                    logger.info(f"{verb} {path}")
+
+    except Exception as e:
+        logger.error(f"Failed to update the settings: {e}", exc_info=args.verbose)
+        return 1
+
+    logger.info(f"{verb} {len(rewritten)} file(s)")
+    if failed:
+        logger.error(f"Failed to update {failed} file(s)")
+
+    if stats is not None:
+        if args.stats:
+            stats.write_report(sys.stderr)
+        if args.stats_json:
+            stats.write_json(args.stats_json, per_file=True)
+
+    return 1 if failed else 0
+
+
+def _update(
+    args: argparse.Namespace,
+    callback: Optional[UpdateCallback],
+    profile: Optional[SettingsProfile],
+    stats: Optional[RunStats],
+) -> Iterator[Tuple[Path, bool, Optional[Exception]]]:
+    """Update the files, yielding whether each was rewritten or the error."""
+    if not args.paths:
+        for result in iter_update_all(
+            _settings_dir(args.settings_dir),
+            callback,
+            jobs=args.jobs,
+            engine=args.engine,
+            stats=stats,
+            environments=args.only_env,
+            server_ids=args.only_server,
+            names=args.only_name,
+            profile=profile,
+            dry_run=args.dry_run,
+        ):
+            yield (result.path, result.rewritten, result.error)
+        return
+
+    for path in args.paths:
+        try:
+            rewrote = update_path(
+                path,
+                callback,
+                engine=args.engine,
+                stats=stats,
+                profile=profile,
+                dry_run=args.dry_run,
+            )
+        except Exception as e:
+            yield (path, False, e)
+        else:
+            yield (path, rewrote, None)
+
+
+def _diff(
+    args: argparse.Namespace,
+    callback: Optional[UpdateCallback],
+    profile: Optional[SettingsProfile],
+) -> int:
+    try:
+        if args.paths:
+            diffs: Iterable[SettingsDiff] = (
+                diff_path(path, callback, engine=args.engine, profile=profile)
+                for path in args.paths
+            )
+        else:
+            diffs = diff_all(
+                _settings_dir(args.settings_dir),
+                callback,
+                engine=args.engine,
+                environments=args.only_env,
+                server_ids=args.only_server,
+                names=args.only_name,
+                profile=profile,
+            )
+        for diff in diffs:
+            if diff:
+                print(diff.format(), flush=True)
+    except Exception as e:
+        logger.error(f"Failed to diff the settings: {e}", exc_info=args.verbose)
+        return 1
+
+    return 0
+
+
+def _argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="swtor-settings-updater",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        type=Path,
+        metavar="PATH",
+        help="update only these settings files instead of a settings directory",
+    )
+    parser.add_argument("--callback", metavar="MODULE:NAME", help="an UpdateCallback")
+    parser.add_argument("--profile", metavar="MODULE:NAME", help="a SettingsProfile")
+    parser.add_argument(
+        "--settings-dir",
+        type=Path,
+        metavar="DIR",
+        help="the settings directory (default: %%LOCALAPPDATA%%\\SWTOR)",
+    )
+    parser.add_argument(
+        "--engine", choices=get_args(Engine), default="configparser", help="see Engine"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=_positive_int,
+        metavar="N",
+        help="update up to N files concurrently",
+    )
+    parser.add_argument(
+        "-n",
+        "--dry-run",
+        action="store_true",
+        help="report which files would be rewritten without writing anything",
+    )
+    parser.add_argument(
+        "-d",
+        "--diff",
+        action="store_true",
+        help="print the settings which would change without writing anything",
+    )
+    parser.add_argument(
+        "--transactional",
+        action="store_true",
+        help="write nothing unless every file is processed successfully",
+    )
+    for option, dest, what in [
+        ("--only-env", "only_env", "environment, for instance publictest"),
+        ("--only-server", "only_server", "server ID, for instance he4000"),
+        ("--only-name", "only_name", "name"),
+    ]:
+        parser.add_argument(
+            option,
+            dest=dest,
+            action="append",
+            metavar=dest.removeprefix("only_").upper(),
+            help=f"update only the characters of this {what}; may be repeated",
+        )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="print the timing summary of the phases to stderr",
+    )
+    parser.add_argument(
+        "--stats-json", type=Path, metavar="FILE", help="write the stats as JSON"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"not a positive integer: {value!r}")
+    return number
+
+
+def _settings_dir(settings_dir: Optional[Path]) -> Path:
+    if settings_dir is not None:
+        return settings_dir
+
+    from swtor_settings_updater.util.settings_dir import default_settings_dir
+
+    try:
+        return default_settings_dir()
+    except KeyError:
+        raise ValueError("LOCALAPPDATA is not set, pass --settings-dir") from None
+
+
+def load_object(spec: str) -> object:
+    """Load the object given as MODULE:NAME.
+
+    MODULE is either the name of a module or the path of a Python file. A file is
+    executed as a module named after its stem, without adding it to sys.modules or
+    its directory to sys.path.
+    """
+    module_spec, _, name = spec.rpartition(":")
+    if not module_spec or not name.isidentifier():
+        raise ValueError(f"Expected MODULE:NAME, got {spec!r}")
+
+    if module_spec.endswith(".py"):
+        path = Path(module_spec)
+        file_spec = importlib.util.spec_from_file_location(path.stem, path)
+        if file_spec is None or file_spec.loader is None:
+            raise ImportError(f"Cannot import {path}")
+        module = importlib.util.module_from_spec(file_spec)
+        file_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(module_spec)
+
+    return getattr(module, name)
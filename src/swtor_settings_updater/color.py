@@ -1,6 +1,10 @@
 from __future__ import annotations
 
 import dataclasses as dc
+import string
+
+
+HEX_DIGITS = frozenset(string.hexdigits)
 
 
 @dc.dataclass
@@ -14,9 +18,17 @@ class Color:
         if not (0 <= self.r <= 0xFF and 0 <= self.g <= 0xFF and 0 <= self.b <= 0xFF):
             raise ValueError(f"Invalid {self!r}")
 
+    @classmethod
+    def from_hex(cls, rrggbb: str) -> Color:
+        """Parse hexadecimal RRGGBB."""
+        if len(rrggbb) != 6 or not HEX_DIGITS.issuperset(rrggbb):
+            raise ValueError(f"Invalid color {rrggbb!r}")
+        value = int(rrggbb, 16)
+        return cls(value >> 16, value >> 8 & 0xFF, value & 0xFF)
+
     def hex(self) -> str:
         """Hexadecimal RRGGBB."""
         return "{:0>2x}{:0>2x}{:0>2x}".format(self.r, self.g, self.b)
 
     def copy(self) -> Color:
-        return dc.replace(self)
+        return Color(self.r, self.g, self.b)
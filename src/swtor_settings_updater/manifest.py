@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import dataclasses as dc
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import Union
+
+from atomicwrites import atomic_write
+
+
+MANIFEST_VERSION = 1
+
+
+logger = logging.getLogger(__name__)
+
+
+@dc.dataclass
+class ManifestEntry:
+    __slots__ = ["size", "mtime_ns", "sha256", "callback_version"]
+    size: int
+    mtime_ns: int
+    sha256: str
+    callback_version: str
+
+
+class Manifest:
+    """Remember the state of the settings files after the last successful run.
+
+    The entries are keyed by the path relative to the settings directory. A file
+    whose size and modification time (or failing that, contents) match its entry
+    and which was updated with the same callback version does not need to be
+    updated again.
+    """
+
+    path: Path
+    settings_dir: Path
+    entries: Dict[str, ManifestEntry]
+
+    def __init__(
+        self, path: Union[str, os.PathLike], settings_dir: Union[str, os.PathLike]
+    ) -> None:
+        self.path = Path(path)
+        self.settings_dir = Path(settings_dir)
+        self.entries = {}
+
+    @classmethod
+    def load(
+        cls, path: Union[str, os.PathLike], settings_dir: Union[str, os.PathLike]
+    ) -> Manifest:
+        """Load the manifest from path, or start an empty one if there is none."""
+        manifest = cls(path, settings_dir)
+
+        try:
+            with open(manifest.path, "r", encoding="UTF-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return manifest
+
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            logger.warning(f"Ignoring a manifest of an unknown format: {path}")
+            return manifest
+
+        for key, entry in data["files"].items():
+            manifest.entries[key] = ManifestEntry(**entry)
+
+        return manifest
+
+    def save(self) -> None:
+        data = {
+            "version": MANIFEST_VERSION,
+            "files": {key: dc.asdict(entry) for key, entry in self.entries.items()},
+        }
+
+        with atomic_write(self.path, encoding="UTF-8", overwrite=True) as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+
+    def key(self, path: Path) -> str:
+        return path.relative_to(self.settings_dir).as_posix()
+
+    def is_current(self, path: Path, callback_version: str) -> bool:
+        """Whether path is unchanged since it was updated with callback_version."""
+        entry = self.entries.get(self.key(path))
+        if entry is None or entry.callback_version != callback_version:
+            return False
+
+        stat = path.stat()
+        if stat.st_size != entry.size:
+            return False
+        if stat.st_mtime_ns == entry.mtime_ns:
+            return True
+
+        # The file was touched. It is still current if the contents are the same.
+        if hashlib.sha256(path.read_bytes()).hexdigest() != entry.sha256:
+            return False
+        entry.mtime_ns = stat.st_mtime_ns
+        return True
+
+    def record(
+        self, path: Path, stat: os.stat_result, sha256: str, callback_version: str
+    ) -> None:
+        """Record that path was updated with callback_version.
+
+        stat and sha256 describe the same version of the file, taken when it was
+        read or written, so that a later change by the game is not recorded as
+        current.
+        """
+        self.entries[self.key(path)] = ManifestEntry(
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            sha256=sha256,
+            callback_version=callback_version,
+        )
+
+    def retain(self, paths: Iterable[Path]) -> None:
+        """Forget the entries of files other than paths."""
+        keys = {self.key(path) for path in paths}
+        for key in self.entries.keys() - keys:
+            del self.entries[key]
+
+
+def default_manifest_path(settings_dir: Union[str, os.PathLike]) -> Path:
+    """The path of the manifest beside settings_dir, outside the game's files."""
+    settings_dir = Path(settings_dir).absolute()
+    return settings_dir.with_name(f"{settings_dir.name}_settings_updater_manifest.json")
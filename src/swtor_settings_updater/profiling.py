@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import dataclasses as dc
+import io
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List
+from typing import Literal
+from typing import MutableMapping
+from typing import Optional
+from typing import TextIO
+from typing import TYPE_CHECKING
+from typing import Union
+
+from swtor_settings_updater.character import CharacterMetadata
+from swtor_settings_updater.character import UpdateCallback
+
+if TYPE_CHECKING:
+    import cProfile
+    import pstats
+
+
+# cprofile profiles every function call of the callback. timer only measures the
+# duration of the callback, with much less overhead.
+ProfilerMode = Literal["cprofile", "timer"]
+
+
+logger = logging.getLogger(__name__)
+
+
+@dc.dataclass
+class CallbackTiming:
+    __slots__ = ["character", "seconds", "profile"]
+    character: CharacterMetadata
+    seconds: float
+    # The profile of a slow call in cprofile mode.
+    profile: Optional[cProfile.Profile]
+
+
+class CallbackProfiler:
+    """Wrap an UpdateCallback to profile it per character.
+
+    Pass the profiler to update_all or update_path in place of the callback. Calls
+    which take longer than threshold seconds are logged and kept in slow_calls()
+    along with their own profile. In cprofile mode the profiles of all the calls
+    are also aggregated for dump_stats().
+
+    The results are collected in the process calling the callback, so use threads
+    rather than a ProcessPoolExecutor while profiling. Only timer mode runs the
+    calls concurrently: Python 3.12 and later allow one active profiler at a time,
+    so in cprofile mode the calls run one at a time even with jobs.
+    """
+
+    callback: UpdateCallback
+    threshold: float
+    mode: ProfilerMode
+    timings: List[CallbackTiming]
+    stats: Optional[pstats.Stats]
+    _lock: threading.Lock
+    # Held while a call is being profiled in cprofile mode.
+    _profile_lock: threading.Lock
+
+    def __init__(
+        self,
+        callback: UpdateCallback,
+        threshold: float = 0.1,
+        mode: ProfilerMode = "cprofile",
+    ) -> None:
+        if mode not in ("cprofile", "timer"):
+            raise ValueError(f"Unknown mode: {mode!r}")
+
+        self.callback = callback
+        self.threshold = threshold
+        self.mode = mode
+        self.timings = []
+        self.stats = None
+        self._lock = threading.Lock()
+        self._profile_lock = threading.Lock()
+
+    def __call__(
+        self, character: CharacterMetadata, settings: MutableMapping[str, str]
+    ) -> None:
+        if self.mode == "timer":
+            start = time.perf_counter()
+            try:
+                self.callback(character, settings)
+            finally:
+                self._record(character, time.perf_counter() - start, None)
+            return
+
+        import cProfile
+
+        profiler = cProfile.Profile()
+        seconds = 0.0
+        try:
+            with self._profile_lock:
+                start = time.perf_counter()
+                try:
+                    profiler.runcall(self.callback, character, settings)
+                finally:
+                    seconds = time.perf_counter() - start
+        finally:
+            self._record(character, seconds, profiler)
+
+    def _record(
+        self,
+        character: CharacterMetadata,
+        seconds: float,
+        profiler: Optional[cProfile.Profile],
+    ) -> None:
+        import pstats
+
+        slow = seconds > self.threshold
+        if slow:
+            logger.warning(
+                f"Slow callback ({seconds:.3f} s): "
+                f"{character.environment} {character.server_id} {character.name}"
+            )
+
+        profile = profiler if slow else None
+
+        with self._lock:
+            self.timings.append(CallbackTiming(character, seconds, profile))
+            if profiler is not None:
+                if self.stats is None:
+                    self.stats = pstats.Stats(profiler)
+                else:
+                    self.stats.add(profiler)
+
+    def slow_calls(self) -> List[CallbackTiming]:
+        """The calls over the threshold, the slowest first."""
+        with self._lock:
+            slow = [t for t in self.timings if t.seconds > self.threshold]
+        return sorted(slow, key=lambda t: t.seconds, reverse=True)
+
+    def dump_stats(self, path: Union[str, os.PathLike]) -> None:
+        """Write the aggregated profile of every call in the pstats format."""
+        if self.stats is None:
+            raise RuntimeError("No profile has been collected")
+        self.stats.dump_stats(path)
+
+    def dump_slow_stats(self, directory: Union[str, os.PathLike]) -> List[Path]:
+        """Write the profile of each slow call in the pstats format.
+
+        The files are named after the characters like the settings files, for
+        instance swtor_he4000_Kai Zykken.prof. Return their paths.
+        """
+        paths = []
+        for timing in self.slow_calls():
+            if timing.profile is None:
+                continue
+            c = timing.character
+            path = Path(directory) / f"{c.environment}_{c.server_id}_{c.name}.prof"
+            timing.profile.dump_stats(path)
+            paths.append(path)
+        return paths
+
+    def write_report(self, output: TextIO, limit: int = 10) -> None:
+        """Write the slow calls and the top functions of their profiles."""
+        import pstats
+
+        slow = self.slow_calls()
+        output.write(
+            f"{len(slow)} of {len(self.timings)} callback(s) took over "
+            f"{self.threshold} s\n"
+        )
+        for timing in slow:
+            c = timing.character
+            output.write(
+                f"\n{timing.seconds:.3f} s: {c.environment} {c.server_id} {c.name}\n"
+            )
+            if timing.profile is not None:
+                stats = pstats.Stats(timing.profile, stream=output)
+                stats.sort_stats("cumulative").print_stats(limit)
+
+    def report(self, limit: int = 10) -> str:
+        output = io.StringIO()
+        self.write_report(output, limit=limit)
+        return output.getvalue()
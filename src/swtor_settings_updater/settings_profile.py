@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import dataclasses as dc
+import hashlib
+import json
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+
+from swtor_settings_updater.character import CharacterFilter
+from swtor_settings_updater.character import CharacterMetadata
+
+
+@dc.dataclass
+class ProfileChanges:
+    """The settings to assign and delete, keyed by the lower case names."""
+
+    __slots__ = ["assignments", "deletions"]
+    # The name and the value by lower case name.
+    assignments: Dict[str, Tuple[str, str]]
+    # The name by lower case name.
+    deletions: Dict[str, str]
+
+
+@dc.dataclass
+class _Override:
+    __slots__ = ["include", "spec", "changes"]
+    include: CharacterFilter
+    # The filters as JSON data for the digest.
+    spec: Dict[str, Optional[List[str]]]
+    changes: ProfileChanges
+
+
+class SettingsProfile:
+    """A static set of settings to assign and delete, with per-character overrides.
+
+    Pass a profile to update_all or update_path in place of, or along with, a
+    callback. The names and values are validated once when the profile is built,
+    and the changes for each combination of matching overrides are merged once
+    and then applied to the files in bulk, bypassing the mapping interface.
+
+    The overrides are applied in the order they were added, so a later override
+    wins over an earlier one and all of them over the base settings. A callback
+    runs after the profile and sees its changes.
+    """
+
+    base: ProfileChanges
+    overrides: List[_Override]
+    # The merged changes by the indices of the matching overrides.
+    _resolved: Dict[Tuple[int, ...], ProfileChanges]
+
+    def __init__(
+        self,
+        settings: Optional[Mapping[str, str]] = None,
+        delete: Iterable[str] = (),
+    ) -> None:
+        self.base = _compile(settings, delete)
+        self.overrides = []
+        self._resolved = {}
+
+    def override(
+        self,
+        settings: Optional[Mapping[str, str]] = None,
+        delete: Iterable[str] = (),
+        environments: Optional[Iterable[str]] = None,
+        server_ids: Optional[Iterable[str]] = None,
+        names: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Add settings for the characters matching all of the given filters.
+
+        The filters are matched like those of update_all: the server IDs and
+        names case-insensitively.
+        """
+        spec = {
+            "environments": None if environments is None else list(environments),
+            "server_ids": None if server_ids is None else list(server_ids),
+            "names": None if names is None else list(names),
+        }
+        include = CharacterFilter.of(
+            spec["environments"], spec["server_ids"], spec["names"]
+        )
+        if include.is_empty():
+            raise ValueError("Specify the environments, server_ids or names")
+
+        self.overrides.append(_Override(include, spec, _compile(settings, delete)))
+        self._resolved.clear()
+
+    def resolve(self, character: CharacterMetadata) -> ProfileChanges:
+        """The changes to apply to the settings of the character."""
+        key = tuple(
+            ix
+            for ix, override in enumerate(self.overrides)
+            if override.include(character)
+        )
+        changes = self._resolved.get(key)
+        if changes is None:
+            changes = ProfileChanges(
+                dict(self.base.assignments), dict(self.base.deletions)
+            )
+            for ix in key:
+                _merge(changes, self.overrides[ix].changes)
+            self._resolved[key] = changes
+        return changes
+
+    def digest(self) -> str:
+        """A hash of the contents of the profile, to detect when it changes."""
+        data = [_changes_json(self.base)] + [
+            {"filters": o.spec, "changes": _changes_json(o.changes)}
+            for o in self.overrides
+        ]
+        encoded = json.dumps(data, sort_keys=True).encode("UTF-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+
+def _compile(
+    settings: Optional[Mapping[str, str]], delete: Iterable[str]
+) -> ProfileChanges:
+    if isinstance(delete, str):
+        raise TypeError("Pass the names to delete as a collection")
+
+    changes = ProfileChanges({}, {})
+    for key in delete:
+        _validate_key(key)
+        changes.deletions[key.lower()] = key
+
+    for key, value in (settings or {}).items():
+        _validate_key(key)
+        if not isinstance(value, str):
+            raise TypeError(f"The value of {key!r} is not a string: {value!r}")
+        # Fail now rather than when the first file is written.
+        value.encode("CP1252")
+
+        key_lower = key.lower()
+        if key_lower in changes.deletions:
+            raise ValueError(f"Both set and deleted: {key!r}")
+        if key_lower in changes.assignments:
+            raise ValueError(f"Duplicate key: {key!r}")
+        changes.assignments[key_lower] = (key, value)
+
+    return changes
+
+
+def _validate_key(key: str) -> None:
+    if not isinstance(key, str):
+        raise TypeError(f"The name is not a string: {key!r}")
+    if (
+        not key
+        or key != key.strip()
+        or any(c in key for c in "=:\r\n")
+        or key[0] in "[#;"
+    ):
+        raise ValueError(f"Invalid name: {key!r}")
+
+
+def _merge(changes: ProfileChanges, override: ProfileChanges) -> None:
+    for key_lower in override.deletions:
+        changes.assignments.pop(key_lower, None)
+    changes.deletions.update(override.deletions)
+    for key_lower in override.assignments:
+        changes.deletions.pop(key_lower, None)
+    changes.assignments.update(override.assignments)
+
+
+def _changes_json(changes: ProfileChanges) -> Dict[str, object]:
+    return {
+        "assignments": sorted(changes.assignments.values()),
+        "deletions": sorted(changes.deletions.values()),
+    }
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import dataclasses as dc
+import os
+import time
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import TextIO
+from typing import Union
+
+
+# The phases of updating a file, in order. discover and commit (in transactional
+# mode) are timed for the whole run. callback includes applying a SettingsProfile.
+PHASES = ["discover", "read", "parse", "callback", "serialize", "write", "commit"]
+
+PERCENTILES = [50, 90, 99]
+
+
+@dc.dataclass
+class FileStats:
+    """The durations of the phases of updating one file, in seconds."""
+
+    path: Path
+    durations: Dict[str, float] = dc.field(default_factory=dict)
+    bytes_read: int = 0
+    # Zero unless the file was actually written, as opposed to in dry_run mode.
+    bytes_written: int = 0
+    rewritten: bool = False
+
+    def record(self, phase: str, start: float) -> float:
+        """Record the time since start as the duration of phase. Return the time."""
+        now = time.perf_counter()
+        self.durations[phase] = now - start
+        return now
+
+    def total(self) -> float:
+        return sum(self.durations.values())
+
+
+class RunStats:
+    """Collect the statistics of updating files.
+
+    Pass an instance to update_all or update_path to fill it in. summary()
+    aggregates the totals and percentiles of the phases.
+    """
+
+    discover: float
+    commit: float
+    wall: float
+    # The files excluded by the filters and those skipped as up to date.
+    excluded: int
+    skipped: int
+    files: List[FileStats]
+
+    def __init__(self) -> None:
+        self.discover = 0.0
+        self.commit = 0.0
+        self.wall = 0.0
+        self.excluded = 0
+        self.skipped = 0
+        self.files = []
+
+    def summary(self) -> Dict[str, Any]:
+        phases: Dict[str, Dict[str, float]] = {
+            "discover": {"total": self.discover}
+        }
+        for phase in PHASES[1:-1]:
+            durations = sorted(f.durations.get(phase, 0.0) for f in self.files)
+            phases[phase] = _aggregate(durations)
+        phases["commit"] = {"total": self.commit}
+
+        return {
+            "files": len(self.files),
+            "rewritten": sum(f.rewritten for f in self.files),
+            "excluded": self.excluded,
+            "skipped": self.skipped,
+            "wall": self.wall,
+            "bytes_read": sum(f.bytes_read for f in self.files),
+            "bytes_written": sum(f.bytes_written for f in self.files),
+            "phases": phases,
+            "per_file": _aggregate(sorted(f.total() for f in self.files)),
+        }
+
+    def to_json(self, per_file: bool = False) -> Dict[str, Any]:
+        """The summary, and optionally the stats of every file, as JSON data."""
+        data: Dict[str, Any] = {"summary": self.summary()}
+        if per_file:
+            data["files"] = [
+                {
+                    "path": str(f.path),
+                    "durations": f.durations,
+                    "bytes_read": f.bytes_read,
+                    "bytes_written": f.bytes_written,
+                    "rewritten": f.rewritten,
+                }
+                for f in self.files
+            ]
+        return data
+
+    def write_json(self, path: Union[str, os.PathLike], per_file: bool = False) -> None:
+        import json
+
+        with open(path, "w", encoding="UTF-8") as f:
+            json.dump(self.to_json(per_file=per_file), f, indent=2)
+
+    def write_report(self, output: TextIO) -> None:
+        """Write the summary as a table of the phases in milliseconds."""
+        summary = self.summary()
+        output.write(
+            f"{summary['files']} file(s), {summary['rewritten']} rewritten, "
+            f"{summary['excluded']} excluded, {summary['skipped']} skipped "
+            f"in {summary['wall']:.3f} s\n"
+            f"{summary['bytes_read']} byte(s) read, "
+            f"{summary['bytes_written']} byte(s) written\n\n"
+        )
+
+        columns = ["total", "mean"] + [f"p{p}" for p in PERCENTILES] + ["max"]
+        output.write(f"{'ms':<10}" + "".join(f"{c:>10}" for c in columns) + "\n")
+        rows = list(summary["phases"].items()) + [("per file", summary["per_file"])]
+        for name, aggregate in rows:
+            cells = [
+                f"{aggregate[c] * 1000:10.3f}" if c in aggregate else " " * 10
+                for c in columns
+            ]
+            output.write(f"{name:<10}" + "".join(cells).rstrip() + "\n")
+
+    def report(self) -> str:
+        import io
+
+        output = io.StringIO()
+        self.write_report(output)
+        return output.getvalue()
+
+
+def _aggregate(sorted_values: Sequence[float]) -> Dict[str, float]:
+    aggregate = {"total": sum(sorted_values)}
+    if sorted_values:
+        aggregate["mean"] = aggregate["total"] / len(sorted_values)
+        for p in PERCENTILES:
+            aggregate[f"p{p}"] = percentile(sorted_values, p)
+        aggregate["max"] = sorted_values[-1]
+    return aggregate
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    """The nearest-rank percentile of a non-empty sorted sequence."""
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
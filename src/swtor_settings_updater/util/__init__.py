@@ -1,13 +1,66 @@
-from .character_class import CP1252_PRINTABLE
-from .character_class import regex_character_class
-from .option_transformer import OptionTransformer
-from .swtor_case import swtor_lower
-from .swtor_case import swtor_upper
+import importlib
+from typing import Any
+from typing import List
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .bitmask_set import BitmaskSet
+    from .character_class import CP1252_PRINTABLE
+    from .character_class import regex_character_class
+    from .ini_patcher import SettingsPatcher
+    from .key_table import KeyTable
+    from .lazy_regex import LazyRegex
+    from .option_transformer import OptionTransformer
+    from .swtor_case import swtor_lower
+    from .swtor_case import swtor_lower_all
+    from .swtor_case import swtor_upper
+    from .swtor_case import swtor_upper_all
+    from .tracking_mapping import TrackingMapping
+    from .transaction import FileTransaction
 
 __all__ = [
+    "BitmaskSet",
     "CP1252_PRINTABLE",
+    "FileTransaction",
+    "KeyTable",
     "regex_character_class",
+    "LazyRegex",
     "OptionTransformer",
+    "SettingsPatcher",
     "swtor_lower",
+    "swtor_lower_all",
     "swtor_upper",
+    "swtor_upper_all",
+    "TrackingMapping",
 ]
+
+# The submodules are imported on first use to keep the startup fast.
+_LAZY_ATTRIBUTES = {
+    "BitmaskSet": ".bitmask_set",
+    "CP1252_PRINTABLE": ".character_class",
+    "FileTransaction": ".transaction",
+    "KeyTable": ".key_table",
+    "regex_character_class": ".character_class",
+    "LazyRegex": ".lazy_regex",
+    "OptionTransformer": ".option_transformer",
+    "SettingsPatcher": ".ini_patcher",
+    "swtor_lower": ".swtor_case",
+    "swtor_lower_all": ".swtor_case",
+    "swtor_upper": ".swtor_case",
+    "swtor_upper_all": ".swtor_case",
+    "TrackingMapping": ".tracking_mapping",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from typing import AbstractSet
+from typing import Any
+from typing import Iterable
+from typing import Iterator
+from typing import MutableSet
+
+
+class BitmaskSet(MutableSet[int]):
+    """A set of non-negative integers stored as the bits of an int."""
+
+    __slots__ = ["bitmask"]
+    bitmask: int
+
+    def __init__(self, ixs: Iterable[int] = ()) -> None:
+        self.bitmask = bitmask_of(ixs)
+
+    @classmethod
+    def from_bitmask(cls, bitmask: int) -> BitmaskSet:
+        if bitmask < 0:
+            raise ValueError(f"Invalid bitmask {bitmask!r}")
+        s = cls()
+        s.bitmask = bitmask
+        return s
+
+    def __contains__(self, ix: object) -> bool:
+        return isinstance(ix, int) and ix >= 0 and bool(self.bitmask >> ix & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        bitmask = self.bitmask
+        while bitmask:
+            lowest = bitmask & -bitmask
+            yield lowest.bit_length() - 1
+            bitmask ^= lowest
+
+    def __len__(self) -> int:
+        return self.bitmask.bit_count()
+
+    def add(self, ix: int) -> None:
+        if ix < 0:
+            raise ValueError(f"Invalid ix {ix!r}")
+        self.bitmask |= 1 << ix
+
+    def discard(self, ix: int) -> None:
+        if ix >= 0:
+            self.bitmask &= ~(1 << ix)
+
+    # Bitwise fast paths for the operations between two BitmaskSets.
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, BitmaskSet):
+            return self.bitmask == other.bitmask
+        return super().__eq__(other)
+
+    def __or__(self, other: AbstractSet[Any]) -> BitmaskSet:
+        if isinstance(other, BitmaskSet):
+            return BitmaskSet.from_bitmask(self.bitmask | other.bitmask)
+        return BitmaskSet.from_bitmask(self.bitmask | bitmask_of(other))
+
+    def __and__(self, other: AbstractSet[Any]) -> BitmaskSet:
+        if isinstance(other, BitmaskSet):
+            return BitmaskSet.from_bitmask(self.bitmask & other.bitmask)
+        return BitmaskSet(ix for ix in self if ix in other)
+
+    def __sub__(self, other: AbstractSet[Any]) -> BitmaskSet:
+        if isinstance(other, BitmaskSet):
+            return BitmaskSet.from_bitmask(self.bitmask & ~other.bitmask)
+        return BitmaskSet(ix for ix in self if ix not in other)
+
+    def __ior__(self, other: AbstractSet[Any]) -> BitmaskSet:
+        self.bitmask |= bitmask_of(other)
+        return self
+
+    def __isub__(self, other: AbstractSet[Any]) -> BitmaskSet:
+        if isinstance(other, BitmaskSet):
+            self.bitmask &= ~other.bitmask
+        else:
+            for ix in other:
+                self.discard(ix)
+        return self
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({sorted(self)!r})"
+
+
+def bitmask_of(ixs: Iterable[int]) -> int:
+    """The bitmask of a set of non-negative integers."""
+    if isinstance(ixs, BitmaskSet):
+        return ixs.bitmask
+
+    bitmask = 0
+    for ix in ixs:
+        if ix < 0:
+            raise ValueError(f"Invalid ix {ix!r}")
+        bitmask |= 1 << ix
+    return bitmask
@@ -1,15 +1,20 @@
-import codecs
-
-import regex
-
-CP1252_PRINTABLE = regex.sub(
-    r"\p{C}+",
-    "",
-    codecs.decode(bytes(range(0, 0x100)), encoding="CP1252", errors="ignore"),
+import functools
+
+# The printable characters of CP1252, in the order of their bytes. Generated by
+# scripts/generate_character_classes.py, which also checks that it is up to date.
+CP1252_PRINTABLE = (
+    " !\"#$%&'()*+,-./0123456789:;<=>?@ABCDEFGHIJKLMNO"
+    "PQRSTUVWXYZ[\\]^_`abcdefghijklmnopqrstuvwxyz{|}~€"
+    "‚ƒ„…†‡ˆ‰Š‹ŒŽ‘’“”•–—˜™š›œžŸ\xa0¡¢£¤¥¦§¨©ª«¬®¯°±²³´µ¶"
+    "·¸¹º»¼½¾¿ÀÁÂÃÄÅÆÇÈÉÊËÌÍÎÏÐÑÒÓÔÕÖ×ØÙÚÛÜÝÞßàáâãäåæ"
+    "çèéêëìíîïðñòóôõö÷øùúûüýþÿ"
 )
 
 
+@functools.lru_cache(maxsize=None)
 def regex_character_class(characters: str, exclusions: str = "") -> str:
+    import regex
+
     ranges = []
     current_range = None
 
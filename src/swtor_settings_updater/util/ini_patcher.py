@@ -0,0 +1,279 @@
+import dataclasses as dc
+import re
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Mapping
+from typing import MutableMapping
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from swtor_settings_updater.util.key_table import KeyTable
+
+
+ENCODING = "CP1252"
+
+# The same syntax as configparser.ConfigParser with the default options.
+SECTION_REGEX = re.compile(r"\[(?P<header>.+)\]")
+
+# The lines including their line breaks, like bytes.splitlines(keepends=True).
+LINE_REGEX = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+\Z")
+
+
+@dc.dataclass
+class _Entry:
+    __slots__ = ["key", "value", "start", "end", "modified"]
+    key: str
+    value: str
+    # The span of lines the entry occupies in the original file, None if new.
+    start: Optional[int]
+    end: Optional[int]
+    modified: bool
+
+
+class SettingsPatcher(MutableMapping[str, str]):
+    """Edit a section of an INI file while preserving the rest of it byte for byte.
+
+    The file is split into lines both as bytes and as text decoded from CP1252.
+    Like with OptionTransformer, the keys are case-insensitive and keep the case
+    they first appeared in, and the lower case forms come from a KeyTable which
+    may be shared with other files.
+
+    Like configparser, a line is a continuation of a multi-line value only if it
+    is indented more than the line of the key, and the blank lines between the
+    continuation lines are part of the value. The DEFAULT section, whose keys
+    configparser shows in every section, is rejected.
+
+    patch() replaces the lines of the keys which were set or deleted and copies
+    every other line through unchanged, keeping the indentation of the keys. New
+    keys are added after the last key of the section, indented like it.
+    """
+
+    content: bytes
+    key_table: KeyTable
+    lines: List[bytes]
+    newline: bytes
+    entries: Dict[str, _Entry]
+    deleted: List[_Entry]
+    insert_ix: int
+    # The indentation of the line before insert_ix which is not a continuation.
+    insert_indent: str
+
+    def __init__(
+        self,
+        content: bytes,
+        section: str = "Settings",
+        key_table: Optional[KeyTable] = None,
+    ) -> None:
+        self.content = content
+        self.key_table = KeyTable() if key_table is None else key_table
+        self.lines = content.splitlines(keepends=True)
+        self.entries = {}
+        self.deleted = []
+        self.insert_ix = 0
+        self.insert_indent = ""
+
+        section_ix = self._parse(section)
+        if section_ix is None:
+            raise KeyError(section)
+
+        header = self.lines[section_ix]
+        self.newline = header.removeprefix(header.rstrip(b"\r\n")) or b"\r\n"
+
+    def _parse(self, section: str) -> Optional[int]:
+        """Parse the section and return the index of its header line."""
+        section_ix = None
+        in_section = False
+        current: Optional[_Entry] = None
+
+        # CP1252 maps every byte to one character, so the lines split the same
+        # way as the bytes.
+        text_lines = LINE_REGEX.findall(self.content.decode(ENCODING))
+        assert len(text_lines) == len(self.lines)
+
+        # Whether the previous line which is not a continuation was a key, and how
+        # much it was indented.
+        after_key = False
+        indent_level = 0
+        blank_lines = 0
+
+        for ix, text in enumerate(text_lines):
+            stripped = text.strip()
+            if not stripped:
+                blank_lines += 1
+                continue
+            if stripped[0] in "#;":
+                continue
+
+            indent = _indent(text)
+            if after_key and len(indent) > indent_level:
+                # A continuation line of a multi-line value, including the blank
+                # lines before it.
+                if current is not None:
+                    current.value += "\n" * (blank_lines + 1) + stripped
+                    current.end = self.insert_ix = ix + 1
+                blank_lines = 0
+                continue
+            indent_level = len(indent)
+            blank_lines = 0
+
+            match = SECTION_REGEX.match(stripped)
+            if match:
+                header = match.group("header")
+                if header == "DEFAULT":
+                    raise ValueError("The DEFAULT section is not supported")
+                in_section = header == section
+                after_key = False
+                current = None
+                if in_section:
+                    if section_ix is not None:
+                        raise ValueError(f"Duplicate section: {section!r}")
+                    section_ix = ix
+                    self.insert_ix = ix + 1
+                    self.insert_indent = indent
+                continue
+
+            after_key = True
+            if not in_section:
+                continue
+
+            # The option ends at the first delimiter, = or :.
+            delimiter_ix = stripped.find("=")
+            colon_ix = stripped.find(":")
+            if colon_ix != -1 and (delimiter_ix == -1 or colon_ix < delimiter_ix):
+                delimiter_ix = colon_ix
+            if delimiter_ix == -1:
+                raise ValueError(f"Unrecognized line {ix + 1}: {text!r}")
+
+            key, _, value = stripped.partition(stripped[delimiter_ix])
+            key, key_lower = self.key_table.lookup(key.rstrip())
+            value = value.lstrip()
+
+            if key_lower in self.entries:
+                raise ValueError(f"Duplicate key: {key!r}")
+
+            current = _Entry(key, value, ix, ix + 1, modified=False)
+            self.entries[key_lower] = current
+            self.insert_ix = ix + 1
+            self.insert_indent = indent
+
+        return section_ix
+
+    def __getitem__(self, key: str) -> str:
+        return self.entries[self.key_table.lower(key)].value
+
+    def __setitem__(self, key: str, value: str) -> None:
+        if not isinstance(value, str):
+            raise TypeError("option values must be strings")
+
+        key, key_lower = self.key_table.lookup(key)
+        entry = self.entries.get(key_lower)
+        if entry is None:
+            self.entries[key_lower] = _Entry(key, value, None, None, modified=True)
+        elif entry.value != value:
+            entry.value = value
+            entry.modified = True
+
+    def __delitem__(self, key: str) -> None:
+        entry = self.entries.pop(self.key_table.lower(key))
+        if entry.start is not None:
+            self.deleted.append(entry)
+
+    def __iter__(self) -> Iterator[str]:
+        return (entry.key for entry in self.entries.values())
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def merge(
+        self, assignments: Mapping[str, Tuple[str, str]], deletions: Mapping[str, str]
+    ) -> List[str]:
+        """Assign and delete many keys given by their lower case forms.
+
+        assignments maps the lower case forms to the keys and the values, deletions
+        to the keys. Missing keys are not deleted. Return the keys which changed.
+        """
+        changed = []
+        entries = self.entries
+        for key_lower, (key, value) in assignments.items():
+            entry = entries.get(key_lower)
+            if entry is None:
+                entries[key_lower] = _Entry(key, value, None, None, modified=True)
+                changed.append(key)
+            elif entry.value != value:
+                entry.value = value
+                entry.modified = True
+                changed.append(entry.key)
+        for key_lower in deletions:
+            entry = entries.pop(key_lower, None)
+            if entry is not None:
+                if entry.start is not None:
+                    self.deleted.append(entry)
+                changed.append(entry.key)
+        return changed
+
+    def is_modified(self) -> bool:
+        return bool(self.deleted) or any(e.modified for e in self.entries.values())
+
+    def patch(self) -> bytes:
+        """Return the file contents with the changes applied."""
+        if not self.is_modified():
+            return self.content
+
+        replacements: Dict[int, bytes] = {}
+        skipped: Set[int] = set()
+        added: List[bytes] = []
+
+        for entry in self.deleted:
+            assert entry.start is not None and entry.end is not None
+            skipped.update(range(entry.start, entry.end))
+
+        for entry in self.entries.values():
+            if not entry.modified:
+                continue
+            if entry.start is None:
+                added.append(self._format(entry, self.insert_indent))
+            else:
+                assert entry.end is not None
+                original = self.lines[entry.start].decode(ENCODING)
+                replacements[entry.start] = self._format(entry, _indent(original))
+                skipped.update(range(entry.start + 1, entry.end))
+
+        output: List[bytes] = []
+
+        def add() -> None:
+            # The preceding line may be the last line of the file without a line
+            # break.
+            if output and not output[-1].endswith((b"\r", b"\n")):
+                output[-1] += self.newline
+            output.extend(added)
+
+        for ix, line in enumerate(self.lines):
+            if ix == self.insert_ix and added:
+                add()
+            if ix in replacements:
+                output.append(replacements[ix])
+            elif ix not in skipped:
+                output.append(line)
+        if self.insert_ix == len(self.lines) and added:
+            add()
+
+        return b"".join(output)
+
+    def _format(self, entry: _Entry, indent: str) -> bytes:
+        # Multi-line values are written with continuation lines indented further
+        # than the key.
+        lines = f"{entry.key} = {entry.value}".split("\n")
+        return (
+            indent.encode(ENCODING)
+            + (self.newline + indent.encode(ENCODING) + b"\t").join(
+                line.encode(ENCODING) for line in lines
+            )
+            + self.newline
+        )
+
+
+def _indent(text: str) -> str:
+    """The whitespace at the start of the line."""
+    return text[: len(text) - len(text.lstrip())]
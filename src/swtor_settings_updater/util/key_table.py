@@ -0,0 +1,37 @@
+import sys
+from typing import Any
+from typing import Dict
+from typing import Tuple
+
+
+class KeyTable:
+    """Intern setting names and cache their lower case forms.
+
+    One table can be shared by all the files of a run, so that the names common to
+    the files are lower-cased once and stored as one string object each. The
+    table only speeds things up; it does not affect which case a file uses.
+    """
+
+    # The interned name and its lower case form by name.
+    entries: Dict[str, Tuple[str, str]]
+
+    def __init__(self) -> None:
+        self.entries = {}
+
+    def lookup(self, name: str) -> Tuple[str, str]:
+        """Return the interned name and its lower case form."""
+        entry = self.entries.get(name)
+        if entry is None:
+            name = sys.intern(name)
+            entry = self.entries[name] = (name, sys.intern(name.lower()))
+        return entry
+
+    def lower(self, name: str) -> str:
+        return self.lookup(name)[1]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Do not copy the contents along with every task sent to another process.
+        return {"entries": {}}
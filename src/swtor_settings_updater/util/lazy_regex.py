@@ -0,0 +1,27 @@
+from typing import Any
+from typing import Callable
+from typing import Optional
+from typing import Union
+
+
+class LazyRegex:
+    """A class attribute which compiles a regex on first access.
+
+    The pattern may be given as a function to defer computing it as well.
+    """
+
+    pattern: Union[str, Callable[[], str]]
+    compiled: Optional[Any]
+
+    def __init__(self, pattern: Union[str, Callable[[], str]]) -> None:
+        self.pattern = pattern
+        self.compiled = None
+
+    def __get__(self, obj: object, objtype: Optional[type] = None) -> Any:
+        if self.compiled is None:
+            import regex
+
+            pattern = self.pattern if isinstance(self.pattern, str) else self.pattern()
+            self.compiled = regex.compile(pattern)
+
+        return self.compiled
@@ -1,13 +1,22 @@
 import configparser
 from typing import Dict
+from typing import Optional
+
+from swtor_settings_updater.util.key_table import KeyTable
 
 
 class OptionTransformer:
-    """Prevent ConfigParser from lower-casing key names."""
+    """Prevent ConfigParser from lower-casing key names.
+
+    The lower case forms come from a KeyTable which may be shared with other
+    OptionTransformers.
+    """
 
+    key_table: KeyTable
     canonical_forms: Dict[str, str]
 
-    def __init__(self) -> None:
+    def __init__(self, key_table: Optional[KeyTable] = None) -> None:
+        self.key_table = KeyTable() if key_table is None else key_table
         self.canonical_forms = {}
 
     def install(self, parser: configparser.ConfigParser) -> None:
@@ -16,10 +25,11 @@ class OptionTransformer:
         parser.optionxform = self.xform  # type: ignore[assignment]
 
     def xform(self, name: str) -> str:
-        name_lower = name.lower()
+        name, name_lower = self.key_table.lookup(name)
 
-        if name_lower in self.canonical_forms:
-            return self.canonical_forms[name_lower]
+        canonical = self.canonical_forms.get(name_lower)
+        if canonical is not None:
+            return canonical
 
         else:
             # Add the name to the dict as the canonical form.
@@ -1,11 +1,48 @@
-import regex
+from typing import Callable
+from typing import Iterable
+from typing import List
+
+
+ASCII_UPPERCASE = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+ASCII_LOWERCASE = "abcdefghijklmnopqrstuvwxyz"
+
+LOWER_TABLE = str.maketrans(ASCII_UPPERCASE, ASCII_LOWERCASE)
+UPPER_TABLE = str.maketrans(ASCII_LOWERCASE, ASCII_UPPERCASE)
 
 
 def swtor_lower(string: str) -> str:
     """Convert A-Z only into lowercase, matching SWTOR behavior."""
-    return regex.sub("[A-Z]+", lambda m: m.group(0).lower(), string)
+    # In an ASCII string, str.lower only converts A-Z.
+    if string.isascii():
+        return string.lower()
+    return string.translate(LOWER_TABLE)
 
 
 def swtor_upper(string: str) -> str:
     """Convert a-z only into uppercase, matching SWTOR behavior."""
-    return regex.sub("[a-z]+", lambda m: m.group(0).upper(), string)
+    if string.isascii():
+        return string.upper()
+    return string.translate(UPPER_TABLE)
+
+
+def swtor_lower_all(strings: Iterable[str]) -> List[str]:
+    """Convert A-Z only into lowercase in each of the strings."""
+    return _convert_all(swtor_lower, strings)
+
+
+def swtor_upper_all(strings: Iterable[str]) -> List[str]:
+    """Convert a-z only into uppercase in each of the strings."""
+    return _convert_all(swtor_upper, strings)
+
+
+def _convert_all(convert: Callable[[str], str], strings: Iterable[str]) -> List[str]:
+    strings = list(strings)
+    if not strings:
+        return []
+
+    # Convert all the strings with a single call unless one of them contains the
+    # separator.
+    joined = "\0".join(strings)
+    if joined.count("\0") != len(strings) - 1:
+        return [convert(string) for string in strings]
+    return convert(joined).split("\0")
@@ -0,0 +1,43 @@
+from typing import Iterator
+from typing import MutableMapping
+from typing import Set
+
+
+class TrackingMapping(MutableMapping[str, str]):
+    """Record which keys of the underlying mapping are set or deleted.
+
+    Setting a key to the value it already has is not recorded, and does not touch
+    the underlying mapping at all.
+    """
+
+    data: MutableMapping[str, str]
+    changed_keys: Set[str]
+
+    def __init__(self, data: MutableMapping[str, str]) -> None:
+        self.data = data
+        self.changed_keys = set()
+
+    def __getitem__(self, key: str) -> str:
+        return self.data[key]
+
+    def __setitem__(self, key: str, value: str) -> None:
+        if key in self.data and self.data[key] == value:
+            return
+        self.data[key] = value
+        self.changed_keys.add(key)
+
+    def __delitem__(self, key: str) -> None:
+        del self.data[key]
+        self.changed_keys.add(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def is_modified(self) -> bool:
+        return bool(self.changed_keys)
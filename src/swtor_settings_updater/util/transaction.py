@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+from types import TracebackType
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Type
+
+
+class FileTransaction:
+    """Replace the contents of several files together.
+
+    stage() writes the new contents into temporary files next to the targets.
+    commit() flushes them all to disk, renames each over its target and finally
+    flushes each directory once. Until commit() the targets are untouched, and
+    leaving the context without committing removes the temporary files.
+
+    A failure in the middle of commit() can still leave some targets replaced and
+    others not. That window is much shorter than the time it takes to compute the
+    contents.
+    """
+
+    # The target and temporary paths of the staged files.
+    staged: List[Tuple[Path, Path]]
+
+    def __init__(self) -> None:
+        self.staged = []
+
+    def __enter__(self) -> FileTransaction:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.rollback()
+
+    def stage(self, path: Path, content: bytes) -> os.stat_result:
+        """Write the new content of path into a temporary file.
+
+        Return the status of the temporary file, which path has once committed.
+        """
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=f".{path.name}.", suffix=".tmp", dir=path.parent
+        )
+        tmp_path = Path(tmp_name)
+        try:
+            with open(fd, "wb") as f:
+                f.write(content)
+                f.flush()
+                stat = os.fstat(f.fileno())
+        except BaseException:
+            tmp_path.unlink()
+            raise
+        self.staged.append((path, tmp_path))
+        return stat
+
+    def commit(self) -> None:
+        # Flush the data of every file before any of them is renamed.
+        for _path, tmp_path in self.staged:
+            with open(tmp_path, "rb+") as f:
+                os.fsync(f.fileno())
+
+        # A dict rather than a set to sync the directories in order.
+        directories: Dict[Path, None] = {}
+        committed = 0
+        try:
+            for path, tmp_path in self.staged:
+                os.replace(tmp_path, path)
+                committed += 1
+                directories[path.parent] = None
+        finally:
+            del self.staged[:committed]
+
+        for directory in directories:
+            _sync_directory(directory)
+
+    def rollback(self) -> None:
+        """Remove the temporary files of the files which were not committed."""
+        while self.staged:
+            _path, tmp_path = self.staged.pop()
+            tmp_path.unlink(missing_ok=True)
+
+
+def _sync_directory(directory: Path) -> None:
+    # Flush the renames. Windows can neither open nor needs to sync a directory.
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
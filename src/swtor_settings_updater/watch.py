@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import abc
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Literal
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import TYPE_CHECKING
+from typing import Union
+
+from swtor_settings_updater.character import CANDIDATE_FILENAME_REGEX
+from swtor_settings_updater.character import Engine
+from swtor_settings_updater.character import FILENAME_REGEX
+from swtor_settings_updater.character import iter_settings_files
+from swtor_settings_updater.character import update_path
+from swtor_settings_updater.character import UpdateCallback
+
+if TYPE_CHECKING:
+    from swtor_settings_updater.settings_profile import SettingsProfile
+
+
+# inotify is only available on Linux. poll compares the modification times of the
+# files periodically and works everywhere.
+Backend = Literal["auto", "inotify", "poll"]
+
+# The identity of a version of a file.
+Signature = Tuple[int, int, int]
+
+# How often a blocked backend checks whether it has been asked to stop, in seconds.
+STOP_CHECK_INTERVAL = 0.25
+
+
+logger = logging.getLogger(__name__)
+
+
+def watch(
+    settings_dir: Union[str, os.PathLike],
+    callback: Optional[UpdateCallback] = None,
+    engine: Engine = "configparser",
+    profile: Optional["SettingsProfile"] = None,
+    debounce: float = 1.0,
+    poll_interval: float = 2.0,
+    backend: Backend = "auto",
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """Update the settings of a character whenever the game rewrites them.
+
+    Each settings file is updated with update_path once it has not been written
+    to for debounce seconds. Only the settings directories which exist when the
+    watch starts are watched. Run update_all first to update the files changed
+    before the watch started.
+
+    The backend is inotify on Linux and poll elsewhere by default. poll checks
+    the files every poll_interval seconds.
+
+    The rewrites by the watch itself are recognized by the size, modification
+    time and inode of the file and not updated again. An error in updating a file
+    is logged and the watch continues.
+
+    Run until the stop event is set.
+    """
+    if callback is None and profile is None:
+        raise ValueError("Specify a callback and/or a profile")
+    if stop is None:
+        stop = threading.Event()
+
+    settings_dir = Path(settings_dir)
+    watcher = _make_watcher(settings_dir, backend, poll_interval)
+    logger.info(f"Watching {settings_dir} with {watcher.name}")
+
+    # The deadline after which each changed file is updated.
+    pending: Dict[Path, float] = {}
+    # The signatures of the files as last written by the watch.
+    own_writes: Dict[Path, Signature] = {}
+
+    try:
+        while not stop.is_set():
+            timeout = STOP_CHECK_INTERVAL
+            if pending:
+                until_due = min(pending.values()) - time.monotonic()
+                timeout = max(0.0, min(timeout, until_due))
+
+            written = watcher.wait(timeout)
+            now = time.monotonic()
+            for path in written:
+                signature = _signature(path)
+                if signature is not None and own_writes.get(path) == signature:
+                    continue
+                pending[path] = now + debounce
+
+            now = time.monotonic()
+            for path in [p for p, deadline in pending.items() if deadline <= now]:
+                del pending[path]
+                _update(path, callback, engine, profile, own_writes)
+
+    finally:
+        watcher.close()
+
+
+def _update(
+    path: Path,
+    callback: Optional[UpdateCallback],
+    engine: Engine,
+    profile: Optional["SettingsProfile"],
+    own_writes: Dict[Path, Signature],
+) -> None:
+    try:
+        rewritten = update_path(path, callback, engine=engine, profile=profile)
+    except FileNotFoundError:
+        logger.debug(f"Removed: {path}")
+        return
+    except Exception:
+        logger.exception(f"Failed to update {path}")
+        return
+
+    if rewritten:
+        signature = _signature(path)
+        if signature is not None:
+            own_writes[path] = signature
+
+
+def _signature(path: Path) -> Optional[Signature]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+def _make_watcher(
+    settings_dir: Path, backend: Backend, poll_interval: float
+) -> _Watcher:
+    if backend not in ("auto", "inotify", "poll"):
+        raise ValueError(f"Unknown backend: {backend!r}")
+
+    if backend != "poll":
+        try:
+            return _InotifyWatcher(settings_dir)
+        except OSError:
+            if backend == "inotify":
+                raise
+            logger.debug("inotify is not available", exc_info=True)
+
+    return _PollWatcher(settings_dir, poll_interval)
+
+
+class _Watcher(abc.ABC):
+    name: str
+
+    @abc.abstractmethod
+    def wait(self, timeout: float) -> Set[Path]:
+        """Wait up to timeout seconds and return the files which were written."""
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Release the resources of the watcher."""
+
+
+class _PollWatcher(_Watcher):
+    name = "polling"
+
+    settings_dir: Path
+    interval: float
+    signatures: Dict[Path, Signature]
+    next_poll: float
+    # The files whose names do not parse, logged once each.
+    unrecognized: Set[Path]
+
+    def __init__(self, settings_dir: Path, interval: float) -> None:
+        self.settings_dir = settings_dir
+        self.interval = interval
+        self.unrecognized = set()
+        self.signatures = self._scan()
+        self.next_poll = time.monotonic() + interval
+
+    def _scan(self) -> Dict[Path, Signature]:
+        signatures = {}
+        for path, _environment, name in iter_settings_files(self.settings_dir):
+            if not FILENAME_REGEX.fullmatch(name):
+                if path not in self.unrecognized:
+                    logger.error(f"Unrecognized filename: {path}")
+                    self.unrecognized.add(path)
+                continue
+            signature = _signature(path)
+            if signature is not None:
+                signatures[path] = signature
+        return signatures
+
+    def wait(self, timeout: float) -> Set[Path]:
+        delay = self.next_poll - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(0.0, delay))
+        self.next_poll = time.monotonic() + self.interval
+
+        signatures = self._scan()
+        changed = {
+            path
+            for path, signature in signatures.items()
+            if self.signatures.get(path) != signature
+        }
+        self.signatures = signatures
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+# From <sys/inotify.h>.
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+
+class _InotifyWatcher(_Watcher):
+    """Watch the settings directories with inotify through ctypes.
+
+    A file counts as written when a writer closes it or another file is renamed
+    over it, as atomic_write does.
+    """
+
+    name = "inotify"
+
+    fd: int
+    directories: Dict[int, Path]
+
+    def __init__(self, settings_dir: Path) -> None:
+        import ctypes
+        import sys
+
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("The C library does not support inotify")
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.fd = fd
+        self.directories = {}
+
+        try:
+            with os.scandir(settings_dir) as it:
+                environments = sorted(e.path for e in it if e.is_dir())
+            for environment in environments:
+                directory = Path(environment) / "settings"
+                if directory.is_dir():
+                    self._watch(directory)
+        except BaseException:
+            self.close()
+            raise
+
+    def _watch(self, directory: Path) -> None:
+        import ctypes
+
+        wd = self._add_watch(
+            self.fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO
+        )
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), str(directory))
+        self.directories[wd] = directory
+
+    def wait(self, timeout: float) -> Set[Path]:
+        import select
+
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        return set(self._parse(data))
+
+    def _parse(self, data: bytes) -> List[Path]:
+        import struct
+
+        # struct inotify_event { int wd; uint32_t mask, cookie, len; char name[]; }
+        header = struct.Struct("iIII")
+        paths = []
+        offset = 0
+        while offset < len(data):
+            wd, _mask, _cookie, length = header.unpack_from(data, offset)
+            offset += header.size
+            end = offset + length
+            name = os.fsdecode(data[offset:end].rstrip(b"\0"))
+            offset = end
+
+            directory = self.directories.get(wd)
+            if directory is not None and CANDIDATE_FILENAME_REGEX.fullmatch(name):
+                paths.append(directory / name)
+        return paths
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
@@ -0,0 +1,123 @@
+import os
+from pathlib import Path
+from typing import List
+from typing import MutableMapping
+
+import pytest
+
+from swtor_settings_updater.backup import BackupStore
+from swtor_settings_updater.character import CharacterMetadata
+from swtor_settings_updater.character import update_all
+from swtor_settings_updater.character import update_path
+
+
+SETTINGS_PATHS = [
+    Path("publictest/settings/he4343_Plagueis_PlayerGUIState.ini"),
+    Path("swtor/settings/he4000_Kai Zykken_PlayerGUIState.ini"),
+    Path("swtor/settings/he4000_Satele Shan_PlayerGUIState.ini"),
+]
+
+CONTENT = b"[Settings]\r\nShow_Chat_Timestamp = false\r\n"
+
+
+def make_settings_dir(root: Path) -> List[Path]:
+    paths = []
+    for relative_path in SETTINGS_PATHS:
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(CONTENT)
+        paths.append(path)
+    return paths
+
+
+def update_settings(_character: CharacterMetadata, s: MutableMapping[str, str]) -> None:
+    s["Show_Chat_Timestamp"] = "true"
+
+
+def count_objects(store: BackupStore) -> int:
+    return sum(1 for p in (store.root / "objects").rglob("*") if p.is_file())
+
+
+def test_backup_store_deduplicates_contents(tmp_path: Path) -> None:
+    settings_dir = tmp_path / "settings"
+    paths = make_settings_dir(settings_dir)
+    store = BackupStore(tmp_path / "backup")
+
+    first = store.backup(settings_dir, paths)
+    assert count_objects(store) == 1
+
+    paths[0].write_bytes(b"[Settings]\r\n")
+    second = store.backup(settings_dir, paths)
+    assert count_objects(store) == 2
+
+    assert store.runs() == [first, second]
+    files = store.read_run(second)["files"]
+    assert sorted(files) == [p.as_posix() for p in SETTINGS_PATHS]
+
+
+def test_backup_store_reuses_hashes_of_unchanged_files(tmp_path: Path) -> None:
+    settings_dir = tmp_path / "settings"
+    paths = make_settings_dir(settings_dir)
+    store = BackupStore(tmp_path / "backup")
+    store.backup(settings_dir, paths)
+
+    # The same size and modification time: the file is assumed unchanged.
+    stat = paths[0].stat()
+    paths[0].write_bytes(CONTENT.upper())
+    os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    store.backup(settings_dir, paths)
+    assert count_objects(store) == 1
+
+
+def test_backup_store_restores_run(tmp_path: Path) -> None:
+    settings_dir = tmp_path / "settings"
+    paths = make_settings_dir(settings_dir)
+    store = BackupStore(tmp_path / "backup")
+
+    assert update_all(settings_dir, update_settings, backup=store) == paths
+    [run_id] = store.runs()
+
+    assert store.restore(run_id) == paths
+    for path in paths:
+        assert path.read_bytes() == CONTENT
+    assert store.restore(run_id) == []
+
+    other_dir = tmp_path / "other"
+    restored = store.restore(run_id, other_dir)
+    assert restored == [other_dir / p for p in SETTINGS_PATHS]
+
+
+def test_backup_store_backs_up_single_file(tmp_path: Path) -> None:
+    settings_dir = tmp_path / "settings"
+    paths = make_settings_dir(settings_dir)
+    store = BackupStore(tmp_path / "backup")
+
+    assert update_path(paths[1], update_settings, backup=store)
+    [run_id] = store.runs()
+    assert list(store.read_run(run_id)["files"]) == [SETTINGS_PATHS[1].as_posix()]
+
+    assert store.restore(run_id) == [paths[1]]
+    assert paths[1].read_bytes() == CONTENT
+
+
+def test_backup_store_resolves_settings_dir(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    settings_dir = tmp_path / "settings"
+    paths = make_settings_dir(settings_dir)
+    store = BackupStore(tmp_path / "backup")
+
+    monkeypatch.chdir(tmp_path)
+    run_id = store.backup("settings", [Path("settings") / p for p in SETTINGS_PATHS])
+
+    # The same size and modification time, backed up through another spelling of
+    # the directory: the file is assumed unchanged.
+    stat = paths[1].stat()
+    paths[1].write_bytes(CONTENT.upper())
+    os.utime(paths[1], ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    store.backup(settings_dir, [paths[1]])
+    assert count_objects(store) == 1
+
+    monkeypatch.chdir(tmp_path / "backup")
+    assert store.restore(run_id) == [settings_dir.resolve() / SETTINGS_PATHS[1]]
+    assert paths[1].read_bytes() == CONTENT
@@ -1,14 +1,34 @@
+import os
+import threading
+import time
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any
 from typing import Callable
+from typing import Dict
 from typing import Generator
+from typing import get_args
+from typing import List
 from typing import MutableMapping
+from typing import Optional
 from typing import Union
 
 import pytest
 
 from swtor_settings_updater.character import CharacterMetadata
+from swtor_settings_updater.character import diff_all
+from swtor_settings_updater.character import diff_path
+from swtor_settings_updater.character import Engine
+from swtor_settings_updater.character import iter_characters
+from swtor_settings_updater.character import iter_update_all
 from swtor_settings_updater.character import update_all
 from swtor_settings_updater.character import update_path
+from swtor_settings_updater.character import UpdateCallback
+from swtor_settings_updater.manifest import default_manifest_path
+from swtor_settings_updater.settings_profile import SettingsProfile
+from swtor_settings_updater.stats import RunStats
 
 
 # The "HE" is case-insensitive. SWTOR seems to use "he" for some servers and "HE" for
@@ -63,6 +83,33 @@ SETTINGS_FILE_B_CONTENT_AFTER = (
 )
 
 
+# The stream engine only touches the lines which changed.
+SETTINGS_FILE_A_CONTENT_AFTER_STREAM = (
+    b"[Settings]\n"
+    b"Show_Chat_Timestamp = false\n"
+    b"Test = \xf6\xe4\x80\n"
+    b"GUI_QuickslotLockState = true\n"
+    b"gui_showcooldowntext = true\n"
+)
+
+SETTINGS_FILE_B_CONTENT_AFTER_STREAM = (
+    b"# Comment\r\n"
+    b"\r\n"
+    b"[Settings]\r\n"
+    b"\r\n"
+    b"GUI_ShowCooldownText = true\r\n"
+    b"\r\n"
+    b"Test = \xf6\xe4\x80\r\n"
+    b"GUI_QuickslotLockState = true\r\n"
+    b"\r\n"
+    b"[Another Section]\r\n"
+    b"\r\n"
+    b"General = Kenobi\r\n"
+    b"\r\n"
+    b"\r\n"
+)
+
+
 OTHER_FILE_CONTENT = (
     b"[Hello There]\n"
     b"General = Kenobi"
@@ -81,6 +128,17 @@ def update_settings(_character: CharacterMetadata, s: MutableMapping[str, str])
     s["tEST"] = "öä€"
 
 
+# The same changes as update_settings.
+def settings_profile() -> SettingsProfile:
+    return SettingsProfile(
+        {
+            "GUI_QuickslotLockState": "true",
+            "gui_showcooldowntext": "true",
+            "tEST": "öä€",
+        }
+    )
+
+
 @pytest.fixture()
 def settings_dir(tmp_path: Path) -> Generator[Path, None, None]:
     expected_paths = set()
@@ -204,3 +262,793 @@ def test_character_update_all_updates_settings(
 
     assert settings_filepath_a.read_bytes() == SETTINGS_FILE_A_CONTENT_AFTER
     assert settings_filepath_b.read_bytes() == SETTINGS_FILE_B_CONTENT_AFTER
+
+
+def assert_settings_updated(settings_dir: Path) -> None:
+    settings_filepath_a = settings_dir / SETTINGS_PATH_A
+    settings_filepath_b = settings_dir / SETTINGS_PATH_B
+
+    assert settings_filepath_a.read_bytes() == SETTINGS_FILE_A_CONTENT_AFTER
+    assert settings_filepath_b.read_bytes() == SETTINGS_FILE_B_CONTENT_AFTER
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_character_update_all_updates_settings_in_parallel(
+    jobs: int, settings_dir: Path
+) -> None:
+    update_all(settings_dir, update_settings, jobs=jobs)
+
+    assert_settings_updated(settings_dir)
+
+
+@pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_character_update_all_updates_settings_with_executor(
+    executor_class: Callable[..., Executor], settings_dir: Path
+) -> None:
+    with executor_class(max_workers=2) as executor:
+        update_all(settings_dir, update_settings, executor=executor)
+
+    assert_settings_updated(settings_dir)
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    """Keep the results the workers return to update_all."""
+
+    results: List[Any]
+
+    def __init__(self) -> None:
+        super().__init__(max_workers=2)
+        self.results = []
+
+    def map(self, fn: Callable[..., Any], *iterables: Any, **kwargs: Any) -> Any:
+        for result in super().map(fn, *iterables, **kwargs):
+            self.results.append(result)
+            yield result
+
+
+@pytest.mark.parametrize("callback_version", [None, "1"])
+def test_character_update_all_does_not_keep_contents(
+    callback_version: Optional[str],
+    settings_dir: Path,
+    tmp_path_factory: pytest.TempPathFactory,
+) -> None:
+    manifest_path = tmp_path_factory.mktemp("manifest") / "manifest.json"
+    with RecordingExecutor() as executor:
+        update_all(
+            settings_dir,
+            update_settings,
+            executor=executor,
+            callback_version=callback_version,
+            manifest_path=manifest_path,
+        )
+
+    assert_settings_updated(settings_dir)
+    assert len(executor.results) == 2
+    # Only the transactional mode needs the new contents after the workers.
+    assert all(result.content is None for result in executor.results)
+
+
+def test_character_update_all_processes_files_in_sorted_order(
+    settings_dir: Path,
+) -> None:
+    names = []
+
+    def record_name(character: CharacterMetadata, _s: MutableMapping[str, str]) -> None:
+        names.append(character.name)
+
+    update_all(settings_dir, record_name)
+
+    # publictest sorts before swtor.
+    assert names == ["Plagueis", "Kai Zykken"]
+
+
+def test_character_update_all_updates_settings_with_stream_engine(
+    settings_dir: Path,
+) -> None:
+    settings_filepath_a = settings_dir / SETTINGS_PATH_A
+    settings_filepath_b = settings_dir / SETTINGS_PATH_B
+
+    update_all(settings_dir, update_settings, engine="stream")
+
+    assert settings_filepath_a.read_bytes() == SETTINGS_FILE_A_CONTENT_AFTER_STREAM
+    assert settings_filepath_b.read_bytes() == SETTINGS_FILE_B_CONTENT_AFTER_STREAM
+
+
+def test_character_update_path_stream_engine_rejects_invalid_characters(
+    settings_dir: Path,
+) -> None:
+    settings_filepath = settings_dir / SETTINGS_PATH_A
+
+    def update_settings_invalid(
+        _character: CharacterMetadata, s: MutableMapping[str, str]
+    ) -> None:
+        s["Invalid"] = "√☃🤦"
+
+    with pytest.raises(UnicodeEncodeError):
+        update_path(settings_filepath, update_settings_invalid, engine="stream")
+
+    assert settings_filepath.read_bytes() == SETTINGS_FILE_A_CONTENT_BEFORE
+
+
+def test_character_update_path_skips_unchanged_file(settings_dir: Path) -> None:
+    settings_filepath = settings_dir / SETTINGS_PATH_A
+
+    assert update_path(settings_filepath, update_settings)
+    assert settings_filepath.read_bytes() == SETTINGS_FILE_A_CONTENT_AFTER
+
+    os.utime(settings_filepath, ns=(0, 0))
+
+    assert not update_path(settings_filepath, update_settings)
+    assert settings_filepath.read_bytes() == SETTINGS_FILE_A_CONTENT_AFTER
+    assert settings_filepath.stat().st_mtime_ns == 0, "The file was rewritten"
+
+
+def test_character_update_path_does_not_reformat_unmodified_file(
+    settings_dir: Path,
+) -> None:
+    settings_filepath = settings_dir / SETTINGS_PATH_A
+
+    def update_nothing(
+        _character: CharacterMetadata, s: MutableMapping[str, str]
+    ) -> None:
+        s["Show_Chat_Timestamp"] = "false"
+
+    assert not update_path(settings_filepath, update_nothing)
+    assert settings_filepath.read_bytes() == SETTINGS_FILE_A_CONTENT_BEFORE
+
+
+def test_character_update_all_returns_rewritten_paths(settings_dir: Path) -> None:
+    settings_filepath_a = settings_dir / SETTINGS_PATH_A
+    settings_filepath_b = settings_dir / SETTINGS_PATH_B
+
+    update_path(settings_filepath_a, update_settings)
+
+    assert update_all(settings_dir, update_settings) == [settings_filepath_b]
+    assert update_all(settings_dir, update_settings) == []
+
+
+def test_character_update_all_skips_files_current_in_manifest(
+    settings_dir: Path, tmp_path_factory: pytest.TempPathFactory
+) -> None:
+    settings_filepath_a = settings_dir / SETTINGS_PATH_A
+    settings_filepath_b = settings_dir / SETTINGS_PATH_B
+    manifest_path = tmp_path_factory.mktemp("manifest") / "manifest.json"
+
+    names = []
+
+    def record_name(character: CharacterMetadata, s: MutableMapping[str, str]) -> None:
+        names.append(character.name)
+        update_settings(character, s)
+
+    def update(callback_version: str) -> List[Path]:
+        names.clear()
+        return update_all(
+            settings_dir,
+            record_name,
+            callback_version=callback_version,
+            manifest_path=manifest_path,
+        )
+
+    assert update("1") == [settings_filepath_b, settings_filepath_a]
+    assert names == ["Plagueis", "Kai Zykken"]
+
+    # Neither the files nor the callback changed.
+    assert update("1") == []
+    assert names == []
+
+    settings_filepath_a.write_bytes(SETTINGS_FILE_A_CONTENT_BEFORE)
+    assert update("1") == [settings_filepath_a]
+    assert names == ["Kai Zykken"]
+
+    # The callback changed.
+    assert update("2") == []
+    assert names == ["Plagueis", "Kai Zykken"]
+
+
+def test_character_update_all_rejects_invalid_jobs(settings_dir: Path) -> None:
+    with pytest.raises(ValueError):
+        update_all(settings_dir, update_settings, jobs=0)
+
+    with ThreadPoolExecutor() as executor:
+        with pytest.raises(ValueError):
+            update_all(settings_dir, update_settings, jobs=2, executor=executor)
+
+
+INVALID_ENGINE: Engine = "invalid"  # type: ignore[assignment]
+
+
+@pytest.mark.parametrize(
+    "function",
+    [
+        lambda d: update_all(d, update_settings, engine=INVALID_ENGINE),
+        lambda d: next(iter_update_all(d, update_settings, engine=INVALID_ENGINE)),
+        lambda d: update_path(
+            d / SETTINGS_PATH_A, update_settings, engine=INVALID_ENGINE
+        ),
+        lambda d: next(diff_all(d, update_settings, engine=INVALID_ENGINE)),
+        lambda d: diff_path(
+            d / SETTINGS_PATH_A, update_settings, engine=INVALID_ENGINE
+        ),
+        lambda d: update_all(d),
+        lambda d: next(iter_update_all(d)),
+        lambda d: update_path(d / SETTINGS_PATH_A),
+        lambda d: next(diff_all(d)),
+        lambda d: diff_path(d / SETTINGS_PATH_A),
+    ],
+)
+def test_character_functions_check_arguments(
+    function: Callable[[Path], object], settings_dir: Path
+) -> None:
+    with pytest.raises(ValueError):
+        function(settings_dir)
+    assert settings_dir.joinpath(SETTINGS_PATH_A).read_bytes() == (
+        SETTINGS_FILE_A_CONTENT_BEFORE
+    )
+
+
+@pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_character_update_all_records_stats(
+    executor_class: Callable[..., Executor], settings_dir: Path
+) -> None:
+    settings_filepath_a = settings_dir / SETTINGS_PATH_A
+    settings_filepath_b = settings_dir / SETTINGS_PATH_B
+
+    update_path(settings_filepath_a, update_settings)
+
+    stats = RunStats()
+    with executor_class(max_workers=2) as executor:
+        update_all(settings_dir, update_settings, executor=executor, stats=stats)
+
+    assert [f.path for f in stats.files] == [settings_filepath_b, settings_filepath_a]
+    file_b, file_a = stats.files
+
+    assert file_b.rewritten
+    assert list(file_b.durations) == ["read", "parse", "callback", "serialize", "write"]
+    assert file_b.bytes_read == len(SETTINGS_FILE_B_CONTENT_BEFORE)
+    assert file_b.bytes_written == len(SETTINGS_FILE_B_CONTENT_AFTER)
+
+    assert not file_a.rewritten
+    assert list(file_a.durations) == ["read", "parse", "callback"]
+    assert file_a.bytes_read == len(SETTINGS_FILE_A_CONTENT_AFTER)
+    assert file_a.bytes_written == 0
+
+    summary = stats.summary()
+    assert summary["files"] == 2
+    assert summary["rewritten"] == 1
+    assert summary["bytes_written"] == len(SETTINGS_FILE_B_CONTENT_AFTER)
+    assert summary["wall"] >= summary["phases"]["discover"]["total"] > 0
+
+
+def test_character_update_path_records_stats(settings_dir: Path) -> None:
+    stats = RunStats()
+    assert update_path(settings_dir / SETTINGS_PATH_A, update_settings, stats=stats)
+    assert not update_path(settings_dir / SETTINGS_PATH_A, update_settings, stats=stats)
+    assert [f.rewritten for f in stats.files] == [True, False]
+    assert stats.wall >= sum(f.total() for f in stats.files)
+
+
+@pytest.mark.parametrize("path_fun", [str, Path])
+def test_character_iter_characters_finds_settings_files(
+    path_fun: PathFunction, settings_dir: Path
+) -> None:
+    assert list(iter_characters(path_fun(settings_dir))) == [
+        (
+            settings_dir / SETTINGS_PATH_B,
+            CharacterMetadata("publictest", "he4343", "Plagueis"),
+        ),
+        (
+            settings_dir / SETTINGS_PATH_A,
+            CharacterMetadata("swtor", "he4242", "Kai Zykken"),
+        ),
+    ]
+
+    # The same files as the glob update_all used before.
+    glob = sorted(settings_dir.glob("*/settings/[hH][eE]*_*_PlayerGUIState.ini"))
+    assert [path for path, _ in iter_characters(settings_dir)] == glob
+
+
+def test_character_iter_characters_skips_other_files(tmp_path: Path) -> None:
+    (tmp_path / "swtor/settings").mkdir(parents=True)
+    (tmp_path / "no_settings").mkdir()
+    (tmp_path / "settings_file").write_bytes(b"")
+    (tmp_path / "swtor/settings/client_settings.ini").write_bytes(b"")
+    (tmp_path / "swtor/settings/he4000_PlayerGUIState.ini").write_bytes(b"")
+    (tmp_path / "swtor/he4000_Plagueis_PlayerGUIState.ini").write_bytes(b"")
+
+    assert list(iter_characters(tmp_path)) == []
+
+
+def test_character_iter_characters_rejects_unrecognized_filename(
+    tmp_path: Path,
+) -> None:
+    (tmp_path / "swtor/settings").mkdir(parents=True)
+    (tmp_path / "swtor/settings/he4000_Kai_Zykken_PlayerGUIState.ini").write_bytes(
+        b""
+    )
+
+    with pytest.raises(ValueError):
+        list(iter_characters(tmp_path))
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"environments": ["swtor"]},
+        {"server_ids": ["HE4242"]},
+        {"names": ["kai zykken", "Someone Else"]},
+        {"predicate": lambda c: c.name.startswith("K")},
+        {"environments": ["swtor", "publictest"], "server_ids": ["he4242"]},
+    ],
+)
+def test_character_update_all_updates_only_included_characters(
+    filters: Dict[str, Any], settings_dir: Path
+) -> None:
+    settings_filepath_a = settings_dir / SETTINGS_PATH_A
+    settings_filepath_b = settings_dir / SETTINGS_PATH_B
+
+    names = []
+
+    def record_name(character: CharacterMetadata, s: MutableMapping[str, str]) -> None:
+        names.append(character.name)
+        update_settings(character, s)
+
+    stats = RunStats()
+    rewritten = update_all(settings_dir, record_name, stats=stats, **filters)
+
+    assert rewritten == [settings_filepath_a]
+    assert names == ["Kai Zykken"]
+    assert [f.path for f in stats.files] == [settings_filepath_a]
+    assert stats.excluded == 1
+    assert settings_filepath_b.read_bytes() == SETTINGS_FILE_B_CONTENT_BEFORE
+
+
+def test_character_update_all_keeps_excluded_files_in_manifest(
+    settings_dir: Path, tmp_path_factory: pytest.TempPathFactory
+) -> None:
+    settings_filepath_a = settings_dir / SETTINGS_PATH_A
+    settings_filepath_b = settings_dir / SETTINGS_PATH_B
+    manifest_path = tmp_path_factory.mktemp("manifest") / "manifest.json"
+
+    def update(**filters: Any) -> List[Path]:
+        return update_all(
+            settings_dir,
+            update_settings,
+            callback_version="1",
+            manifest_path=manifest_path,
+            **filters,
+        )
+
+    assert update() == [settings_filepath_b, settings_filepath_a]
+    settings_filepath_a.write_bytes(SETTINGS_FILE_A_CONTENT_BEFORE)
+    assert update(environments=["swtor"]) == [settings_filepath_a]
+    assert update() == []
+
+
+def test_character_update_all_rejects_string_filters(settings_dir: Path) -> None:
+    with pytest.raises(TypeError):
+        update_all(settings_dir, update_settings, environments="swtor")
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_character_update_all_updates_settings_transactionally(
+    jobs: int, settings_dir: Path
+) -> None:
+    stats = RunStats()
+    update_all(
+        settings_dir, update_settings, jobs=jobs, transactional=True, stats=stats
+    )
+
+    assert_settings_updated(settings_dir)
+    assert [list(f.durations) for f in stats.files] == [
+        ["read", "parse", "callback", "serialize", "write"]
+    ] * 2
+    assert stats.commit > 0
+    assert stats.summary()["bytes_written"] == len(
+        SETTINGS_FILE_A_CONTENT_AFTER + SETTINGS_FILE_B_CONTENT_AFTER
+    )
+
+
+@pytest.mark.parametrize("transactional", [False, True])
+def test_character_update_all_transactional_failure_modifies_nothing(
+    transactional: bool, settings_dir: Path
+) -> None:
+    settings_filepath_b = settings_dir / SETTINGS_PATH_B
+
+    # Plagueis is updated first.
+    def fail_on_kai(character: CharacterMetadata, s: MutableMapping[str, str]) -> None:
+        if character.name == "Kai Zykken":
+            raise RuntimeError("fail")
+        update_settings(character, s)
+
+    with pytest.raises(RuntimeError):
+        update_all(settings_dir, fail_on_kai, transactional=transactional)
+
+    assert (
+        settings_filepath_b.read_bytes() == SETTINGS_FILE_B_CONTENT_BEFORE
+    ) == transactional
+
+
+@pytest.mark.parametrize("executor_class", [None, ProcessPoolExecutor])
+def test_character_update_all_applies_profile(
+    executor_class: Optional[Callable[..., Executor]], settings_dir: Path
+) -> None:
+    if executor_class is None:
+        update_all(settings_dir, profile=settings_profile())
+    else:
+        with executor_class(max_workers=2) as executor:
+            update_all(settings_dir, profile=settings_profile(), executor=executor)
+
+    assert_settings_updated(settings_dir)
+    assert update_all(settings_dir, profile=settings_profile()) == []
+
+
+def test_character_update_all_applies_profile_with_stream_engine(
+    settings_dir: Path,
+) -> None:
+    settings_filepath_a = settings_dir / SETTINGS_PATH_A
+    settings_filepath_b = settings_dir / SETTINGS_PATH_B
+
+    update_all(settings_dir, profile=settings_profile(), engine="stream")
+
+    assert settings_filepath_a.read_bytes() == SETTINGS_FILE_A_CONTENT_AFTER_STREAM
+    assert settings_filepath_b.read_bytes() == SETTINGS_FILE_B_CONTENT_AFTER_STREAM
+
+
+@pytest.mark.parametrize("engine", get_args(Engine))
+def test_character_update_path_applies_profile_before_callback(
+    engine: Engine, settings_dir: Path
+) -> None:
+    settings_filepath_b = settings_dir / SETTINGS_PATH_B
+
+    profile = SettingsProfile(
+        {"GUI_ShowCooldownText": "true", "Extra": "1"}, delete=["test", "Missing"]
+    )
+    profile.override({"Extra": "2"}, names=["Plagueis"])
+    seen: Dict[str, str] = {}
+
+    def callback(_character: CharacterMetadata, s: MutableMapping[str, str]) -> None:
+        seen.update(s)
+        s["Extra"] = s["Extra"] + "0"
+
+    assert update_path(settings_filepath_b, callback, engine=engine, profile=profile)
+    assert seen == {"GUI_ShowCooldownText": "true", "Extra": "2"}
+
+    content = settings_filepath_b.read_bytes()
+    assert b"GUI_ShowCooldownText = true\r\n" in content
+    assert b"Extra = 20\r\n" in content
+    assert b"Test" not in content
+
+
+def test_character_update_all_manifest_tracks_profile(
+    settings_dir: Path, tmp_path_factory: pytest.TempPathFactory
+) -> None:
+    manifest_path = tmp_path_factory.mktemp("manifest") / "manifest.json"
+
+    def update(profile: SettingsProfile) -> List[Path]:
+        return update_all(
+            settings_dir,
+            profile=profile,
+            callback_version="1",
+            manifest_path=manifest_path,
+        )
+
+    assert len(update(SettingsProfile({"GUI_Test": "1"}))) == 2
+    assert update(SettingsProfile({"GUI_Test": "1"})) == []
+    assert len(update(SettingsProfile({"GUI_Test": "2"}))) == 2
+
+
+def test_character_update_all_requires_callback_or_profile(
+    settings_dir: Path,
+) -> None:
+    with pytest.raises(ValueError):
+        update_all(settings_dir)
+
+
+def test_character_update_all_manifest_notices_files_rewritten_during_run(
+    settings_dir: Path, tmp_path_factory: pytest.TempPathFactory
+) -> None:
+    settings_filepath_a = settings_dir / SETTINGS_PATH_A
+    settings_filepath_b = settings_dir / SETTINGS_PATH_B
+    manifest_path = tmp_path_factory.mktemp("manifest") / "manifest.json"
+
+    def rewrite_b(character: CharacterMetadata, s: MutableMapping[str, str]) -> None:
+        # The game rewrites B after it was updated, while A is being updated.
+        if character.name == "Kai Zykken":
+            settings_filepath_b.write_bytes(SETTINGS_FILE_B_CONTENT_BEFORE)
+        update_settings(character, s)
+
+    def update(callback: UpdateCallback) -> List[Path]:
+        return update_all(
+            settings_dir, callback, callback_version="1", manifest_path=manifest_path
+        )
+
+    assert update(rewrite_b) == [settings_filepath_b, settings_filepath_a]
+    assert update(update_settings) == [settings_filepath_b]
+    assert settings_filepath_b.read_bytes() == SETTINGS_FILE_B_CONTENT_AFTER
+
+
+def test_character_update_all_keeps_default_manifest_beside_settings_dir(
+    settings_dir: Path,
+) -> None:
+    manifest_path = default_manifest_path(settings_dir)
+    assert manifest_path.parent == settings_dir.parent
+
+    try:
+        # The settings_dir fixture checks that nothing was added inside it.
+        update_all(settings_dir, update_settings, callback_version="1")
+        assert manifest_path.exists()
+    finally:
+        manifest_path.unlink(missing_ok=True)
+
+
+@pytest.mark.parametrize("transactional", [False, True])
+def test_character_update_all_dry_run_writes_nothing(
+    transactional: bool, settings_dir: Path, tmp_path_factory: pytest.TempPathFactory
+) -> None:
+    settings_filepath_a = settings_dir / SETTINGS_PATH_A
+    settings_filepath_b = settings_dir / SETTINGS_PATH_B
+    manifest_path = tmp_path_factory.mktemp("manifest") / "manifest.json"
+
+    stats = RunStats()
+    rewritten = update_all(
+        settings_dir,
+        update_settings,
+        callback_version="1",
+        manifest_path=manifest_path,
+        transactional=transactional,
+        dry_run=True,
+        stats=stats,
+    )
+
+    assert rewritten == [settings_filepath_b, settings_filepath_a]
+    assert stats.summary()["rewritten"] == 2
+    assert stats.summary()["bytes_written"] == 0
+    assert settings_filepath_a.read_bytes() == SETTINGS_FILE_A_CONTENT_BEFORE
+    assert settings_filepath_b.read_bytes() == SETTINGS_FILE_B_CONTENT_BEFORE
+    assert not manifest_path.exists()
+
+    assert update_path(settings_filepath_a, update_settings, dry_run=True)
+    assert settings_filepath_a.read_bytes() == SETTINGS_FILE_A_CONTENT_BEFORE
+
+
+@pytest.mark.parametrize("engine", get_args(Engine))
+def test_character_diff_all_yields_changes_lazily(
+    engine: Engine, settings_dir: Path
+) -> None:
+    settings_filepath_a = settings_dir / SETTINGS_PATH_A
+    settings_filepath_b = settings_dir / SETTINGS_PATH_B
+    names = []
+
+    def record_name(character: CharacterMetadata, s: MutableMapping[str, str]) -> None:
+        names.append(character.name)
+        update_settings(character, s)
+        s.pop("Show_Chat_Timestamp", None)
+
+    diffs = diff_all(settings_dir, record_name, engine=engine)
+    assert names == []
+
+    diff = next(diffs)
+    assert names == ["Plagueis"]
+    assert diff.path == settings_filepath_b
+    assert diff.character.name == "Plagueis"
+    assert diff.changed == {
+        "GUI_ShowCooldownText": ("false", "true"),
+        "Test": ("€äö", "öä€"),
+    }
+    assert diff.added == {"GUI_QuickslotLockState": "true"}
+    assert diff.removed == {}
+
+    diff = next(diffs)
+    assert diff.path == settings_filepath_a
+    assert diff.changed == {"Test": ("€äö", "öä€")}
+    assert diff.added == {
+        "GUI_QuickslotLockState": "true",
+        "gui_showcooldowntext": "true",
+    }
+    assert diff.removed == {"Show_Chat_Timestamp": "false"}
+    assert diff.format().splitlines() == [
+        str(settings_filepath_a),
+        "  ~ Test = '€äö' -> 'öä€'",
+        "  + GUI_QuickslotLockState = 'true'",
+        "  + gui_showcooldowntext = 'true'",
+        "  - Show_Chat_Timestamp = 'false'",
+    ]
+
+    assert list(diffs) == []
+    assert settings_filepath_a.read_bytes() == SETTINGS_FILE_A_CONTENT_BEFORE
+    assert settings_filepath_b.read_bytes() == SETTINGS_FILE_B_CONTENT_BEFORE
+
+
+def test_character_diff_all_skips_unchanged_and_excluded_files(
+    settings_dir: Path,
+) -> None:
+    update_all(settings_dir, update_settings)
+
+    assert list(diff_all(settings_dir, update_settings)) == []
+    assert list(diff_all(settings_dir, update_settings, names=["kai zykken"])) == []
+
+    profile = SettingsProfile({"Extra": "1"})
+    diffs = list(diff_all(settings_dir, profile=profile, environments=["swtor"]))
+    assert [d.path for d in diffs] == [settings_dir / SETTINGS_PATH_A]
+    assert diffs[0].added == {"Extra": "1"}
+
+
+def test_character_diff_path_is_false_without_changes(settings_dir: Path) -> None:
+    settings_filepath_a = settings_dir / SETTINGS_PATH_A
+
+    def change_back(_character: CharacterMetadata, s: MutableMapping[str, str]) -> None:
+        s["Test"] = "changed"
+        s["Test"] = "€äö"
+
+    assert not diff_path(settings_filepath_a, change_back)
+    assert diff_path(settings_filepath_a, update_settings)
+
+
+def test_character_iter_update_all_yields_results_in_order(settings_dir: Path) -> None:
+    settings_filepath_a = settings_dir / SETTINGS_PATH_A
+    settings_filepath_b = settings_dir / SETTINGS_PATH_B
+    stats = RunStats()
+
+    results = list(iter_update_all(settings_dir, update_settings, stats=stats))
+
+    assert [r.path for r in results] == [settings_filepath_b, settings_filepath_a]
+    assert [r.character.name for r in results if r.character] == [
+        "Plagueis",
+        "Kai Zykken",
+    ]
+    assert all(r.ok and r.rewritten and r.seconds > 0 for r in results)
+    assert [r.bytes_written for r in results] == [
+        len(SETTINGS_FILE_B_CONTENT_AFTER),
+        len(SETTINGS_FILE_A_CONTENT_AFTER),
+    ]
+    assert len(stats.files) == 2
+    assert_settings_updated(settings_dir)
+
+    results = list(iter_update_all(settings_dir, update_settings))
+    assert [(r.rewritten, r.bytes_written) for r in results] == [(False, 0)] * 2
+
+
+def test_character_iter_update_all_continues_after_errors(settings_dir: Path) -> None:
+    settings_filepath_a = settings_dir / SETTINGS_PATH_A
+    settings_filepath_b = settings_dir / SETTINGS_PATH_B
+    invalid_path = settings_dir / "swtor/settings/he4000_Bad_Name_PlayerGUIState.ini"
+    invalid_path.write_bytes(SETTINGS_FILE_A_CONTENT_BEFORE)
+
+    def fail_on_plagueis(
+        character: CharacterMetadata, s: MutableMapping[str, str]
+    ) -> None:
+        if character.name == "Plagueis":
+            raise RuntimeError("fail")
+        update_settings(character, s)
+
+    try:
+        results = list(iter_update_all(settings_dir, fail_on_plagueis))
+    finally:
+        invalid_path.unlink()
+
+    # "hE4242" sorts before "he4000".
+    assert [r.path for r in results] == [
+        settings_filepath_b,
+        settings_filepath_a,
+        invalid_path,
+    ]
+    assert isinstance(results[0].error, RuntimeError)
+    assert not results[0].rewritten and results[0].stats is None
+    assert results[1].ok and results[1].rewritten
+    assert isinstance(results[2].error, ValueError)
+    assert results[2].character is None
+
+    assert settings_filepath_a.read_bytes() == SETTINGS_FILE_A_CONTENT_AFTER
+    assert settings_filepath_b.read_bytes() == SETTINGS_FILE_B_CONTENT_BEFORE
+
+
+@pytest.mark.parametrize(
+    "executor_class", [None, ThreadPoolExecutor, ProcessPoolExecutor]
+)
+def test_character_iter_update_all_updates_concurrently(
+    executor_class: Optional[Callable[..., Executor]], settings_dir: Path
+) -> None:
+    if executor_class is None:
+        results = list(iter_update_all(settings_dir, update_settings, jobs=2))
+    else:
+        with executor_class(max_workers=2) as executor:
+            results = list(
+                iter_update_all(settings_dir, update_settings, executor=executor)
+            )
+
+    assert sorted(r.path for r in results) == sorted(
+        [settings_dir / SETTINGS_PATH_A, settings_dir / SETTINGS_PATH_B]
+    )
+    assert all(r.ok and r.rewritten for r in results)
+    assert_settings_updated(settings_dir)
+
+
+def test_character_iter_update_all_limits_files_in_progress(
+    settings_dir: Path,
+) -> None:
+    lock = threading.Lock()
+    active = 0
+    most_active = 0
+
+    def count(character: CharacterMetadata, s: MutableMapping[str, str]) -> None:
+        nonlocal active, most_active
+        with lock:
+            active += 1
+            most_active = max(most_active, active)
+        time.sleep(0.05)
+        update_settings(character, s)
+        with lock:
+            active -= 1
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(
+            iter_update_all(settings_dir, count, executor=executor, window=1)
+        )
+
+    assert len(results) == 2
+    assert most_active == 1
+    assert_settings_updated(settings_dir)
+
+    with pytest.raises(ValueError):
+        next(iter_update_all(settings_dir, update_settings, jobs=2, window=0))
+
+
+def test_character_iter_update_all_stops_early(settings_dir: Path) -> None:
+    settings_filepath_a = settings_dir / SETTINGS_PATH_A
+    stats = RunStats()
+
+    results = iter_update_all(
+        settings_dir, update_settings, stats=stats, names=["plagueis", "kai zykken"]
+    )
+    assert next(results).character == CharacterMetadata(
+        "publictest", "he4343", "Plagueis"
+    )
+    results.close()
+
+    assert settings_filepath_a.read_bytes() == SETTINGS_FILE_A_CONTENT_BEFORE
+    assert len(stats.files) == 1
+
+
+def test_character_iter_update_all_dry_run_writes_nothing(settings_dir: Path) -> None:
+    results = list(
+        iter_update_all(settings_dir, profile=settings_profile(), dry_run=True)
+    )
+
+    assert all(r.ok and r.rewritten for r in results)
+    assert (settings_dir / SETTINGS_PATH_A).read_bytes() == (
+        SETTINGS_FILE_A_CONTENT_BEFORE
+    )
+    assert (settings_dir / SETTINGS_PATH_B).read_bytes() == (
+        SETTINGS_FILE_B_CONTENT_BEFORE
+    )
+
+
+def test_character_update_all_applies_profile_overrides_in_process_pool(
+    settings_dir: Path,
+) -> None:
+    settings_filepath_a = settings_dir / SETTINGS_PATH_A
+    settings_filepath_b = settings_dir / SETTINGS_PATH_B
+
+    profile = SettingsProfile({"Extra": "1"})
+    profile.override({"Extra": "2"}, server_ids=["HE4343"], names=["plagueis"])
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        update_all(settings_dir, profile=profile, executor=executor)
+
+    assert b"Extra = 1\r\n" in settings_filepath_a.read_bytes()
+    assert b"Extra = 2\r\n" in settings_filepath_b.read_bytes()
+
+
+def test_character_iter_update_all_records_discovery_and_wall_time(
+    settings_dir: Path,
+) -> None:
+    import time
+
+    stats = RunStats()
+    for _result in iter_update_all(settings_dir, update_settings, stats=stats):
+        time.sleep(0.2)
+
+    assert len(stats.files) == 2
+    assert stats.discover > 0
+    # The time spent in the loop body is not counted.
+    assert 0 < stats.wall < 0.2
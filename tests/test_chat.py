@@ -3,9 +3,11 @@ from __future__ import annotations
 from collections import namedtuple
 from collections import OrderedDict
 from typing import Any
+from typing import Dict
 from typing import Iterable
 from typing import List
 from typing import Optional
+from typing import Set
 
 import hypothesis.stateful as sta
 import hypothesis.strategies as st
@@ -15,12 +17,15 @@ from hypothesis import assume
 from hypothesis import given
 
 from .test_color import valid_rgb
+from swtor_settings_updater.chat import CacheStats
 from swtor_settings_updater.chat import Channel
 from swtor_settings_updater.chat import Chat
 from swtor_settings_updater.chat import CUSTOM_CHANNEL_IXS
+from swtor_settings_updater.chat import CUSTOM_CHANNEL_PASSWORD_CHARACTER_CLASS
 from swtor_settings_updater.chat import CustomChannel
 from swtor_settings_updater.chat import MAXIMUM_CHANNEL_IX
 from swtor_settings_updater.chat import Panel
+from swtor_settings_updater.chat import PANEL_NAME_CHARACTER_CLASS
 from swtor_settings_updater.chat import UNUSED_CHANNEL_IXS
 from swtor_settings_updater.color import Color
 from swtor_settings_updater.util.character_class import CP1252_PRINTABLE
@@ -292,6 +297,17 @@ class ChatRules(sta.RuleBasedStateMachine):
 
         assert colors_s == self.colors
 
+    # Chat.from_settings
+
+    @sta.invariant()
+    def settings_round_trip(self) -> None:
+        settings: Dict[str, str] = {}
+        self.chat.apply(settings)
+
+        parsed = Chat.from_settings(settings)
+        assert parsed == self.chat
+        assert parsed.settings() == self.chat.settings()
+
 
 TestChat = ChatRules.TestCase
 
@@ -406,6 +422,13 @@ invalid_channel_ix = st.one_of(
 )
 
 
+def test_character_classes_are_up_to_date() -> None:
+    assert PANEL_NAME_CHARACTER_CLASS == regex_character_class(CP1252_PRINTABLE, ".;")
+    assert CUSTOM_CHANNEL_PASSWORD_CHARACTER_CLASS == regex_character_class(
+        CP1252_PRINTABLE, ' ;"&<>'
+    )
+
+
 @given(valid_channel_ix)
 def test_channel_accepts_valid_ix(ix: int) -> None:
     assert Channel("", ix).ix == ix
@@ -436,6 +459,17 @@ def test_panel_rejects_invalid_name(name: str) -> None:
         Panel(name)
 
 
+@given(st.sets(valid_channel_ix))
+def test_panel_stores_channels_as_bitmask(ixs: Set[int]) -> None:
+    panel = Panel("General", ixs)
+    assert panel.channel_ixs == ixs
+    assert panel.channel_bitmask() == sum(1 << ix for ix in ixs)
+
+    panel = Panel("General")
+    panel.display(*(Channel("", ix) for ix in ixs))
+    assert panel.channel_ixs == ixs
+
+
 @given(
     valid_custom_channel_name,
     valid_channel_ix,
@@ -511,3 +545,195 @@ def test_custom_channel_rejects_invalid_password(
 def test_custom_channel_rejects_invalid_id(name: str, ix: int, id: str) -> None:
     with pytest.raises(ValueError):
         CustomChannel(name, ix, id=id)
+
+
+def example_chat() -> Chat:
+    chat = Chat()
+    chn = chat.standard_channels
+    chn.group.color = chn.ops.color
+    chat.panel("General")
+    other = chat.panel("Other")
+    other.display(chn.emote, chn.yell, chn.guild, chn.say, chn.whisper, chn.group)
+    myguild = chat.custom_channel("Myguild")
+    myguild.color = chn.guild.color
+    other.display(myguild)
+    return chat
+
+
+def chat_settings(chat: Chat) -> Dict[str, str]:
+    settings: Dict[str, str] = {}
+    chat.apply(settings)
+    return settings
+
+
+def test_template_is_a_snapshot() -> None:
+    chat = example_chat()
+    expected = chat_settings(chat)
+
+    template = chat.freeze()
+    chat.custom_channel("Gsf")
+    chat.standard_channels.say.color.r = 0
+    chat.panels["other"].channel_ixs.clear()
+
+    settings: Dict[str, str] = {}
+    template.apply(settings)
+    assert settings == expected
+    assert chat_settings(template.derive()) == expected
+
+
+def test_unmodified_variant_shares_the_template() -> None:
+    template = example_chat().freeze()
+    variant = template.derive()
+
+    assert chat_settings(variant) == chat_settings(example_chat())
+    assert variant.panels_setting() is template.settings.chat_channels
+    assert variant.custom_channels_setting() is template.settings.chat_custom_channels
+    assert variant.colors_setting() is template.settings.chat_colors
+    assert "panels" not in vars(variant)
+    assert variant.freeze() is template
+
+
+def test_modified_variant_is_copied() -> None:
+    template = example_chat().freeze()
+    variant = template.derive()
+
+    chn = variant.standard_channels
+    gsf = variant.custom_channel("Gsf")
+    gsf.color = chn.ops.color
+    variant.panels["other"].display(gsf)
+    chn.ops.color.b = 0
+
+    expected_chat = example_chat()
+    expected_chn = expected_chat.standard_channels
+    expected_gsf = expected_chat.custom_channel("Gsf")
+    expected_gsf.color = expected_chn.ops.color
+    expected_chat.panels["other"].display(expected_gsf)
+    expected_chn.ops.color.b = 0
+
+    # The color shared between the ops and group channels remains shared.
+    assert chn.group.color is chn.ops.color
+    assert chat_settings(variant) == chat_settings(expected_chat)
+
+    # Neither the template nor other variants are affected.
+    assert chat_settings(template.derive()) == chat_settings(example_chat())
+    assert chat_settings(template.derive().freeze().derive()) == chat_settings(
+        example_chat()
+    )
+
+
+def test_variant_rejects_unknown_attributes() -> None:
+    variant = example_chat().freeze().derive()
+    with pytest.raises(AttributeError):
+        variant.nonexistent  # type: ignore[attr-defined]
+    assert "panels" not in vars(variant)
+
+
+def test_settings_are_cached_until_changed() -> None:
+    chat = example_chat()
+    chn = chat.standard_channels
+    settings = chat.settings()
+    assert chat.cache_stats == CacheStats(hits=0, misses=1)
+
+    assert chat.settings() is settings
+    assert chat.colors_setting() is settings.chat_colors
+    assert chat.cache_stats == CacheStats(hits=2, misses=1)
+
+    def changes() -> Iterable[None]:
+        chn.say.color.r ^= 1
+        yield
+        chn.say.color = Color(1, 2, 3)
+        yield
+        chat.panels["other"].display(chn.trade)
+        yield
+        chat.panel("Third")
+        yield
+        gsf = chat.custom_channel("Gsf")
+        yield
+        gsf.password = "hunter2"
+        yield
+        del chat.custom_channels["gsf"]
+        yield
+
+    for _ in changes():
+        expected = Chat()
+        expected._copy_state(chat)
+        old_misses = chat.cache_stats.misses
+        assert chat.settings() == expected.settings()
+        assert chat.cache_stats.misses == old_misses + 1
+
+
+def test_variant_counts_cache_hits() -> None:
+    variant = example_chat().freeze().derive()
+    variant.apply({})
+    assert variant.cache_stats == CacheStats(hits=1, misses=0)
+    variant.custom_channel("Gsf")
+    variant.apply({})
+    assert variant.cache_stats == CacheStats(hits=1, misses=1)
+
+
+def test_from_settings_parses_example() -> None:
+    chat = example_chat()
+    parsed = Chat.from_settings(chat_settings(chat))
+
+    assert list(parsed.panels) == ["general", "other"]
+    assert parsed.panels["other"].channel_ixs == chat.panels["other"].channel_ixs
+    assert parsed.panels["general"].channel_ixs == chat.undisplayed_channel_ixs()
+    assert list(parsed.custom_channels) == ["myguild"]
+    assert parsed.custom_channels["myguild"].ix == chat.custom_channels["myguild"].ix
+    assert parsed.custom_channels["myguild"].color == chat.standard_channels.guild.color
+    assert parsed.standard_channels == chat.standard_channels
+
+    assert parsed == chat
+    assert parsed == chat.freeze().derive()
+    parsed.standard_channels.say.color.r ^= 1
+    assert parsed != chat
+
+
+def test_chat_equality_is_effective() -> None:
+    # Undisplayed channels are displayed on the first panel.
+    chat = Chat()
+    chat.panel("General")
+    explicit = Chat()
+    explicit.panel("General").channel_ixs = chat.undisplayed_channel_ixs()
+    assert chat == explicit
+    assert Chat() == explicit
+
+    other = Chat()
+    other.panel("Other")
+    assert chat != other
+
+    with pytest.raises(TypeError):
+        hash(chat)
+
+
+@pytest.mark.parametrize(
+    "key,value",
+    [
+        ("ChatChannels", "1.General;"),
+        ("ChatChannels", "2.General.0;"),
+        ("ChatChannels", "1.General.-1;"),
+        ("ChatChannels", "1.General.0;2.general.0;"),
+        ("Chat_Custom_Channels", "Gsf;;1"),
+        ("Chat_Custom_Channels", "Gsf;;2;usr.gsf"),
+        ("Chat_Custom_Channels", "Gsf;;1;usr.gsf;Gsf;;2;usr.gsf"),
+        ("ChatColors", "ffffff;"),
+        ("ChatColors", "0x1234;" * (MAXIMUM_CHANNEL_IX + 1)),
+        (
+            "Chat_Custom_Channels",
+            "".join(f"Channel{n};;{n};usr.channel{n};" for n in range(1, 9)),
+        ),
+    ],
+)
+def test_from_settings_rejects_invalid_settings(key: str, value: str) -> None:
+    settings = chat_settings(example_chat())
+    settings[key] = value
+    with pytest.raises(ValueError):
+        Chat.from_settings(settings)
+
+
+@pytest.mark.parametrize("key", ["ChatChannels", "Chat_Custom_Channels", "ChatColors"])
+def test_from_settings_rejects_missing_settings(key: str) -> None:
+    settings = chat_settings(example_chat())
+    del settings[key]
+    with pytest.raises(ValueError):
+        Chat.from_settings(settings)
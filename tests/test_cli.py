@@ -0,0 +1,191 @@
+import json
+import logging
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from swtor_settings_updater.cli import load_object
+from swtor_settings_updater.cli import main
+
+
+SETTINGS_PATHS = [
+    Path("publictest/settings/he4343_Plagueis_PlayerGUIState.ini"),
+    Path("swtor/settings/he4000_Kai Zykken_PlayerGUIState.ini"),
+]
+
+CONTENT_BEFORE = b"[Settings]\r\nShow_Chat_TimeStamp = false\r\n"
+CONTENT_AFTER = b"[Settings]\r\nShow_Chat_TimeStamp = true\r\n\r\n"
+
+SETTINGS_MODULE = """
+from swtor_settings_updater.settings_profile import SettingsProfile
+
+
+def update(character, s):
+    if character.name == "Fail":
+        raise RuntimeError("fail")
+    s["Show_Chat_TimeStamp"] = "true"
+
+
+profile = SettingsProfile({"Show_Chat_TimeStamp": "true"})
+"""
+
+
+@pytest.fixture()
+def settings_dir(tmp_path: Path) -> Path:
+    settings_dir = tmp_path / "SWTOR"
+    for relative_path in SETTINGS_PATHS:
+        path = settings_dir / relative_path
+        path.parent.mkdir(parents=True)
+        path.write_bytes(CONTENT_BEFORE)
+    return settings_dir
+
+
+@pytest.fixture()
+def module_path(tmp_path: Path) -> Path:
+    path = tmp_path / "my_settings.py"
+    path.write_text(SETTINGS_MODULE, encoding="UTF-8")
+    return path
+
+
+def contents(settings_dir: Path) -> list:
+    return [(settings_dir / p).read_bytes() for p in SETTINGS_PATHS]
+
+
+@pytest.mark.parametrize("option", ["--callback=update", "--profile=profile"])
+def test_cli_updates_settings(
+    option: str, settings_dir: Path, module_path: Path
+) -> None:
+    name, _, attribute = option.partition("=")
+    spec = f"{module_path}:{attribute}"
+    args = [name, spec, "--settings-dir", str(settings_dir), "--jobs", "2"]
+
+    assert main(args) == 0
+    assert contents(settings_dir) == [CONTENT_AFTER] * 2
+
+
+def test_cli_dry_run_writes_nothing(
+    settings_dir: Path,
+    module_path: Path,
+    caplog: pytest.LogCaptureFixture,
+    capsys: pytest.CaptureFixture,
+) -> None:
+    caplog.set_level(logging.INFO)
+    args = ["--callback", f"{module_path}:update", "--settings-dir", str(settings_dir)]
+
+    assert main(args + ["--dry-run", "--stats"]) == 0
+    assert contents(settings_dir) == [CONTENT_BEFORE] * 2
+    assert "Would rewrite 2 file(s)" in caplog.text
+    report = capsys.readouterr().err
+    assert "2 rewritten" in report
+    assert " 0 byte(s) written" in report
+
+
+def test_cli_prints_diff(
+    settings_dir: Path, module_path: Path, capsys: pytest.CaptureFixture
+) -> None:
+    args = ["--profile", f"{module_path}:profile", "--settings-dir", str(settings_dir)]
+
+    assert main(args + ["--diff", "--only-env", "swtor"]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        str(settings_dir / SETTINGS_PATHS[1]),
+        "  ~ Show_Chat_TimeStamp = 'false' -> 'true'",
+    ]
+    assert contents(settings_dir) == [CONTENT_BEFORE] * 2
+
+
+def test_cli_filters_characters(settings_dir: Path, module_path: Path) -> None:
+    args = ["--profile", f"{module_path}:profile", "--settings-dir", str(settings_dir)]
+
+    assert main(args + ["--only-server", "HE4000"]) == 0
+    assert contents(settings_dir) == [CONTENT_BEFORE, CONTENT_AFTER]
+
+    assert main(args + ["--only-env", "publictest", "--only-env", "swtor"]) == 0
+    assert contents(settings_dir) == [CONTENT_AFTER] * 2
+
+
+def test_cli_updates_paths(settings_dir: Path, module_path: Path) -> None:
+    path = settings_dir / SETTINGS_PATHS[0]
+
+    assert main(["--callback", f"{module_path}:update", str(path)]) == 0
+    assert contents(settings_dir) == [CONTENT_AFTER, CONTENT_BEFORE]
+
+
+def test_cli_prints_stats(
+    settings_dir: Path,
+    module_path: Path,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture,
+) -> None:
+    stats_path = tmp_path / "stats.json"
+    args = ["--callback", f"{module_path}:update", "--settings-dir", str(settings_dir)]
+
+    assert main(args + ["--stats", "--stats-json", str(stats_path)]) == 0
+    assert "2 file(s), 2 rewritten" in capsys.readouterr().err
+
+    data = json.loads(stats_path.read_text(encoding="UTF-8"))
+    assert data["summary"]["rewritten"] == 2
+    assert data["summary"]["phases"]["discover"]["total"] > 0
+    assert len(data["files"]) == 2
+
+
+def test_cli_fails_on_update_error(settings_dir: Path, module_path: Path) -> None:
+    path = settings_dir / SETTINGS_PATHS[1]
+    (settings_dir / SETTINGS_PATHS[0]).rename(
+        settings_dir / "publictest/settings/he4343_Fail_PlayerGUIState.ini"
+    )
+    args = ["--callback", f"{module_path}:update", "--settings-dir", str(settings_dir)]
+
+    assert main(args + ["--transactional"]) == 1
+    assert path.read_bytes() == CONTENT_BEFORE
+
+
+def test_cli_continues_after_update_error(
+    settings_dir: Path, module_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    path = settings_dir / SETTINGS_PATHS[1]
+    (settings_dir / SETTINGS_PATHS[0]).rename(
+        settings_dir / "publictest/settings/he4343_Fail_PlayerGUIState.ini"
+    )
+    args = ["--callback", f"{module_path}:update", "--settings-dir", str(settings_dir)]
+
+    assert main(args) == 1
+    assert path.read_bytes() == CONTENT_AFTER
+    assert "Failed to update 1 file(s)" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "spec", ["missing.py:update", "{module}:missing", "{module}:profile", "{module}"]
+)
+def test_cli_fails_on_invalid_callback(
+    spec: str, settings_dir: Path, module_path: Path
+) -> None:
+    spec = spec.format(module=module_path)
+    assert main(["--callback", spec, "--settings-dir", str(settings_dir)]) == 1
+
+
+def test_cli_requires_callback_or_profile(settings_dir: Path) -> None:
+    with pytest.raises(SystemExit) as e:
+        main(["--settings-dir", str(settings_dir)])
+    assert e.value.code == 2
+
+
+@pytest.mark.parametrize("jobs", ["0", "-1", "many"])
+def test_cli_rejects_invalid_jobs(
+    jobs: str, settings_dir: Path, module_path: Path
+) -> None:
+    args = ["--callback", f"{module_path}:update", "--settings-dir", str(settings_dir)]
+    with pytest.raises(SystemExit) as e:
+        main(args + ["--jobs", jobs])
+    assert e.value.code == 2
+
+
+def test_cli_load_object_imports_modules() -> None:
+    assert load_object("json:dumps") is json.dumps
+
+
+def test_cli_runs_as_module(settings_dir: Path, module_path: Path) -> None:
+    args = ["--callback", f"{module_path}:update", "--settings-dir", str(settings_dir)]
+    subprocess.run([sys.executable, "-m", "swtor_settings_updater", *args], check=True)
+    assert contents(settings_dir) == [CONTENT_AFTER] * 2
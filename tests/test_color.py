@@ -46,3 +46,16 @@ def test_color_hex(rgb: Tuple[int, int, int]) -> None:
     r, g, b = rgb
     hex_str = Color(r, g, b).hex()
     assert int(hex_str, 16) == (r << 16) | (g << 8) | b
+
+
+@given(valid_rgb())
+def test_color_from_hex(rgb: Tuple[int, int, int]) -> None:
+    color = Color(*rgb)
+    assert Color.from_hex(color.hex()) == color
+    assert Color.from_hex(color.hex().upper()) == color
+
+
+@pytest.mark.parametrize("rrggbb", ["", "fffff", "fffffff", "0xffff", "+fffff", "ggg"])
+def test_color_from_hex_invalid(rrggbb: str) -> None:
+    with pytest.raises(ValueError):
+        Color.from_hex(rrggbb)
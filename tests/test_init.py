@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+import pytest
+
+import swtor_settings_updater
+from swtor_settings_updater import util
+from swtor_settings_updater.chat import Chat
+from swtor_settings_updater.util.swtor_case import swtor_lower
+
+
+def test_lazy_attributes() -> None:
+    assert swtor_settings_updater.Chat is Chat
+    assert util.swtor_lower is swtor_lower
+
+    for module in [swtor_settings_updater, util]:
+        for name in module.__all__:
+            assert name in dir(module)
+            getattr(module, name)
+
+        with pytest.raises(AttributeError):
+            getattr(module, "nonexistent")
+
+
+def test_importing_character_does_not_import_optional_dependencies() -> None:
+    code = (
+        "import sys\n"
+        "from swtor_settings_updater import character\n"
+        "modules = {'atomicwrites', 'configparser', 'regex'} & set(sys.modules)\n"
+        "assert not modules, modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,81 @@
+import hashlib
+import os
+from pathlib import Path
+
+import pytest
+
+from swtor_settings_updater.manifest import default_manifest_path
+from swtor_settings_updater.manifest import Manifest
+
+
+def sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_default_manifest_path_is_beside_settings_dir(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    settings_dir = tmp_path / "SWTOR"
+    assert default_manifest_path(settings_dir) == (
+        tmp_path / "SWTOR_settings_updater_manifest.json"
+    )
+
+    settings_dir.mkdir()
+    monkeypatch.chdir(settings_dir)
+    assert default_manifest_path(".") == Path.cwd().with_name(
+        "SWTOR_settings_updater_manifest.json"
+    )
+
+
+def test_manifest_round_trip(tmp_path: Path) -> None:
+    settings_file = tmp_path / "swtor" / "settings" / "he4242_Foo_PlayerGUIState.ini"
+    settings_file.parent.mkdir(parents=True)
+    settings_file.write_bytes(b"[Settings]\r\n")
+
+    manifest = Manifest.load(tmp_path / "manifest.json", tmp_path)
+    assert not manifest.is_current(settings_file, "1")
+
+    manifest.record(settings_file, settings_file.stat(), sha256(settings_file), "1")
+    manifest.save()
+
+    manifest = Manifest.load(tmp_path / "manifest.json", tmp_path)
+    assert list(manifest.entries) == ["swtor/settings/he4242_Foo_PlayerGUIState.ini"]
+    assert manifest.is_current(settings_file, "1")
+    assert not manifest.is_current(settings_file, "2")
+
+
+def test_manifest_compares_contents_if_modification_time_differs(
+    tmp_path: Path,
+) -> None:
+    settings_file = tmp_path / "he4242_Foo_PlayerGUIState.ini"
+    settings_file.write_bytes(b"[Settings]\r\n")
+
+    manifest = Manifest(tmp_path / "manifest.json", tmp_path)
+    manifest.record(settings_file, settings_file.stat(), sha256(settings_file), "1")
+
+    os.utime(settings_file, ns=(0, 0))
+    assert manifest.is_current(settings_file, "1")
+
+    settings_file.write_bytes(b"[Settings]\n\n")
+    assert not manifest.is_current(settings_file, "1")
+
+
+def test_manifest_retain_forgets_other_files(tmp_path: Path) -> None:
+    file_a = tmp_path / "a.ini"
+    file_b = tmp_path / "b.ini"
+    file_a.write_bytes(b"")
+    file_b.write_bytes(b"")
+
+    manifest = Manifest(tmp_path / "manifest.json", tmp_path)
+    manifest.record(file_a, file_a.stat(), sha256(file_a), "1")
+    manifest.record(file_b, file_b.stat(), sha256(file_b), "1")
+    manifest.retain([file_b])
+
+    assert list(manifest.entries) == ["b.ini"]
+
+
+def test_manifest_ignores_unknown_format(tmp_path: Path) -> None:
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text('{"version": 9000}')
+
+    assert Manifest.load(manifest_path, tmp_path).entries == {}
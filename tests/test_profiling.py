@@ -0,0 +1,99 @@
+import pstats
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import MutableMapping
+
+import pytest
+
+from swtor_settings_updater.character import CharacterMetadata
+from swtor_settings_updater.profiling import CallbackProfiler
+from swtor_settings_updater.profiling import ProfilerMode
+
+
+FAST = CharacterMetadata("swtor", "he4000", "Kai Zykken")
+SLOW = CharacterMetadata("swtor", "he4000", "Plagueis")
+
+
+def slow_function() -> None:
+    time.sleep(0.05)
+
+
+def update_settings(character: CharacterMetadata, s: MutableMapping[str, str]) -> None:
+    if character.name == SLOW.name:
+        slow_function()
+    s["GUI_QuickslotLockState"] = "true"
+
+
+@pytest.mark.parametrize("mode", ["cprofile", "timer"])
+def test_callback_profiler_flags_slow_calls(mode: ProfilerMode) -> None:
+    profiler = CallbackProfiler(update_settings, threshold=0.04, mode=mode)
+
+    settings: MutableMapping[str, str] = {}
+    for character in [FAST, SLOW, FAST]:
+        profiler(character, settings)
+
+    assert settings == {"GUI_QuickslotLockState": "true"}
+    assert [t.character for t in profiler.timings] == [FAST, SLOW, FAST]
+    assert [t.character for t in profiler.slow_calls()] == [SLOW]
+    assert profiler.slow_calls()[0].seconds >= 0.05
+
+    report = profiler.report()
+    assert report.startswith("1 of 3 callback(s) took over 0.04 s\n")
+    assert "swtor he4000 Plagueis" in report
+    assert ("slow_function" in report) == (mode == "cprofile")
+
+
+def test_callback_profiler_writes_stats(tmp_path: Path) -> None:
+    profiler = CallbackProfiler(update_settings, threshold=0.04)
+    profiler(FAST, {})
+    profiler(SLOW, {})
+
+    stats_path = tmp_path / "all.prof"
+    profiler.dump_stats(stats_path)
+    functions = pstats.Stats(str(stats_path)).get_stats_profile().func_profiles
+    assert "update_settings" in functions
+    assert "slow_function" in functions
+
+    assert profiler.dump_slow_stats(tmp_path) == [
+        tmp_path / "swtor_he4000_Plagueis.prof"
+    ]
+
+
+@pytest.mark.parametrize("mode", ["cprofile", "timer"])
+def test_callback_profiler_records_failing_calls(mode: ProfilerMode) -> None:
+    def fail(_character: CharacterMetadata, _s: MutableMapping[str, str]) -> None:
+        raise KeyError("fail")
+
+    profiler = CallbackProfiler(fail, mode=mode)
+    with pytest.raises(KeyError):
+        profiler(FAST, {})
+    assert [t.character for t in profiler.timings] == [FAST]
+
+
+def test_callback_profiler_serializes_cprofile_calls() -> None:
+    lock = threading.Lock()
+    active = 0
+    most_active = 0
+
+    def count(_character: CharacterMetadata, _s: MutableMapping[str, str]) -> None:
+        nonlocal active, most_active
+        with lock:
+            active += 1
+            most_active = max(most_active, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+
+    profiler = CallbackProfiler(count, mode="cprofile")
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda c: profiler(c, {}), [FAST, SLOW] * 4))
+
+    assert most_active == 1
+    assert len(profiler.timings) == 8
+
+
+def test_callback_profiler_rejects_unknown_mode() -> None:
+    with pytest.raises(ValueError):
+        CallbackProfiler(update_settings, mode="sampling")  # type: ignore[arg-type]
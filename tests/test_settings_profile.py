@@ -0,0 +1,96 @@
+import pytest
+
+from swtor_settings_updater.character import CharacterMetadata
+from swtor_settings_updater.settings_profile import SettingsProfile
+
+
+KAI = CharacterMetadata("swtor", "he4000", "Kai Zykken")
+PLAGUEIS = CharacterMetadata("publictest", "he4343", "Plagueis")
+SATELE = CharacterMetadata("swtor", "he3000", "Satele Shan")
+
+
+def make_profile() -> SettingsProfile:
+    profile = SettingsProfile(
+        {"GUI_CooldownStyle": "3", "GUI_GCDStyle": "1"}, delete=["GUI_Obsolete"]
+    )
+    profile.override({"gui_cooldownstyle": "2"}, server_ids=["HE4000"])
+    profile.override(
+        {"GUI_Obsolete": "true"}, delete=["GUI_GCDStyle"], names=["kai zykken"]
+    )
+    profile.override({"GUI_PTS": "true"}, environments=["publictest"])
+    return profile
+
+
+def test_settings_profile_resolves_overrides_in_order() -> None:
+    profile = make_profile()
+
+    changes = profile.resolve(SATELE)
+    assert changes.assignments == {
+        "gui_cooldownstyle": ("GUI_CooldownStyle", "3"),
+        "gui_gcdstyle": ("GUI_GCDStyle", "1"),
+    }
+    assert changes.deletions == {"gui_obsolete": "GUI_Obsolete"}
+
+    changes = profile.resolve(KAI)
+    assert changes.assignments == {
+        "gui_cooldownstyle": ("gui_cooldownstyle", "2"),
+        "gui_obsolete": ("GUI_Obsolete", "true"),
+    }
+    assert changes.deletions == {"gui_gcdstyle": "GUI_GCDStyle"}
+
+    changes = profile.resolve(PLAGUEIS)
+    assert changes.assignments["gui_pts"] == ("GUI_PTS", "true")
+    assert "gui_pts" not in profile.resolve(KAI).assignments
+
+
+def test_settings_profile_caches_resolved_changes() -> None:
+    profile = make_profile()
+
+    changes = profile.resolve(SATELE)
+    assert profile.resolve(CharacterMetadata("swtor", "he3001", "Other")) is changes
+    assert profile.resolve(KAI) is not changes
+
+    # The base changes are not modified by merging the overrides.
+    assert profile.base.assignments["gui_cooldownstyle"][1] == "3"
+
+
+def test_settings_profile_digest_tracks_contents() -> None:
+    assert make_profile().digest() == make_profile().digest()
+
+    profile = make_profile()
+    digest = profile.digest()
+    profile.override({"GUI_Extra": "1"}, names=["Plagueis"])
+    assert profile.digest() != digest
+
+
+@pytest.mark.parametrize(
+    "settings, delete, error",
+    [
+        ({"GUI_Test": 1}, [], TypeError),
+        ({"GUI=Test": "1"}, [], ValueError),
+        ({" GUI_Test": "1"}, [], ValueError),
+        ({"[GUI_Test]": "1"}, [], ValueError),
+        ({"GUI_Test": "1", "gui_test": "2"}, [], ValueError),
+        ({"GUI_Test": "1"}, ["GUI_TEST"], ValueError),
+        ({"GUI_Test": "☃"}, [], UnicodeEncodeError),
+        ({}, "GUI_Test", TypeError),
+    ],
+)
+def test_settings_profile_rejects_invalid_settings(
+    settings: dict, delete: list, error: type
+) -> None:
+    with pytest.raises(error):
+        SettingsProfile(settings, delete=delete)
+
+
+def test_settings_profile_override_requires_filters() -> None:
+    with pytest.raises(ValueError):
+        SettingsProfile().override({"GUI_Test": "1"})
+
+
+def test_settings_profile_with_overrides_is_picklable() -> None:
+    import pickle
+
+    profile = pickle.loads(pickle.dumps(make_profile()))
+    assert profile.resolve(KAI).assignments["gui_cooldownstyle"][1] == "2"
+    assert profile.digest() == make_profile().digest()
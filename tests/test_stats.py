@@ -0,0 +1,94 @@
+import json
+from pathlib import Path
+from typing import List
+
+import hypothesis.strategies as st
+import pytest
+from hypothesis import given
+
+from swtor_settings_updater.stats import FileStats
+from swtor_settings_updater.stats import percentile
+from swtor_settings_updater.stats import RunStats
+
+
+@given(st.lists(st.floats(allow_nan=False), min_size=1), st.integers(1, 100))
+def test_percentile_is_nearest_rank(values: List[float], p: int) -> None:
+    values.sort()
+    result = percentile(values, p)
+    assert result in values
+    # At least p% of the values are at most the result.
+    assert sum(v <= result for v in values) * 100 >= p * len(values)
+
+
+@pytest.mark.parametrize(
+    "p,expected", [(1, 1.0), (50, 5.0), (51, 6.0), (90, 9.0), (99, 10.0), (100, 10.0)]
+)
+def test_percentile_examples(p: int, expected: float) -> None:
+    assert percentile([float(v) for v in range(1, 11)], p) == expected
+
+
+def test_run_stats_summary(tmp_path: Path) -> None:
+    stats = RunStats()
+    stats.discover = 0.5
+    stats.skipped = 3
+    for ix in range(1, 5):
+        file_stats = FileStats(tmp_path / f"{ix}.ini", bytes_read=10)
+        file_stats.durations = {"read": ix * 0.25, "callback": 1.0}
+        if ix == 4:
+            file_stats.durations["write"] = 2.0
+            file_stats.bytes_written = 20
+            file_stats.rewritten = True
+        stats.files.append(file_stats)
+
+    summary = stats.summary()
+    assert summary["files"] == 4
+    assert summary["rewritten"] == 1
+    assert summary["skipped"] == 3
+    assert summary["bytes_read"] == 40
+    assert summary["bytes_written"] == 20
+    assert summary["phases"]["discover"] == {"total": 0.5}
+    assert summary["phases"]["read"] == {
+        "total": 2.5,
+        "mean": 0.625,
+        "p50": 0.5,
+        "p90": 1.0,
+        "p99": 1.0,
+        "max": 1.0,
+    }
+    assert summary["phases"]["write"]["p50"] == 0.0
+    assert summary["phases"]["write"]["max"] == 2.0
+    assert summary["per_file"]["max"] == 4.0
+
+    json_path = tmp_path / "stats.json"
+    stats.write_json(json_path, per_file=True)
+    data = json.loads(json_path.read_text(encoding="UTF-8"))
+    assert data["summary"] == summary
+    assert data["files"][3] == {
+        "path": str(tmp_path / "4.ini"),
+        "durations": {"read": 1.0, "callback": 1.0, "write": 2.0},
+        "bytes_read": 10,
+        "bytes_written": 20,
+        "rewritten": True,
+    }
+
+
+def test_run_stats_summary_of_no_files() -> None:
+    summary = RunStats().summary()
+    assert summary["files"] == 0
+    assert summary["phases"]["read"] == {"total": 0}
+
+
+def test_run_stats_report(tmp_path: Path) -> None:
+    stats = RunStats()
+    stats.discover = 0.5
+    file_stats = FileStats(tmp_path / "1.ini", bytes_read=10)
+    file_stats.durations = {"read": 0.25}
+    stats.files.append(file_stats)
+
+    lines = stats.report().splitlines()
+    assert lines[0] == "1 file(s), 0 rewritten, 0 excluded, 0 skipped in 0.000 s"
+    assert lines[1] == "10 byte(s) read, 0 byte(s) written"
+    assert lines[3].split() == ["ms", "total", "mean", "p50", "p90", "p99", "max"]
+    assert lines[4].split() == ["discover", "500.000"]
+    assert lines[5].split() == ["read"] + ["250.000"] * 6
+    assert lines[-1].split() == ["per", "file"] + ["250.000"] * 6
@@ -0,0 +1,155 @@
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+from typing import Generator
+from typing import List
+from typing import MutableMapping
+
+import pytest
+
+from swtor_settings_updater.character import CharacterMetadata
+from swtor_settings_updater.watch import Backend
+from swtor_settings_updater.watch import watch
+
+
+SETTINGS_PATH = Path("swtor/settings/he4000_Kai Zykken_PlayerGUIState.ini")
+
+CONTENT_BEFORE = b"[Settings]\r\nShow_Chat_TimeStamp = false\r\n"
+CONTENT_AFTER = b"[Settings]\r\nShow_Chat_TimeStamp = true\r\n\r\n"
+
+
+def wait_until(condition: Callable[[], bool], timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.01)
+
+
+class Watch:
+    """Run watch in a thread, recording the characters updated."""
+
+    path: Path
+    names: List[str]
+    stop: threading.Event
+    thread: threading.Thread
+
+    def __init__(self, settings_dir: Path, backend: Backend, debounce: float) -> None:
+        self.path = settings_dir / SETTINGS_PATH
+        self.names = []
+        self.stop = threading.Event()
+        self.thread = threading.Thread(
+            target=watch,
+            args=(settings_dir, self.update),
+            kwargs={
+                "debounce": debounce,
+                "poll_interval": 0.02,
+                "backend": backend,
+                "stop": self.stop,
+            },
+        )
+
+    def update(self, character: CharacterMetadata, s: MutableMapping[str, str]) -> None:
+        self.names.append(character.name)
+        s["Show_Chat_TimeStamp"] = "true"
+
+
+@pytest.fixture(params=["poll", "inotify"])
+def backend(request: pytest.FixtureRequest) -> Backend:
+    if request.param == "inotify":
+        import sys
+
+        if not sys.platform.startswith("linux"):
+            pytest.skip("inotify is only available on Linux")
+    return request.param
+
+
+@pytest.fixture()
+def settings_dir(tmp_path: Path) -> Path:
+    path = tmp_path / SETTINGS_PATH
+    path.parent.mkdir(parents=True)
+    path.write_bytes(CONTENT_BEFORE)
+    return tmp_path
+
+
+@pytest.fixture()
+def start_watch(
+    settings_dir: Path, backend: Backend
+) -> Generator[Callable[[float], Watch], None, None]:
+    watches = []
+
+    def start(debounce: float) -> Watch:
+        w = Watch(settings_dir, backend, debounce)
+        w.thread.start()
+        watches.append(w)
+        # Let the watch take its initial snapshot.
+        time.sleep(0.1)
+        return w
+
+    yield start
+
+    for w in watches:
+        w.stop.set()
+        w.thread.join(timeout=5)
+        assert not w.thread.is_alive()
+
+
+def test_watch_updates_rewritten_file(start_watch: Callable[[float], Watch]) -> None:
+    w = start_watch(0.05)
+    assert w.names == []
+
+    w.path.write_bytes(CONTENT_BEFORE)
+    wait_until(lambda: w.path.read_bytes() == CONTENT_AFTER)
+    assert w.names == ["Kai Zykken"]
+
+    # The rewrite by the watch itself is not updated again.
+    time.sleep(0.3)
+    assert w.names == ["Kai Zykken"]
+
+    w.path.write_bytes(CONTENT_BEFORE)
+    wait_until(lambda: len(w.names) == 2)
+
+
+def test_watch_debounces_writes(start_watch: Callable[[float], Watch]) -> None:
+    w = start_watch(0.3)
+
+    for n in range(5):
+        w.path.write_bytes(CONTENT_BEFORE + f"Write = {n}\r\n".encode())
+        time.sleep(0.03)
+
+    wait_until(lambda: w.names != [])
+    time.sleep(0.5)
+    assert w.names == ["Kai Zykken"]
+    assert w.path.read_bytes().endswith(b"Write = 4\r\n\r\n")
+
+
+def test_watch_continues_after_error(start_watch: Callable[[float], Watch]) -> None:
+    w = start_watch(0.05)
+
+    w.path.write_bytes(b"Invalid")
+    time.sleep(0.3)
+    assert w.path.read_bytes() == b"Invalid"
+
+    w.path.write_bytes(CONTENT_BEFORE)
+    wait_until(lambda: w.path.read_bytes() == CONTENT_AFTER)
+
+
+def test_watch_skips_unrecognized_filename(
+    start_watch: Callable[[float], Watch], caplog: pytest.LogCaptureFixture
+) -> None:
+    w = start_watch(0.05)
+
+    invalid_path = w.path.parent / "he4000_Bad_Name_PlayerGUIState.ini"
+    invalid_path.write_bytes(CONTENT_BEFORE)
+    time.sleep(0.3)
+    assert w.thread.is_alive()
+    assert "Bad_Name" in caplog.text
+
+    w.path.write_bytes(CONTENT_BEFORE)
+    wait_until(lambda: w.path.read_bytes() == CONTENT_AFTER)
+    assert invalid_path.read_bytes() == CONTENT_BEFORE
+
+
+def test_watch_requires_callback_or_profile(settings_dir: Path) -> None:
+    with pytest.raises(ValueError):
+        watch(settings_dir)
@@ -0,0 +1,63 @@
+from typing import Set
+
+import hypothesis.strategies as st
+import pytest
+from hypothesis import given
+
+from swtor_settings_updater.util.bitmask_set import bitmask_of
+from swtor_settings_updater.util.bitmask_set import BitmaskSet
+
+
+ixs = st.sets(st.integers(min_value=0, max_value=100))
+
+
+@given(ixs)
+def test_bitmask_set_behaves_like_set(a: Set[int]) -> None:
+    s = BitmaskSet(a)
+
+    assert s == a
+    assert set(s) == a
+    assert list(s) == sorted(a)
+    assert len(s) == len(a)
+    assert s.bitmask == sum(1 << ix for ix in a)
+    assert BitmaskSet.from_bitmask(s.bitmask) == s
+    for ix in range(-1, 102):
+        assert (ix in s) == (ix in a)
+
+
+@given(ixs, ixs)
+def test_bitmask_set_operations(a: Set[int], b: Set[int]) -> None:
+    for other in [b, BitmaskSet(b)]:
+        assert BitmaskSet(a) | other == a | b
+        assert BitmaskSet(a) & other == a & b
+        assert BitmaskSet(a) - other == a - b
+        assert BitmaskSet(a) ^ other == a ^ b
+        assert (BitmaskSet(a) <= other) == (a <= b)
+
+        s = BitmaskSet(a)
+        s |= other
+        assert s == a | b
+
+        s = BitmaskSet(a)
+        s -= other
+        assert s == a - b
+
+
+@given(ixs, st.integers(min_value=0, max_value=100))
+def test_bitmask_set_add_discard(a: Set[int], ix: int) -> None:
+    s = BitmaskSet(a)
+    s.add(ix)
+    assert s == a | {ix}
+    s.discard(ix)
+    assert s == a - {ix}
+
+
+def test_bitmask_set_rejects_negative_ixs() -> None:
+    with pytest.raises(ValueError):
+        BitmaskSet([-1])
+    with pytest.raises(ValueError):
+        BitmaskSet().add(-1)
+    with pytest.raises(ValueError):
+        BitmaskSet.from_bitmask(-1)
+    with pytest.raises(ValueError):
+        bitmask_of([-1])
@@ -14,6 +14,11 @@ from swtor_settings_updater.util.character_class import CP1252_PRINTABLE
 from swtor_settings_updater.util.character_class import regex_character_class
 
 
+def test_cp1252_printable_is_up_to_date() -> None:
+    all_characters = codecs.decode(bytes(range(0, 0x100)), "CP1252", errors="ignore")
+    assert CP1252_PRINTABLE == regex.sub(r"\p{C}+", "", all_characters)
+
+
 def test_cp1252_printable_encodes_as_cp1252() -> None:
     assert (
         codecs.decode(codecs.encode(CP1252_PRINTABLE, "CP1252"), "CP1252")
@@ -0,0 +1,151 @@
+import configparser
+from typing import Dict
+
+import pytest
+
+from swtor_settings_updater.util.ini_patcher import SettingsPatcher
+from swtor_settings_updater.util.key_table import KeyTable
+
+
+# fmt: off
+
+CONTENT = (
+    b"# Comment\r\n"
+    b"[Settings]\r\n"
+    b"GUI_ShowCooldownText=false\r\n"
+    b"\r\n"
+    b"Test :   \x80\xe4\xf6  \r\n"
+    b"Multi = line\r\n"
+    b"    value\r\n"
+    b"\r\n"
+    b"[Another Section]\r\n"
+    b"General = Kenobi\r\n"
+)
+
+# fmt: on
+
+
+def test_settings_patcher_reads_settings() -> None:
+    settings = SettingsPatcher(CONTENT)
+
+    assert dict(settings) == {
+        "GUI_ShowCooldownText": "false",
+        "Test": "€äö",
+        "Multi": "line\nvalue",
+    }
+    assert settings["gui_showcooldowntext"] == "false"
+    assert "General" not in settings
+
+
+def test_settings_patcher_preserves_unmodified_content() -> None:
+    settings = SettingsPatcher(CONTENT)
+    settings["Test"] = "€äö"
+
+    assert not settings.is_modified()
+    assert settings.patch() == CONTENT
+
+
+def test_settings_patcher_replaces_only_modified_lines() -> None:
+    settings = SettingsPatcher(CONTENT)
+    settings["gui_showcooldowntext"] = "true"
+    settings["New_Setting"] = "öäå"
+    del settings["multi"]
+
+    assert settings.patch() == (
+        b"# Comment\r\n"
+        b"[Settings]\r\n"
+        b"GUI_ShowCooldownText = true\r\n"
+        b"\r\n"
+        b"Test :   \x80\xe4\xf6  \r\n"
+        b"New_Setting = \xf6\xe4\xe5\r\n"
+        b"\r\n"
+        b"[Another Section]\r\n"
+        b"General = Kenobi\r\n"
+    )
+
+
+def test_settings_patcher_adds_to_empty_section_without_line_break() -> None:
+    settings = SettingsPatcher(b"[Settings]")
+    settings["Foo"] = "bar"
+
+    assert settings.patch() == b"[Settings]\r\nFoo = bar\r\n"
+
+    settings = SettingsPatcher(b"[Settings]\nFoo = bar")
+    settings["Baz"] = "quux"
+
+    assert settings.patch() == b"[Settings]\nFoo = bar\nBaz = quux\n"
+
+
+def read_configparser(content: bytes) -> Dict[str, str]:
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.optionxform = str  # type: ignore[assignment,method-assign]
+    parser.read_string(content.decode("CP1252"))
+    return dict(parser["Settings"])
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"[Settings]\r\n  A = 1\r\n  B = 2\r\n",
+        b"[Settings]\r\n  A = 1\r\n    more\r\nB = 2\r\n",
+        b"  [Settings]\r\n  A = 1\r\n  [Other]\r\n",
+        b"[Settings]\r\nA = 1\r\n\r\n\r\n  more\r\n\r\nB = 2\r\n",
+        b"[Settings]\r\nA = 1\r\n  # Comment\r\n  more\r\n\r\n",
+        b"[Settings]\r\nA =\r\n\r\n  more\r\n",
+        b"[Other]\r\nA = 1\r\n  [Settings]\r\n[Settings]\r\nB = 2\r\n",
+    ],
+)
+def test_settings_patcher_reads_like_configparser(content: bytes) -> None:
+    settings = SettingsPatcher(content)
+    assert dict(settings) == read_configparser(content)
+
+    # The patched keys keep their meaning for configparser.
+    expected = {key: f"{value}\nnew" for key, value in settings.items()}
+    for key, value in expected.items():
+        settings[key] = value
+    settings["Added"] = "x\n\ny"
+    expected["Added"] = "x\n\ny"
+    assert read_configparser(settings.patch()) == expected
+
+
+def test_settings_patcher_keeps_the_indentation_of_keys() -> None:
+    settings = SettingsPatcher(b"[Settings]\r\n  A = 1\r\n  B = 2\r\n")
+    settings["A"] = "3"
+    settings["C"] = "4"
+
+    assert settings.patch() == b"[Settings]\r\n  A = 3\r\n  B = 2\r\n  C = 4\r\n"
+
+
+def test_settings_patcher_rejects_invalid_content() -> None:
+    with pytest.raises(KeyError):
+        SettingsPatcher(b"[Other]\r\nFoo = bar\r\n")
+
+    with pytest.raises(ValueError):
+        SettingsPatcher(b"[Settings]\r\nFoo = bar\r\nfoo = baz\r\n")
+
+    with pytest.raises(ValueError):
+        SettingsPatcher(b"[Settings]\r\nFoo\r\n")
+
+    with pytest.raises(ValueError):
+        SettingsPatcher(b"[DEFAULT]\r\nFoo = bar\r\n[Settings]\r\n")
+
+
+def test_settings_patcher_rejects_non_cp1252_values() -> None:
+    settings = SettingsPatcher(CONTENT)
+    settings["Invalid"] = "√☃🤦"
+
+    with pytest.raises(UnicodeEncodeError):
+        settings.patch()
+
+
+def test_settings_patchers_share_a_key_table() -> None:
+    key_table = KeyTable()
+    settings0 = SettingsPatcher(CONTENT, key_table=key_table)
+    settings1 = SettingsPatcher(
+        CONTENT.replace(b"GUI_ShowCooldownText", b"gui_SHOWCOOLDOWNTEXT"),
+        key_table=key_table,
+    )
+
+    assert list(settings0) == ["GUI_ShowCooldownText", "Test", "Multi"]
+    assert list(settings1) == ["gui_SHOWCOOLDOWNTEXT", "Test", "Multi"]
+    assert list(settings0)[1] is list(settings1)[1]
@@ -0,0 +1,31 @@
+import pickle
+
+from swtor_settings_updater.util.key_table import KeyTable
+
+
+def test_key_table_interns_names() -> None:
+    table = KeyTable()
+
+    # Equal strings which are distinct objects.
+    name_a = "".join(["GUI_", "Cooldown"])
+    name_b = "".join(["GUI_Cool", "down"])
+    assert name_a is not name_b
+
+    interned_a, lower_a = table.lookup(name_a)
+    interned_b, lower_b = table.lookup(name_b)
+    assert interned_a == "GUI_Cooldown"
+    assert interned_a is interned_b
+    assert lower_a == "gui_cooldown"
+    assert lower_a is lower_b
+
+    assert table.lower("GUI_COOLDOWN") is lower_a
+    assert len(table) == 2
+
+
+def test_key_table_is_pickled_empty() -> None:
+    table = KeyTable()
+    table.lookup("GUI_Cooldown")
+
+    copy = pickle.loads(pickle.dumps(table))
+    assert len(copy) == 0
+    assert copy.lookup("GUI_Cooldown") == ("GUI_Cooldown", "gui_cooldown")
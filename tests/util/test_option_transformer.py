@@ -1,5 +1,6 @@
 import configparser
 
+from swtor_settings_updater.util.key_table import KeyTable
 from swtor_settings_updater.util.option_transformer import OptionTransformer
 
 
@@ -18,3 +19,21 @@ def test_option_transformer_preserves_case() -> None:
     parser1["Foo"] = {"HELLO": "there"}
 
     assert list(parser1["Foo"].keys()) == ["hElLo"]
+
+
+def test_option_transformers_sharing_a_key_table_keep_their_own_case() -> None:
+    key_table = KeyTable()
+
+    parser0 = configparser.ConfigParser()
+    OptionTransformer(key_table).install(parser0)
+    parser0["Foo"] = {"hElLo": "there"}
+
+    parser1 = configparser.ConfigParser()
+    OptionTransformer(key_table).install(parser1)
+    parser1["Foo"] = {"HELLO": "there"}
+    parser1["Foo"]["hello"] = "again"
+
+    assert list(parser0["Foo"].keys()) == ["hElLo"]
+    assert list(parser1["Foo"].keys()) == ["HELLO"]
+    assert dict(parser1["Foo"]) == {"HELLO": "again"}
+    assert len(key_table) == 3
@@ -1,9 +1,13 @@
+from typing import List
+
 import hypothesis.strategies as st
 import regex
 from hypothesis import given
 
 from swtor_settings_updater.util.swtor_case import swtor_lower
+from swtor_settings_updater.util.swtor_case import swtor_lower_all
 from swtor_settings_updater.util.swtor_case import swtor_upper
+from swtor_settings_updater.util.swtor_case import swtor_upper_all
 
 
 @given(st.text())
@@ -13,6 +17,7 @@ def test_swtor_lower(string: str) -> None:
     assert swtor_lower(lowered) == lowered
     assert swtor_lower(swtor_upper(string)) == lowered
     assert not regex.match("[A-Z]", lowered)
+    assert lowered == regex.sub("[A-Z]+", lambda m: m.group(0).lower(), string)
 
 
 @given(st.text())
@@ -22,3 +27,15 @@ def test_swtor_upper(string: str) -> None:
     assert swtor_upper(uppered) == uppered
     assert swtor_upper(swtor_lower(string)) == uppered
     assert not regex.match("[a-z]", uppered)
+    assert uppered == regex.sub("[a-z]+", lambda m: m.group(0).upper(), string)
+
+
+@given(st.lists(st.text()))
+def test_swtor_lower_all(strings: List[str]) -> None:
+    assert swtor_lower_all(strings) == [swtor_lower(s) for s in strings]
+    assert swtor_lower_all(iter(strings)) == [swtor_lower(s) for s in strings]
+
+
+@given(st.lists(st.text()))
+def test_swtor_upper_all(strings: List[str]) -> None:
+    assert swtor_upper_all(strings) == [swtor_upper(s) for s in strings]
@@ -0,0 +1,31 @@
+from swtor_settings_updater.util.tracking_mapping import TrackingMapping
+
+
+def test_tracking_mapping_records_changes() -> None:
+    data = {"Foo": "1", "Bar": "2", "Baz": "3"}
+    settings = TrackingMapping(data)
+
+    assert not settings.is_modified()
+
+    settings["Foo"] = "1"
+    assert not settings.is_modified()
+
+    settings["Bar"] = "two"
+    settings["Quux"] = "4"
+    del settings["Baz"]
+
+    assert settings.is_modified()
+    assert settings.changed_keys == {"Bar", "Quux", "Baz"}
+    assert data == {"Foo": "1", "Bar": "two", "Quux": "4"}
+    assert dict(settings) == data
+
+
+def test_tracking_mapping_does_not_touch_data_on_no_op_writes() -> None:
+    class ReadOnly(dict):
+        def __setitem__(self, key: str, value: str) -> None:
+            raise AssertionError("Tried to write")
+
+    settings = TrackingMapping(ReadOnly(Foo="1"))
+    settings["Foo"] = "1"
+
+    assert not settings.is_modified()
@@ -0,0 +1,76 @@
+import os
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from swtor_settings_updater.util.transaction import FileTransaction
+
+
+def make_files(tmp_path: Path) -> List[Path]:
+    paths = []
+    for name in ["a/1.ini", "a/2.ini", "b/3.ini"]:
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b"old " + name.encode())
+        paths.append(path)
+    return paths
+
+
+def test_file_transaction_replaces_files_on_commit(tmp_path: Path) -> None:
+    paths = make_files(tmp_path)
+
+    with FileTransaction() as transaction:
+        for path in paths:
+            transaction.stage(path, b"new " + path.name.encode())
+
+        # Nothing changes before the commit.
+        for path in paths:
+            assert path.read_bytes().startswith(b"old ")
+
+        transaction.commit()
+
+    for path in paths:
+        assert path.read_bytes() == b"new " + path.name.encode()
+    assert set(tmp_path.rglob("*.ini")) == set(paths)
+    assert len(list(tmp_path.rglob("*"))) == len(paths) + 2
+
+
+def test_file_transaction_syncs_each_directory_once(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    paths = make_files(tmp_path)
+
+    synced = []
+    real_fsync = os.fsync
+
+    def fsync(fd: int) -> None:
+        synced.append(fd)
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", fsync)
+
+    with FileTransaction() as transaction:
+        for path in paths:
+            transaction.stage(path, b"new")
+        transaction.commit()
+
+    expected = len(paths) + (0 if os.name == "nt" else 2)
+    assert len(synced) == expected
+
+
+def test_file_transaction_leaves_files_untouched_without_commit(
+    tmp_path: Path,
+) -> None:
+    paths = make_files(tmp_path)
+
+    with pytest.raises(RuntimeError):
+        with FileTransaction() as transaction:
+            for path in paths:
+                transaction.stage(path, b"new")
+            raise RuntimeError("fail")
+
+    for path in paths:
+        assert path.read_bytes().startswith(b"old ")
+    # The temporary files have been removed.
+    assert len(list(tmp_path.rglob("*"))) == len(paths) + 2